@@ -10,9 +10,54 @@ class Settings(BaseSettings):
     supabase_key: str
     supabase_service_key: str
     
+    # Pooled service-role clients and their HTTP keep-alive limits
+    supabase_pool_size: int = 4
+    supabase_max_connections: int = 50
+    supabase_max_keepalive_connections: int = 20
+    supabase_keepalive_expiry_seconds: float = 60.0
+    
     # Openrouter Configuration
     openrouter_api_key: str
     openrouter_model: str = "z-ai/glm-4.5-air:free"
+    openrouter_base_url: str = "https://openrouter.ai/api/v1"
+    # Comma-separated models tried after openrouter_model, in order
+    openrouter_fallback_models: str = ""
+    
+    # LLM routing and hedged requests
+    llm_request_timeout_seconds: float = 30.0
+    llm_hedge_percentile: float = 90.0
+    llm_hedge_default_delay_seconds: float = 8.0
+    llm_hedge_min_delay_seconds: float = 1.0
+    llm_hedge_max_delay_seconds: float = 20.0
+    llm_hedge_min_samples: int = 5
+    llm_hedge_error_rate_threshold: float = 0.5
+    llm_stats_window: int = 100
+    
+    # Section regeneration
+    section_variant_count: int = 3
+    section_variants_ttl_seconds: int = 1800
+    
+    # Prompt token budgets (estimated tokens)
+    prompt_entries_token_budget: int = 1800
+    prompt_voice_token_budget: int = 350
+    prompt_summary_token_limit: int = 80
+    prompt_max_entries: int = 15
+    
+    # Voice profiles (precomputed from voice training samples)
+    voice_profile_max_samples: int = 20
+    voice_profile_excerpt_count: int = 2
+    voice_profile_cache_ttl_seconds: int = 3600
+    
+    # Resolved bundle (metadata + source URLs) cache lifetime
+    bundle_cache_ttl_seconds: int = 900
+    
+    # Rendered newsletter HTML, keyed by draft content hash and bundle color
+    render_cache_ttl_seconds: int = 3600
+    # Inline CSS and minify rendered newsletter HTML
+    email_optimize_html: bool = True
+    
+    # Share identical auto-newsletter generations for this long
+    generation_coalesce_ttl_seconds: int = 600
     
     # API Configuration
     api_host: str = "0.0.0.0"
@@ -42,10 +87,39 @@ class Settings(BaseSettings):
     
     # Email Configuration (optional)
     sendgrid_api_key: str = ""
+    sendgrid_api_host: str = "https://api.sendgrid.com"
     smtp_host: str = ""
     smtp_port: int = 587
     smtp_username: str = ""
     smtp_password: str = ""
+    # STARTTLS before login; only disable for local test servers
+    smtp_use_tls: bool = True
+    smtp_pool_size: int = 4
+    smtp_max_messages_per_connection: int = 100
+    smtp_max_retries: int = 2
+    smtp_timeout_seconds: float = 30.0
+    smtp_idle_check_seconds: float = 30.0
+    sendgrid_personalizations_per_request: int = 1000
+    sendgrid_requests_per_second: float = 5.0
+    smtp_messages_per_second: float = 50.0
+    smtp_batch_size: int = 100
+    send_concurrency: int = 4
+    # Sends up to this many recipients complete before the API responds
+    send_sync_max_recipients: int = 25
+    send_sync_wait_seconds: float = 60.0
+    send_max_attempts: int = 3
+    send_retry_backoff_seconds: int = 30
+    send_claim_lease_seconds: int = 300
+    analytics_insert_chunk_size: int = 500
+    # Open/click tracking is buffered and applied in batches
+    tracking_flush_interval_seconds: float = 5.0
+    tracking_flush_max_events: int = 1000
+    tracking_flush_batch_size: int = 500
+    # One spill file per worker process; relative paths resolve against backend/
+    tracking_spill_dir: str = "tracking_spill"
+    # Hourly engagement rollups older than this are compacted into daily ones
+    analytics_rollup_hourly_retention_days: int = 30
+    analytics_rollup_compaction_interval_seconds: int = 3600
     from_email: str = "noreply@creatorpulse.com"
     from_name: str = "CreatorPulse"
     
@@ -1,12 +1,120 @@
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import httpx
+from postgrest.utils import SyncClient
 from supabase import create_client, Client
 from app.config import settings
 
 
+class SupabaseClientPool:
+    """Round-robin pool of Supabase clients that share keep-alive HTTP sessions
+
+    Each client owns one PostgREST HTTP session; reusing clients keeps their
+    connections (and TLS sessions) open across requests and services.
+    verify and proxy are applied to every pooled session; the defaults match the
+    ones supabase creates its PostgREST session with.
+    """
+
+    def __init__(self, url: str, key: str, size: int, verify: bool = True, proxy: Optional[str] = None):
+        self.url = url
+        self.key = key
+        self.size = max(1, size)
+        self.verify = verify
+        self.proxy = proxy
+        self._clients: List[Client] = []
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._counter = itertools.count()
+        self.stats = {"created": 0, "checkouts": 0, "health_checks": 0, "health_failures": 0}
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def get(self) -> Client:
+        """Next client in round-robin order, creating clients up to the pool size"""
+        self._count("checkouts")
+        if len(self._clients) < self.size:
+            with self._lock:
+                if len(self._clients) < self.size:
+                    self._clients.append(self._create_client())
+                    return self._clients[-1]
+        return self._clients[next(self._counter) % len(self._clients)]
+
+    def _create_client(self) -> Client:
+        """Create a client whose PostgREST session uses the configured keep-alive limits"""
+        client = create_client(self.url, self.key)
+
+        postgrest = client.postgrest
+        default_session = postgrest.session
+        postgrest.session = SyncClient(
+            base_url=default_session.base_url,
+            headers=default_session.headers,
+            timeout=default_session.timeout,
+            verify=self.verify,
+            proxy=self.proxy,
+            follow_redirects=True,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=settings.supabase_max_connections,
+                max_keepalive_connections=settings.supabase_max_keepalive_connections,
+                keepalive_expiry=settings.supabase_keepalive_expiry_seconds
+            )
+        )
+        default_session.close()
+
+        self._count("created")
+        return client
+
+    def health_check(self) -> Dict[str, Any]:
+        """Run a minimal query through the pool and report latency"""
+        self._count("health_checks")
+        started = time.perf_counter()
+        try:
+            self.get().table("bundles").select("id").limit(1).execute()
+            return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+        except Exception as e:
+            self._count("health_failures")
+            return {
+                "ok": False,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                "error": str(e)
+            }
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Pool size, usage counters and open HTTP connections per client"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        open_connections = []
+        for client in self._clients:
+            # httpx exposes no public connection count; read it defensively
+            pool = getattr(getattr(client.postgrest.session, "_transport", None), "_pool", None)
+            open_connections.append(len(getattr(pool, "connections", []) or []))
+
+        return {
+            "size": self.size,
+            "clients": len(self._clients),
+            "open_connections": open_connections,
+            **stats
+        }
+
+    def close(self) -> None:
+        """Close every client's HTTP session"""
+        with self._lock:
+            for client in self._clients:
+                client.postgrest.session.close()
+            self._clients = []
+
+
 class SupabaseDB:
     """Supabase database client wrapper"""
-    
+
     _client: Client = None
-    
+    _service_pool: SupabaseClientPool = None
+    _service_pool_lock = threading.Lock()
+
     @classmethod
     def get_client(cls) -> Client:
         """Get or create Supabase client instance"""
@@ -16,18 +124,27 @@ class SupabaseDB:
                 settings.supabase_key
             )
         return cls._client
-    
+
+    @classmethod
+    def get_service_pool(cls) -> SupabaseClientPool:
+        """Get or create the process-wide pool of service role clients"""
+        if cls._service_pool is None:
+            with cls._service_pool_lock:
+                if cls._service_pool is None:
+                    cls._service_pool = SupabaseClientPool(
+                        settings.supabase_url,
+                        settings.supabase_service_key,
+                        settings.supabase_pool_size
+                    )
+        return cls._service_pool
+
     @classmethod
     def get_service_client(cls) -> Client:
-        """Get Supabase client with service role key for admin operations"""
-        return create_client(
-            settings.supabase_url,
-            settings.supabase_service_key
-        )
+        """Get Supabase client with service role key for admin operations (pooled)"""
+        return cls.get_service_pool().get()
 
 
 # Convenience function to get database client
 def get_db() -> Client:
     """Get Supabase database client"""
     return SupabaseDB.get_client()
-
@@ -1,4 +1,6 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.routers import drafts, bundles, analytics, auth, linkedin, performance, voice_training
@@ -49,17 +51,41 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """Detailed health check"""
+    """Liveness check; never touches the database"""
+    from app.database import SupabaseDB
     return {
         "status": "healthy",
         "api": "operational",
-        "database": "connected",
+        "database_pool": SupabaseDB.get_service_pool().get_metrics(),
     }
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness check; runs a minimal query through the database pool"""
+    from app.database import SupabaseDB
+    pool = SupabaseDB.get_service_pool()
+    database = await asyncio.to_thread(pool.health_check)
+    body = {
+        "status": "ready" if database["ok"] else "unavailable",
+        "database": "connected" if database["ok"] else "unavailable",
+        "database_latency_ms": database["latency_ms"],
+    }
+    if not database["ok"]:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+
 @app.on_event("startup")
 async def startup_event():
     """Start background services on startup"""
+    try:
+        from app.services.bundle_cache_service import bundle_cache_service
+        warmed = bundle_cache_service.warm_presets()
+        print(f"[STARTUP] Bundle cache warmed with {warmed} preset bundles")
+    except Exception as e:
+        print(f"[STARTUP ERROR] Failed to warm bundle cache: {str(e)}")
+    
     try:
         from app.services.rss_crawler import rss_crawler
         rss_crawler.start()
@@ -73,6 +99,20 @@ async def startup_event():
         print("[STARTUP] Cron service started")
     except Exception as e:
         print(f"[STARTUP ERROR] Failed to start cron service: {str(e)}")
+    
+    try:
+        from app.services.tracking_buffer import tracking_buffer
+        await tracking_buffer.start()
+        print("[STARTUP] Tracking event buffer started")
+    except Exception as e:
+        print(f"[STARTUP ERROR] Failed to start tracking event buffer: {str(e)}")
+    
+    try:
+        from app.services.send_pipeline import send_pipeline
+        resumed = await send_pipeline.resume_unfinished_jobs()
+        print(f"[STARTUP] Resumed {resumed} unfinished email sends")
+    except Exception as e:
+        print(f"[STARTUP ERROR] Failed to resume email sends: {str(e)}")
 
 
 @app.on_event("shutdown")
@@ -91,6 +131,27 @@ async def shutdown_event():
         print("[SHUTDOWN] Cron service stopped")
     except Exception as e:
         print(f"[SHUTDOWN ERROR] Failed to stop cron service: {str(e)}")
+    
+    try:
+        from app.services.tracking_buffer import tracking_buffer
+        await tracking_buffer.stop()
+        print("[SHUTDOWN] Tracking event buffer flushed")
+    except Exception as e:
+        print(f"[SHUTDOWN ERROR] Failed to flush tracking event buffer: {str(e)}")
+    
+    try:
+        from app.services.smtp_pool import smtp_pool
+        smtp_pool.close()
+        print("[SHUTDOWN] SMTP connection pool closed")
+    except Exception as e:
+        print(f"[SHUTDOWN ERROR] Failed to close SMTP connection pool: {str(e)}")
+    
+    try:
+        from app.database import SupabaseDB
+        SupabaseDB.get_service_pool().close()
+        print("[SHUTDOWN] Database client pool closed")
+    except Exception as e:
+        print(f"[SHUTDOWN ERROR] Failed to close database client pool: {str(e)}")
 
 
 if __name__ == "__main__":
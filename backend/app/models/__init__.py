@@ -2,6 +2,7 @@ from .user import User, UserCreate, UserResponse
 from .bundle import Bundle, BundleCreate, BundleResponse
 from .draft import Draft, DraftCreate, DraftUpdate, DraftResponse, GenerateDraftRequest
 from .analytics import Analytics, AnalyticsSummary
+from .draft_document import DraftDocument, DraftSection
 
 __all__ = [
     "User",
@@ -17,5 +18,7 @@ __all__ = [
     "GenerateDraftRequest",
     "Analytics",
     "AnalyticsSummary",
+    "DraftDocument",
+    "DraftSection",
 ]
 
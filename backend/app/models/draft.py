@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional, List, Literal, Dict, Any
+from app.models.draft_document import DraftSection
 
 
 ToneType = Literal["professional", "conversational", "analytical", "friendly"]
@@ -28,6 +29,7 @@ class DraftCreate(DraftBase):
 
 class DraftUpdate(BaseModel):
     edited_html: Optional[str] = None
+    content_sections: Optional[List[DraftSection]] = None
     status: Optional[DraftStatus] = None
     scheduled_for: Optional[datetime] = None
 
@@ -59,6 +61,7 @@ class DraftResponse(BaseModel):
     tone: str
     generated_html: str
     edited_html: Optional[str]
+    content_sections: Optional[List[Dict[str, Any]]] = None
     status: str
     readiness_score: Optional[int]
     sources: List[str]
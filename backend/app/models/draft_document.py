@@ -0,0 +1,44 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class DraftSection(BaseModel):
+    """One tracked block of draft or newsletter HTML (e.g. a draft-insight div)"""
+    kind: str
+    inner_html: str
+    text: str
+    title: Optional[str] = None
+    paragraph: Optional[str] = None
+    summary: Optional[str] = None
+    items: List[str] = []
+    parent: Optional[str] = None
+
+
+class DraftDocument(BaseModel):
+    """Sections of a draft in document order, parsed once from its HTML"""
+    sections: List[DraftSection] = []
+
+    def find(self, kind: str, parent: Optional[str] = None) -> Optional[DraftSection]:
+        return next(iter(self.find_all(kind, parent)), None)
+
+    def find_all(self, kind: str, parent: Optional[str] = None) -> List[DraftSection]:
+        return [
+            section for section in self.sections
+            if section.kind == kind and (parent is None or section.parent == parent)
+        ]
+
+    @property
+    def intro(self) -> Optional[DraftSection]:
+        return self.find("draft-intro")
+
+    @property
+    def insights(self) -> List[DraftSection]:
+        return self.find_all("draft-insight")
+
+    @property
+    def trends(self) -> Optional[DraftSection]:
+        return self.find("draft-trends")
+
+    @property
+    def featured(self) -> Optional[DraftSection]:
+        return self.find("draft-featured") or self.find("featured-story")
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, Response, Request
+from fastapi import APIRouter, HTTPException, Depends, Response, Request, Query
 from fastapi.responses import RedirectResponse
 from app.models.analytics import AnalyticsSummary
 from app.database import get_db, SupabaseDB
 from app.utils.auth import get_current_user
 from app.services.cache_service import cache_service
+from app.services.tracking_buffer import tracking_buffer
+from app.services.analytics_service import analytics_service
+from app.config import settings
+from app.utils.tracking_tokens import verify_tracking_token, is_legacy_token
 from typing import Optional
 import base64
 import asyncio
@@ -16,6 +20,19 @@ TRANSPARENT_GIF = base64.b64decode(
 )
 
 
+def _record_tracking_hit(event_type: str, draft_id: str, token: Optional[str], url: Optional[str] = None) -> None:
+    """Buffer a pixel/link hit; forged, garbage or missing tokens are dropped without touching the DB"""
+    if not token:
+        return
+    verified = verify_tracking_token(token)
+    if verified:
+        analytics_id, _ = verified
+        tracking_buffer.record(event_type, draft_id, url=url, analytics_id=analytics_id)
+    elif is_legacy_token(token):
+        # Emails sent before signed tokens still carry a random UUID
+        tracking_buffer.record(event_type, draft_id, token=token, url=url)
+
+
 @router.get("/", response_model=AnalyticsSummary)
 async def get_analytics(current_user: dict = Depends(get_current_user)):
     """Get analytics summary for user with caching"""
@@ -29,50 +46,17 @@ async def get_analytics(current_user: dict = Depends(get_current_user)):
         
         db = SupabaseDB.get_service_client()  # Use service role to bypass RLS
         
-        # Optimized queries with better performance
-        # Get total drafts and sent drafts in parallel
-        drafts_task = asyncio.create_task(
-            asyncio.to_thread(
-                lambda: db.table("drafts")
-                .select("id,status", count="exact")
-                .eq("user_id", user_id)
-                .execute()
-            )
-        )
-        
-        sent_task = asyncio.create_task(
-            asyncio.to_thread(
-                lambda: db.table("drafts")
-                .select("id", count="exact")
-                .eq("user_id", user_id)
-                .eq("status", "sent")
-                .execute()
-            )
-        )
-        
-        # Get analytics data with optimized query
-        analytics_task = asyncio.create_task(
-            asyncio.to_thread(
-                lambda: db.table("analytics")
-                .select("opened_at,clicked_at")
-                .execute()
-            )
-        )
-        
-        # Wait for all queries to complete
-        drafts_response, sent_response, analytics_response = await asyncio.gather(
-            drafts_task, sent_task, analytics_task
+        # Counts are aggregated in the database, so only one small row comes back
+        summary_response = await asyncio.to_thread(
+            lambda: db.rpc("get_user_analytics_summary", {"p_user_id": user_id}).execute()
         )
+        summary = (summary_response.data or [{}])[0]
         
-        # Process results
-        total_drafts = drafts_response.count or 0
-        total_sent = sent_response.count or 0
-        analytics_data = analytics_response.data or []
-        
-        # Calculate metrics more efficiently
-        total_emails_sent = len(analytics_data)
-        total_opened = sum(1 for a in analytics_data if a.get("opened_at"))
-        total_clicked = sum(1 for a in analytics_data if a.get("clicked_at"))
+        total_drafts = summary.get("total_drafts") or 0
+        total_sent = summary.get("total_sent") or 0
+        total_emails_sent = summary.get("total_emails_sent") or 0
+        total_opened = summary.get("total_opened") or 0
+        total_clicked = summary.get("total_clicked") or 0
         
         open_rate = (total_opened / total_emails_sent * 100) if total_emails_sent > 0 else 0
         click_through_rate = (total_clicked / total_emails_sent * 100) if total_emails_sent > 0 else 0
@@ -96,37 +80,78 @@ async def get_analytics(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Failed to fetch analytics: {str(e)}")
 
 
+@router.get("/timeline")
+async def get_engagement_timeline(
+    draft_id: Optional[str] = None,
+    days: int = Query(7, ge=1, le=365, description="How far back the timeline goes"),
+    granularity: str = Query("hour", pattern="^(hour|day)$"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Opens and clicks over time for the user or one of their drafts, served from rollups
+
+    Repeated opens/clicks by one recipient within a tracking flush window count once.
+    """
+    try:
+        user_id = current_user["id"]
+        if granularity == "hour" and days > settings.analytics_rollup_hourly_retention_days:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Hourly timelines cover at most {settings.analytics_rollup_hourly_retention_days} days"
+            )
+        
+        scope, scope_id = "user", user_id
+        if draft_id:
+            db = SupabaseDB.get_service_client()
+            draft_response = await asyncio.to_thread(
+                lambda: db.table("drafts").select("id").eq("id", draft_id).eq("user_id", user_id).execute()
+            )
+            if not draft_response.data:
+                raise HTTPException(status_code=404, detail="Draft not found")
+            scope, scope_id = "draft", draft_id
+        
+        points = await analytics_service.get_timeline(scope, scope_id, days, granularity)
+        return {
+            "draft_id": draft_id,
+            "granularity": granularity,
+            "days": days,
+            "points": points
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[ERROR] Failed to fetch engagement timeline: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch engagement timeline: {str(e)}")
+
+
 @router.get("/drafts/{draft_id}")
 async def get_draft_analytics(draft_id: str):
     """Get analytics for a specific draft"""
     try:
         db = SupabaseDB.get_service_client()  # Use service role to bypass RLS
         
-        # Get analytics for this draft
-        response = db.table("analytics").select("*").eq("draft_id", draft_id).execute()
-        analytics_data = response.data
-        
-        if not analytics_data:
-            return {
-                "draft_id": draft_id,
-                "opens": 0,
-                "clicks": 0,
-                "open_rate": 0,
-                "click_rate": 0,
-                "sent_at": None
-            }
+        # Counters are kept up to date by triggers on analytics; one primary-key lookup
+        response = await asyncio.to_thread(
+            lambda: db.table("draft_engagement_counters")
+            .select("sent,unique_opens,unique_clicks,first_sent_at,last_event_at")
+            .eq("draft_id", draft_id)
+            .limit(1)
+            .execute()
+        )
+        counters = response.data[0] if response.data else {}
         
-        total_sent = len(analytics_data)
-        total_opened = len([a for a in analytics_data if a.get("opened_at")])
-        total_clicked = len([a for a in analytics_data if a.get("clicked_at")])
+        total_sent = counters.get("sent") or 0
+        total_opened = counters.get("unique_opens") or 0
+        total_clicked = counters.get("unique_clicks") or 0
         
         return {
             "draft_id": draft_id,
+            "sent": total_sent,
             "opens": total_opened,
             "clicks": total_clicked,
             "open_rate": round((total_opened / total_sent * 100) if total_sent > 0 else 0, 1),
             "click_rate": round((total_clicked / total_sent * 100) if total_sent > 0 else 0, 1),
-            "sent_at": analytics_data[0].get("sent_at")
+            "sent_at": counters.get("first_sent_at"),
+            "last_event_at": counters.get("last_event_at")
         }
     except Exception as e:
         print(f"[ERROR] Failed to fetch draft analytics: {str(e)}")
@@ -137,22 +162,8 @@ async def get_draft_analytics(draft_id: str):
 async def track_email_open(draft_id: str, recipient_email: Optional[str] = None):
     """Track email open event"""
     try:
-        db = SupabaseDB.get_service_client()  # Use service role to bypass RLS
-        
-        # Find the analytics record
-        query = db.table("analytics").select("*").eq("draft_id", draft_id)
-        if recipient_email:
-            query = query.eq("recipient_email", recipient_email)
-        
-        response = query.execute()
-        
-        if response.data:
-            # Update with opened_at timestamp
-            from datetime import datetime
-            db.table("analytics").update({
-                "opened_at": datetime.now().isoformat()
-            }).eq("id", response.data[0]["id"]).execute()
-        
+        # Buffered; applied to the analytics row in the next batched flush
+        tracking_buffer.record("open", draft_id, recipient_email=recipient_email)
         return {"success": True, "message": "Open tracked"}
     except Exception as e:
         print(f"[ERROR] Failed to track open: {str(e)}")
@@ -163,22 +174,8 @@ async def track_email_open(draft_id: str, recipient_email: Optional[str] = None)
 async def track_link_click(draft_id: str, recipient_email: Optional[str] = None):
     """Track link click event"""
     try:
-        db = SupabaseDB.get_service_client()  # Use service role to bypass RLS
-        
-        # Find the analytics record
-        query = db.table("analytics").select("*").eq("draft_id", draft_id)
-        if recipient_email:
-            query = query.eq("recipient_email", recipient_email)
-        
-        response = query.execute()
-        
-        if response.data:
-            # Update with clicked_at timestamp
-            from datetime import datetime
-            db.table("analytics").update({
-                "clicked_at": datetime.now().isoformat()
-            }).eq("id", response.data[0]["id"]).execute()
-        
+        # Buffered; applied to the analytics row in the next batched flush
+        tracking_buffer.record("click", draft_id, recipient_email=recipient_email)
         return {"success": True, "message": "Click tracked"}
     except Exception as e:
         print(f"[ERROR] Failed to track click: {str(e)}")
@@ -189,53 +186,19 @@ async def track_link_click(draft_id: str, recipient_email: Optional[str] = None)
 async def track_email_open_get(draft_id: str, token: Optional[str] = None):
     """Track email open event via GET (for tracking pixel)"""
     try:
-        db = SupabaseDB.get_service_client()
-        
-        # Find the analytics record
-        query = db.table("analytics").select("*").eq("draft_id", draft_id)
-        if token:
-            query = query.eq("token", token)
-        
-        response = query.execute()
-        
-        if response.data:
-            # Update with opened_at timestamp
-            from datetime import datetime
-            db.table("analytics").update({
-                "opened_at": datetime.now().isoformat()
-            }).eq("id", response.data[0]["id"]).execute()
-        
-        # Return 1x1 transparent GIF
-        return Response(content=TRANSPARENT_GIF, media_type="image/gif")
+        _record_tracking_hit("open", draft_id, token)
     except Exception as e:
         print(f"[ERROR] Failed to track open: {str(e)}")
-        # Still return a pixel to avoid broken images
-        return Response(content=TRANSPARENT_GIF, media_type="image/gif")
+    # Always return the 1x1 transparent GIF to avoid broken images
+    return Response(content=TRANSPARENT_GIF, media_type="image/gif")
 
 
 @router.get("/track/click/{draft_id}")
 async def track_link_click_get(draft_id: str, url: str, token: Optional[str] = None):
     """Track link click event via GET (for wrapped links)"""
     try:
-        db = SupabaseDB.get_service_client()
-        
-        # Find the analytics record
-        query = db.table("analytics").select("*").eq("draft_id", draft_id)
-        if token:
-            query = query.eq("token", token)
-        
-        response = query.execute()
-        
-        if response.data:
-            # Update with clicked_at timestamp
-            from datetime import datetime
-            db.table("analytics").update({
-                "clicked_at": datetime.now().isoformat(),
-                "last_clicked_url": url
-            }).eq("id", response.data[0]["id"]).execute()
+        _record_tracking_hit("click", draft_id, token, url=url)
     except Exception as e:
         print(f"[ERROR] Failed to track click: {str(e)}")
-    finally:
-        # Always redirect to the original URL
-        return RedirectResponse(url=url, status_code=302)
-
+    # Always redirect to the original URL
+    return RedirectResponse(url=url, status_code=302)
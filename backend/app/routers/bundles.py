@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Dict, Any
 from app.models.bundle import Bundle, BundleResponse, Source
 from app.database import get_db, SupabaseDB
+from app.services.bundle_cache_service import bundle_cache_service
 import json
 import re
 
@@ -124,6 +125,7 @@ async def add_source_to_bundle(bundle_id: str, source: Source):
         }
         
         result = db.table("sources").insert(source_data).execute()
+        bundle_cache_service.invalidate(bundle_id)
         
         return {"success": True, "source_id": result.data[0]["id"]}
         
@@ -147,6 +149,7 @@ async def remove_source_from_bundle(bundle_id: str, source_id: str):
         
         # Delete source
         db.table("sources").delete().eq("id", source_id).execute()
+        bundle_cache_service.invalidate(bundle_id)
         
         return {"success": True}
         
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
-from datetime import datetime
 from app.models.draft import (
     DraftResponse,
     GenerateDraftRequest,
@@ -9,9 +8,18 @@ from app.models.draft import (
 )
 from app.services.draft_generator import DraftGeneratorService
 from app.services.cache_service import cache_service
+from app.services.send_pipeline import send_pipeline
+from app.services.analytics_service import analytics_service
+from app.services.draft_parser import (
+    dump_draft_document,
+    load_draft_document,
+    parse_draft_html,
+    serialize_draft_document
+)
+from app.models.draft_document import DraftDocument
 from app.database import get_db, SupabaseDB
 from app.utils.auth import get_current_user
-import uuid
+from app.config import settings
 
 router = APIRouter()
 draft_service = DraftGeneratorService()
@@ -106,8 +114,15 @@ async def update_draft(draft_id: str, update: DraftUpdate, current_user: dict =
         
         # Build update data
         update_data = {}
-        if update.edited_html is not None:
+        if update.content_sections is not None:
+            # Structured edit: only each top-level section's inner_html is taken from the client;
+            # titles, paragraphs, items and nested sections are re-derived from it server-side
+            edited_html = serialize_draft_document(DraftDocument(sections=update.content_sections))
+            update_data["edited_html"] = edited_html
+            update_data["content_sections"] = dump_draft_document(parse_draft_html(edited_html))
+        elif update.edited_html is not None:
             update_data["edited_html"] = update.edited_html
+            update_data["content_sections"] = dump_draft_document(parse_draft_html(update.edited_html))
         if update.status is not None:
             update_data["status"] = update.status
         if update.scheduled_for is not None:
@@ -121,6 +136,9 @@ async def update_draft(draft_id: str, update: DraftUpdate, current_user: dict =
         if not response.data:
             raise HTTPException(status_code=404, detail="Draft not found")
         
+        await cache_service.invalidate_rendered_emails(user_id)
+        # Variants were generated from the previous content
+        await cache_service.invalidate_section_variants(user_id)
         return response.data[0]
     except HTTPException:
         raise
@@ -140,6 +158,7 @@ async def delete_draft(draft_id: str, current_user: dict = Depends(get_current_u
         if not response.data:
             raise HTTPException(status_code=404, detail="Draft not found")
         
+        await cache_service.invalidate_rendered_emails(user_id)
         return {"success": True, "message": "Draft deleted successfully"}
     except HTTPException:
         raise
@@ -162,63 +181,65 @@ async def send_draft(draft_id: str, request: SendDraftRequest, current_user: dic
         
         draft = draft_response.data[0]
         
-        # Send email using new template system with token tracking
-        from app.services.email_service import EmailService
-        email_service = EmailService()
-        
         # Get the rendered email content
         from app.services.email_renderer_service import EmailRendererService
         renderer = EmailRendererService()
         email_data = await renderer.render_draft_for_sending(
             draft_id=draft_id,
             custom_subject=request.subject,
-            custom_bundle_color=request.bundle_color
+            custom_bundle_color=request.bundle_color,
+            draft=draft
         )
         
-        # Create analytics entries with tokens first
-        recipients_with_tokens = []
-        for recipient in request.recipients:
-            token = str(uuid.uuid4())
-            db.table("analytics").insert({
-                "draft_id": draft_id,
-                "sent_at": datetime.now().isoformat(),
-                "recipient_email": recipient,
-                "token": token
-            }).execute()
-            
-            recipients_with_tokens.append({
-                "email": recipient,
-                "token": token
-            })
-        
-        send_result = await email_service.send_newsletter_with_tokens(
+        # Create analytics entries with tokens first (chunked bulk insert)
+        recipients_with_tokens = await analytics_service.create_recipient_rows(draft_id, request.recipients)
+        
+        # Queue the send; it is drained in the background with batching, rate limiting and retries
+        job = await send_pipeline.start(
+            draft_id=draft_id,
+            user_id=user_id,
             recipients_with_tokens=recipients_with_tokens,
             subject=email_data["subject"],
             html_content=email_data["html_content"],
-            draft_id=draft_id,
             use_sendgrid=False  # Use SMTP for now
         )
         
-        if send_result.get("success"):
-            # Mark as sent
-            sent_at = datetime.now().isoformat()
-            db.table("drafts").update({
-                "status": "sent",
-                "sent_at": sent_at
-            }).eq("id", draft_id).execute()
-            
+        started_response = {
+            "success": True,
+            "message": "Draft send started",
+            "draft_id": draft_id,
+            "job_id": job.id,
+            "status": job.status,
+            "recipients_count": job.total,
+            "method": job.method
+        }
+        
+        if len(recipients_with_tokens) > settings.send_sync_max_recipients:
+            # Large send: report progress via the send-status endpoint
+            return started_response
+        
+        finished = await send_pipeline.wait(job, timeout=settings.send_sync_wait_seconds)
+        if not finished or not job.finished_at:
+            # Still retrying failed recipients (or interrupted); finish in the background
+            return started_response
+        
+        if job.sent:
+            failed_recipients = await send_pipeline.get_failed_recipients(job.id) if job.failed else []
+            failed = set(failed_recipients)
             return {
                 "success": True,
                 "message": "Draft sent successfully",
                 "draft_id": draft_id,
-                "sent_to": request.recipients,
-                "sent_at": sent_at,
-                "method": send_result.get("method", "unknown")
+                "job_id": job.id,
+                "sent_to": [r for r in request.recipients if r not in failed],
+                "failed_recipients": failed_recipients,
+                "sent_at": job.finished_at.isoformat(),
+                "method": job.method
             }
         else:
             raise HTTPException(
                 status_code=500,
-                detail=f"Failed to send email: {send_result.get('error', 'Unknown error')}"
+                detail=f"Failed to send email: {job.errors[-1] if job.errors else 'Unknown error'}"
             )
     except HTTPException:
         raise
@@ -227,6 +248,15 @@ async def send_draft(draft_id: str, request: SendDraftRequest, current_user: dic
         raise HTTPException(status_code=500, detail=f"Failed to send draft: {str(e)}")
 
 
+@router.get("/{draft_id}/send-status/{job_id}")
+async def get_send_status(draft_id: str, job_id: str, current_user: dict = Depends(get_current_user)):
+    """Get progress of a draft send"""
+    status = await send_pipeline.get_status(job_id)
+    if not status or status["draft_id"] != draft_id or status["user_id"] != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Send job not found")
+    return status
+
+
 @router.get("/{draft_id}/preview")
 async def get_draft_preview(draft_id: str, current_user: dict = Depends(get_current_user), bundle_color: Optional[str] = None):
     """Get preview of draft as rendered email"""
@@ -245,7 +275,8 @@ async def get_draft_preview(draft_id: str, current_user: dict = Depends(get_curr
         
         preview = await email_service.get_draft_preview(
             draft_id=draft_id,
-            custom_bundle_color=bundle_color
+            custom_bundle_color=bundle_color,
+            draft=draft_response.data[0]
         )
         
         return preview
@@ -277,7 +308,8 @@ async def send_test_email(draft_id: str, recipient: str, current_user: dict = De
         # Get preview content
         preview = await email_service.get_draft_preview(
             draft_id=draft_id,
-            custom_bundle_color=None
+            custom_bundle_color=None,
+            draft=draft
         )
         
         send_result = await email_service.send_test_email(
@@ -302,15 +334,82 @@ async def send_test_email(draft_id: str, recipient: str, current_user: dict = De
 
 
 @router.post("/{draft_id}/regenerate")
-async def regenerate_section(draft_id: str, section: str = "intro", current_user: dict = Depends(get_current_user)):
-    """Regenerate a specific section of the draft"""
-    # For MVP, return mock regenerated content
-    # TODO: Implement OpenAI regeneration
-    return {
-        "success": True,
-        "section": section,
-        "content": f"<h3>Regenerated {section}</h3><p>New content here...</p>"
-    }
-
+async def regenerate_section(
+    draft_id: str,
+    section: str = "intro",
+    variant: Optional[int] = Query(None, ge=0, description="Index of a cached variant to show"),
+    refresh: bool = Query(False, description="Discard cached variants and generate a new set"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Regenerate a specific section of the draft, cycling through cached variants"""
+    try:
+        user_id = current_user["id"]
+        
+        # Serve from cached variants so repeated clicks don't cost an LLM round trip
+        cached = None if refresh else await cache_service.get_section_variants(
+            user_id, draft_id, section, ttl_seconds=settings.section_variants_ttl_seconds
+        )
+        if variant is not None and (not cached or variant >= len(cached["variants"])):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Variant {variant} is not available; regenerate without a variant index"
+            )
+        if cached:
+            variants = cached["variants"]
+            index = variant if variant is not None else cached["cursor"] + 1
+            if index < len(variants):
+                await cache_service.set_section_variants(
+                    user_id, draft_id, section, {**cached, "cursor": index},
+                    ttl_seconds=settings.section_variants_ttl_seconds
+                )
+                return {
+                    "success": True,
+                    "section": section,
+                    "content": variants[index],
+                    "variant_index": index,
+                    "variants": variants,
+                    "cached": True
+                }
+        
+        db = SupabaseDB.get_service_client()  # Use service role to bypass RLS
+        draft_response = db.table("drafts").select("*").eq("id", draft_id).eq("user_id", user_id).execute()
+        if not draft_response.data:
+            raise HTTPException(status_code=404, detail="Draft not found")
+        
+        draft = draft_response.data[0]
+        current_content = _extract_section_html(draft, section)
+        entries = [{"title": "Source Article", "summary": "", "link": link} for link in draft.get("sources", [])]
+        
+        variants = await draft_service.ai_service.regenerate_section_variants(
+            section_type=section,
+            current_content=current_content,
+            entries=entries,
+            tone=draft.get("tone", "professional"),
+            num_variants=settings.section_variant_count
+        )
+        
+        await cache_service.set_section_variants(
+            user_id, draft_id, section, {"variants": variants, "cursor": 0},
+            ttl_seconds=settings.section_variants_ttl_seconds
+        )
+        
+        return {
+            "success": True,
+            "section": section,
+            "content": variants[0],
+            "variant_index": 0,
+            "variants": variants,
+            "cached": False
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[ERROR] Failed to regenerate section: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to regenerate section: {str(e)}")
 
 
+def _extract_section_html(draft: dict, section: str) -> str:
+    """Extract the inner HTML of a draft section (intro, insight, trends)"""
+    section_class = "draft-insight" if section in ("insight", "insights") else f"draft-{section}"
+    match = load_draft_document(draft).find(section_class)
+    return match.inner_html.strip() if match else ""
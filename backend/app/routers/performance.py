@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.services.performance_service import performance_service
+from app.services.llm_router import llm_router
+from app.services.tracking_buffer import tracking_buffer
+from app.database import SupabaseDB
 from app.utils.auth import get_current_user
 from typing import Dict, Any
 
@@ -38,3 +41,33 @@ async def clear_old_metrics(
         return {"message": f"Cleared metrics older than {hours} hours"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to clear metrics: {str(e)}")
+
+@router.get("/llm")
+async def get_llm_routing_stats(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get per-model LLM latency, error and hedging statistics"""
+    try:
+        return llm_router.get_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get LLM stats: {str(e)}")
+
+@router.get("/database-pool")
+async def get_database_pool_metrics(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get Supabase client pool usage and open connections"""
+    try:
+        return SupabaseDB.get_service_pool().get_metrics()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get database pool metrics: {str(e)}")
+
+@router.get("/tracking")
+async def get_tracking_buffer_metrics(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get buffered open/click tracking events and flush statistics"""
+    try:
+        return tracking_buffer.get_metrics()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get tracking metrics: {str(e)}")
@@ -157,7 +157,8 @@ async def clear_all_voice_samples(
         
         # Delete all samples
         for sample in samples:
-            voice_training_service.delete_voice_sample(user_id, sample.id)
+            voice_training_service.delete_voice_sample(user_id, sample.id, refresh_profile=False)
+        voice_training_service.refresh_voice_profile(user_id)
         
         return {
             "message": f"Successfully cleared {sample_count} voice samples",
@@ -1,17 +1,23 @@
-from openai import OpenAI
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from app.config import settings
+from app.services.llm_router import llm_router
+from app.services.prompt_builder import PromptBuilder
+
+
+# Separator used when several section variants are requested in one completion
+VARIANT_DELIMITER = "===VARIANT==="
+
+# Models observed to ignore the `n` parameter (model -> supports n)
+_N_PARAM_SUPPORT: Dict[str, bool] = {}
 
 
 class AIService:
     """Service for Openrouter API interactions (OpenAI-compatible)"""
     
     def __init__(self):
-        self.client = OpenAI(
-            api_key=settings.openrouter_api_key,
-            base_url="https://openrouter.ai/api/v1"
-        )
+        self.router = llm_router
         self.model = settings.openrouter_model  # Default: z-ai/glm-4.5-air:free
+        self.prompt_builder = PromptBuilder()
     
     async def generate_newsletter_draft(
         self,
@@ -19,26 +25,39 @@ class AIService:
         tone: str = "professional",
         topic: str = None,
         bundle_name: str = "Tech News",
-        voice_samples: List[Dict] = None
+        voice_profile: Dict = None
     ) -> str:
         """Generate a newsletter draft from RSS entries"""
+        html_content, _ = await self.generate_newsletter_draft_or_fallback(
+            entries, tone, topic, bundle_name, voice_profile
+        )
+        return html_content
+    
+    async def generate_newsletter_draft_or_fallback(
+        self,
+        entries: List[Dict],
+        tone: str = "professional",
+        topic: str = None,
+        bundle_name: str = "Tech News",
+        voice_profile: Dict = None
+    ) -> Tuple[str, bool]:
+        """Generate a newsletter draft; returns (html, True) when the fallback content was used"""
         
         # Build system prompt with optional voice training
-        system_prompt = self._build_system_prompt(tone, voice_samples)
+        system_prompt = self._build_system_prompt(tone, voice_profile)
         
         # Build user prompt with entries
         user_prompt = self._build_user_prompt(entries, topic, bundle_name)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response, _ = await self.router.complete(
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
+                model=self.model,
                 temperature=0.7,
-                max_tokens=1500,
-                timeout=30  # 30 second timeout
+                max_tokens=1500
             )
             
             content = response.choices[0].message.content
@@ -46,12 +65,12 @@ class AIService:
             # Convert markdown to HTML if needed
             html_content = self._format_as_html(content)
             
-            return html_content
+            return html_content, False
         
         except Exception as e:
             print(f"Error generating draft: {str(e)}")
             # Return fallback content
-            return self._generate_fallback_content(entries, bundle_name)
+            return self._generate_fallback_content(entries, bundle_name), True
     
     async def regenerate_section(
         self,
@@ -59,30 +78,21 @@ class AIService:
         current_content: str,
         entries: List[Dict],
         tone: str = "professional",
-        voice_samples: List[Dict] = None
+        voice_profile: Dict = None
     ) -> str:
         """Regenerate a specific section of the newsletter"""
         
-        system_prompt = self._build_system_prompt(tone, voice_samples)
-        system_prompt += f"\n\nRegenerate only the {section_type} section of the newsletter."
-        
-        user_prompt = f"""
-Current {section_type} section:
-{current_content}
-
-Based on these articles:
-{self._format_entries_for_prompt(entries[:5])}
-
-Generate a new, different version of the {section_type} section. Keep it concise and engaging.
-"""
+        system_prompt, user_prompt = self._build_section_prompts(
+            section_type, current_content, entries, tone, voice_profile
+        )
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response, _ = await self.router.complete(
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
+                model=self.model,
                 temperature=0.8,
                 max_tokens=500
             )
@@ -93,8 +103,107 @@ Generate a new, different version of the {section_type} section. Keep it concise
             print(f"Error regenerating section: {str(e)}")
             return current_content
     
-    def _build_system_prompt(self, tone: str, voice_samples: List[Dict] = None) -> str:
-        """Build system prompt based on tone and optional voice training samples"""
+    async def regenerate_section_variants(
+        self,
+        section_type: str,
+        current_content: str,
+        entries: List[Dict],
+        tone: str = "professional",
+        voice_profile: Dict = None,
+        num_variants: int = 3
+    ) -> List[str]:
+        """Regenerate a section as several alternatives from a single LLM round trip"""
+        
+        system_prompt, user_prompt = self._build_section_prompts(
+            section_type, current_content, entries, tone, voice_profile
+        )
+        
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        
+        try:
+            variants = []
+            if _N_PARAM_SUPPORT.get(self.model, True):
+                # Ask for all variants via the provider's `n` parameter
+                response, _ = await self.router.complete(
+                    messages=messages,
+                    model=self.model,
+                    temperature=0.8,
+                    max_tokens=500,
+                    n=num_variants
+                )
+                variants = [
+                    choice.message.content.strip()
+                    for choice in response.choices
+                    if choice.message and choice.message.content
+                ]
+                if num_variants > 1 and len(variants) < num_variants:
+                    # Many OpenRouter models silently ignore `n`; remember that so the
+                    # next request goes straight to the structured prompt. Keyed by the
+                    # requested model (the lookup key), whichever hedge or fallback answered
+                    _N_PARAM_SUPPORT[self.model] = False
+            
+            if len(variants) < num_variants:
+                # Structured multi-output prompt: all variants in one completion
+                messages[1] = {
+                    "role": "user",
+                    "content": self._build_multi_variant_prompt(user_prompt, num_variants)
+                }
+                response, _ = await self.router.complete(
+                    messages=messages,
+                    model=self.model,
+                    temperature=0.9,
+                    max_tokens=500 * num_variants
+                )
+                variants = self._split_variants(response.choices[0].message.content) or variants
+            
+            return variants[:num_variants] or [current_content]
+        
+        except Exception as e:
+            print(f"Error regenerating section variants: {str(e)}")
+            return [current_content]
+    
+    def _build_section_prompts(
+        self,
+        section_type: str,
+        current_content: str,
+        entries: List[Dict],
+        tone: str,
+        voice_profile: Dict = None
+    ) -> Tuple[str, str]:
+        """Build system and user prompts for regenerating a single section"""
+        system_prompt = self._build_system_prompt(tone, voice_profile)
+        system_prompt += f"\n\nRegenerate only the {section_type} section of the newsletter."
+        
+        user_prompt = f"""
+Current {section_type} section:
+{current_content}
+
+Based on these articles:
+{self._format_entries_for_prompt(entries[:5])}
+
+Generate a new, different version of the {section_type} section. Keep it concise and engaging.
+"""
+        
+        return system_prompt, user_prompt
+    
+    def _build_multi_variant_prompt(self, user_prompt: str, num_variants: int) -> str:
+        """Ask for several variants in one response, separated by a fixed delimiter"""
+        return f"""{user_prompt}
+Write {num_variants} distinct versions of this section. Output each version as HTML and separate
+the versions with a line containing only {VARIANT_DELIMITER}. Do not number or label the versions."""
+    
+    def _split_variants(self, content: str) -> List[str]:
+        """Split a multi-variant response on the variant delimiter"""
+        if not content:
+            return []
+        parts = [part.strip() for part in content.split(VARIANT_DELIMITER)]
+        return [part for part in parts if part]
+    
+    def _build_system_prompt(self, tone: str, voice_profile: Dict = None) -> str:
+        """Build system prompt based on tone and optional voice profile"""
         tone_descriptions = {
             "professional": "formal, authoritative, and business-oriented",
             "conversational": "casual, friendly, and approachable",
@@ -107,10 +216,9 @@ Generate a new, different version of the {section_type} section. Keep it concise
         base_prompt = f"""You are an expert newsletter writer specializing in curating and summarizing content. 
 Your writing style is {tone_desc}."""
         
-        # Add voice training examples if available
-        if voice_samples and len(voice_samples) >= 3:
-            voice_examples = self._build_voice_examples_section(voice_samples)
-            base_prompt += f"\n\n{voice_examples}"
+        # Add the user's voice profile if available
+        if voice_profile:
+            base_prompt += f"\n\n{self._build_voice_profile_section(voice_profile)}"
         
         base_prompt += """
 
@@ -125,34 +233,26 @@ Use class names: draft-intro, draft-insight, draft-trends."""
         
         return base_prompt
     
-    def _build_voice_examples_section(self, voice_samples: List[Dict]) -> str:
-        """Build voice training examples section for system prompt"""
+    def _build_voice_profile_section(self, voice_profile: Dict) -> str:
+        """Build voice section for system prompt from a precomputed voice profile"""
         
-        # Take the best 3-5 samples (most recent and diverse)
-        selected_samples = voice_samples[:5]
+        voice_text = "Match my writing style."
+        if voice_profile.get("style_summary"):
+            voice_text += f" {voice_profile['style_summary']}"
         
-        examples_text = "Here are examples of my writing style to match:\n\n"
+        excerpts = voice_profile.get("excerpts") or []
+        if excerpts:
+            voice_text += "\n\nRepresentative excerpts of my writing:\n\n"
+            for i, excerpt in enumerate(excerpts, 1):
+                voice_text += f"Excerpt {i} ({excerpt.get('title', 'Untitled')}):\n{excerpt.get('content', '')}\n\n"
         
-        for i, sample in enumerate(selected_samples, 1):
-            # Truncate long samples to keep prompt manageable (max 800 chars per sample)
-            content = sample.get('content', '')
-            if len(content) > 800:
-                content = content[:800] + "..."
-            
-            title = sample.get('title', f'Example {i}')
-            examples_text += f"Example {i} ({title}):\n{content}\n\n"
-        
-        examples_text += "Match this writing style, tone, voice, and approach in your newsletter generation. Pay attention to:\n"
-        examples_text += "- Sentence structure and flow\n"
-        examples_text += "- Vocabulary choices and tone\n"
-        examples_text += "- How ideas are introduced and connected\n"
-        examples_text += "- Overall writing personality and voice"
+        voice_text += "Follow this sentence structure, vocabulary, tone and way of connecting ideas."
         
-        return examples_text
+        return voice_text
     
     def _build_user_prompt(self, entries: List[Dict], topic: str, bundle_name: str) -> str:
         """Build user prompt with RSS entries"""
-        entries_text = self._format_entries_for_prompt(entries[:15])
+        entries_text = self._format_entries_for_prompt(entries)
         
         topic_context = f" with a focus on {topic}" if topic else ""
         
@@ -165,17 +265,8 @@ Here are the latest articles and posts:
 Create a cohesive newsletter that highlights the most important developments and trends."""
     
     def _format_entries_for_prompt(self, entries: List[Dict]) -> str:
-        """Format RSS entries for the prompt"""
-        formatted = []
-        
-        for i, entry in enumerate(entries, 1):
-            formatted.append(
-                f"{i}. {entry.get('title', 'Untitled')}\n"
-                f"   {entry.get('summary', 'No summary')[:200]}...\n"
-                f"   Source: {entry.get('link', '')}\n"
-            )
-        
-        return "\n".join(formatted)
+        """Format RSS entries for the prompt within the entries token budget"""
+        return self.prompt_builder.format_entries(entries)
     
     def _format_as_html(self, content: str) -> str:
         """Convert markdown or plain text to HTML"""
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from postgrest.types import ReturnMethod
+from app.config import settings
+from app.database import SupabaseDB
+from app.utils.tracking_tokens import create_tracking_token
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_FIELDS = ("opens", "clicks", "unique_opens", "unique_clicks")
+
+
+class AnalyticsService:
+    """Service for per-recipient analytics rows used by send tracking"""
+
+    def __init__(self):
+        self.db = SupabaseDB.get_service_client()
+
+    def build_recipient_rows(self, draft_id: str, recipients: List[str]) -> List[Dict[str, str]]:
+        """Analytics rows with ids and signed tracking tokens generated in memory"""
+        sent_at = datetime.now().isoformat()
+        rows = []
+        for index, recipient in enumerate(recipients):
+            analytics_id = str(uuid.uuid4())
+            rows.append({
+                "id": analytics_id,
+                "draft_id": draft_id,
+                "sent_at": sent_at,
+                "recipient_email": recipient,
+                # The token carries the row id, so tracking hits need no lookup
+                "token": create_tracking_token(analytics_id, index)
+            })
+        return rows
+
+    def insert_rows(self, rows: List[Dict[str, str]]) -> None:
+        """Write analytics rows in chunked batch inserts"""
+        chunk_size = settings.analytics_insert_chunk_size
+        for i in range(0, len(rows), chunk_size):
+            # Ids are generated client-side, so skip returning the rows
+            self.db.table("analytics")\
+                .insert(rows[i:i + chunk_size], returning=ReturnMethod.minimal)\
+                .execute()
+
+    async def create_recipient_rows(self, draft_id: str, recipients: List[str]) -> List[Dict[str, str]]:
+        """Create analytics rows for a send; returns [{"email", "token", "analytics_id"}] for the send pipeline"""
+        rows = self.build_recipient_rows(draft_id, recipients)
+        await asyncio.to_thread(self.insert_rows, rows)
+        logger.info(f"Created {len(rows)} analytics rows for draft {draft_id}")
+
+        return [
+            {"email": row["recipient_email"], "token": row["token"], "analytics_id": row["id"]}
+            for row in rows
+        ]
+
+    async def get_timeline(self, scope: str, scope_id: str, days: int, granularity: str = "hour") -> List[Dict[str, Any]]:
+        """Opens/clicks per hour or day for a draft or user over the last `days`, zero-filled
+
+        Buckets are aggregated in the database, so at most one row per bucket comes back.
+        Hourly ranges must stay within analytics_rollup_hourly_retention_days; older hours
+        only exist as daily rows. opens/clicks count each recipient once per tracking
+        flush window, since the tracking buffer coalesces repeats before they are applied.
+        """
+        step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+        now = datetime.now(timezone.utc)
+        since = (now - timedelta(days=days)).replace(minute=0, second=0, microsecond=0)
+        if granularity == "day":
+            since = since.replace(hour=0)
+
+        response = await asyncio.to_thread(
+            lambda: self.db.rpc("get_engagement_timeline", {
+                "p_scope": scope,
+                "p_scope_id": scope_id,
+                "p_since": since.isoformat(),
+                "p_granularity": granularity
+            }).execute()
+        )
+
+        points: Dict[datetime, Dict[str, Any]] = {}
+        for row in response.data or []:
+            bucket = datetime.fromisoformat(row["bucket"]).astimezone(timezone.utc)
+            points[bucket] = {field: row.get(field) or 0 for field in ROLLUP_FIELDS}
+
+        timeline = []
+        bucket = since
+        while bucket <= now:
+            timeline.append({"bucket": bucket.isoformat(), **points.get(bucket, dict.fromkeys(ROLLUP_FIELDS, 0))})
+            bucket += step
+        return timeline
+
+    def compact_rollups(self) -> int:
+        """Fold hourly engagement rollups past retention into daily rows"""
+        before = datetime.now(timezone.utc) - timedelta(days=settings.analytics_rollup_hourly_retention_days)
+        response = self.db.rpc("compact_engagement_rollups", {"p_before": before.isoformat()}).execute()
+        compacted = response.data or 0
+        if compacted:
+            logger.info(f"Compacted {compacted} hourly engagement rollups")
+        return compacted
+
+
+# Global analytics service instance
+analytics_service = AnalyticsService()
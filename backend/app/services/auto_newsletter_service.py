@@ -90,7 +90,8 @@ class AutoNewsletterService:
             user_id=auto_newsletter["user_id"],
             bundle_id=auto_newsletter["bundle_id"],
             topic=f"Auto-generated newsletter - {datetime.now().strftime('%Y-%m-%d')}",
-            tone="professional"
+            tone="professional",
+            coalesce=True
         )
         # Update last_generated
         self.db.table("auto_newsletters").update({"last_generated": datetime.now().isoformat()}).eq("id", auto_newsletter_id).execute()
@@ -296,7 +297,8 @@ class AutoNewsletterService:
                 user_id=auto_newsletter["user_id"],
                 bundle_id=auto_newsletter["bundle_id"],
                 topic=f"Auto-generated newsletter - {datetime.now().strftime('%Y-%m-%d')}",
-                tone="professional"
+                tone="professional",
+                coalesce=True
             )
             
             # Calculate content quality score (placeholder)
@@ -0,0 +1,77 @@
+import copy
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.database import SupabaseDB
+
+logger = logging.getLogger(__name__)
+
+# Bundle columns plus its source rows, embedded under an alias because
+# bundles also has a legacy JSONB "sources" column
+BUNDLE_SELECT = "*, bundle_sources:sources(type, source_identifier)"
+
+
+class BundleCacheService:
+    """Caches resolved bundles (metadata + RSS source URLs) by bundle ID"""
+
+    def __init__(self, ttl_seconds: int = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.bundle_cache_ttl_seconds
+        self._bundles: Dict[str, Tuple[float, Dict]] = {}
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get_bundle(self, bundle_id: str) -> Optional[Dict]:
+        """Resolved bundle for bundle_id, from cache or a single database query"""
+        cached = self._bundles.get(bundle_id)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl_seconds:
+            self.stats["hits"] += 1
+            # Callers may modify the bundle; keep the cached copy intact
+            return copy.deepcopy(cached[1])
+
+        self.stats["misses"] += 1
+        db = SupabaseDB.get_service_client()
+        response = db.table("bundles").select(BUNDLE_SELECT).eq("id", bundle_id).execute()
+        if not response.data:
+            return None
+
+        bundle = self._store(response.data[0])
+        return copy.deepcopy(bundle)
+
+    def invalidate(self, bundle_id: str) -> None:
+        """Drop a bundle so its next lookup re-reads bundle and sources"""
+        if self._bundles.pop(bundle_id, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def warm_presets(self) -> int:
+        """Resolve all preset bundles in one query; returns how many were cached"""
+        db = SupabaseDB.get_service_client()
+        response = db.table("bundles").select(BUNDLE_SELECT).eq("is_preset", True).execute()
+        for row in response.data or []:
+            self._store(row)
+        return len(response.data or [])
+
+    def _store(self, row: Dict) -> Dict:
+        """Resolve a bundle row's source URLs and cache it"""
+        row = dict(row)
+        sources = row.pop("bundle_sources", None) or []
+        row["sources"] = self._resolve_source_urls(sources, row.get("sources"))
+        self._bundles[row["id"]] = (time.monotonic(), row)
+        return row
+
+    def _resolve_source_urls(self, sources: List[Dict], preset_sources) -> List[str]:
+        """RSS URLs from source rows, falling back to the bundle's preset JSONB sources"""
+        source_urls = [
+            source["source_identifier"]
+            for source in sources
+            if source.get("type") == "rss" and source.get("source_identifier")
+        ]
+
+        # If no custom sources found, fall back to preset sources
+        if not source_urls and isinstance(preset_sources, list):
+            source_urls = [s for s in preset_sources if isinstance(s, str)]
+
+        return source_urls
+
+
+# Global bundle cache shared by the generator and the bundles router
+bundle_cache_service = BundleCacheService()
@@ -92,10 +92,50 @@ class CacheService:
         cache_key = self._get_cache_key(user_id, "drafts_list", status=status or "all")
         self.set(cache_key, data, ttl_seconds)
     
+    async def get_section_variants(self, user_id: str, draft_id: str, section: str, ttl_seconds: int = 1800) -> Optional[Dict[str, Any]]:
+        """Get cached regeneration variants for a draft section"""
+        cache_key = self._get_cache_key(user_id, "section_variants", draft_id=draft_id, section=section)
+        return self.get(cache_key, ttl_seconds)
+    
+    async def set_section_variants(self, user_id: str, draft_id: str, section: str, data: Dict[str, Any], ttl_seconds: int = 1800) -> None:
+        """Cache regeneration variants for a draft section"""
+        cache_key = self._get_cache_key(user_id, "section_variants", draft_id=draft_id, section=section)
+        self.set(cache_key, data, ttl_seconds)
+    
+    async def invalidate_section_variants(self, user_id: str) -> None:
+        """Invalidate cached section variants for a user"""
+        self.invalidate(user_id, "section_variants")
+    
+    async def get_voice_profile(self, user_id: str, ttl_seconds: int = 3600) -> Optional[Dict[str, Any]]:
+        """Get cached voice profile"""
+        cache_key = self._get_cache_key(user_id, "voice_profile")
+        return self.get(cache_key, ttl_seconds)
+    
+    async def set_voice_profile(self, user_id: str, data: Dict[str, Any], ttl_seconds: int = 3600) -> None:
+        """Cache voice profile"""
+        cache_key = self._get_cache_key(user_id, "voice_profile")
+        self.set(cache_key, data, ttl_seconds)
+    
+    async def get_rendered_email(self, user_id: str, draft_id: str, content_hash: str, bundle_color: str, ttl_seconds: int = 3600) -> Optional[str]:
+        """Get cached newsletter HTML for a draft version and color"""
+        cache_key = self._get_cache_key(user_id, "rendered_email", draft_id=draft_id, content_hash=content_hash, color=bundle_color)
+        return self.get(cache_key, ttl_seconds)
+    
+    async def set_rendered_email(self, user_id: str, draft_id: str, content_hash: str, bundle_color: str, html: str, ttl_seconds: int = 3600) -> None:
+        """Cache newsletter HTML for a draft version and color"""
+        cache_key = self._get_cache_key(user_id, "rendered_email", draft_id=draft_id, content_hash=content_hash, color=bundle_color)
+        self.set(cache_key, html, ttl_seconds)
+    
+    async def invalidate_rendered_emails(self, user_id: str) -> None:
+        """Invalidate cached newsletter HTML for a user's drafts"""
+        self.invalidate(user_id, "rendered_email")
+    
     async def invalidate_user_cache(self, user_id: str) -> None:
         """Invalidate all cache entries for a user"""
         self.invalidate(user_id, "analytics_summary")
         self.invalidate(user_id, "drafts_list")
+        self.invalidate(user_id, "section_variants")
+        self.invalidate(user_id, "rendered_email")
         logger.info(f"Invalidated all cache entries for user: {user_id}")
 
 # Global cache instance
@@ -1,5 +1,6 @@
-from typing import Dict, List, Optional
-import re
+from typing import List, Optional
+from app.models.draft_document import DraftDocument
+from app.services.draft_parser import parse_draft_html
 
 
 class ContentExtractorService:
@@ -8,22 +9,25 @@ class ContentExtractorService:
     def extract_editable_content(self, full_email_html: str) -> str:
         """Extract just the editable content sections from the full email template"""
         
+        # Parse the template once; every extractor reads the same section tree
+        document = parse_draft_html(full_email_html)
+        
         # Extract the main content sections that users should be able to edit
         content_sections = []
         
         # Extract featured story
-        featured_story = self._extract_featured_story(full_email_html)
+        featured_story = self._extract_featured_story(document)
         if featured_story:
             content_sections.append(featured_story)
         
         # Extract news items
-        news_items = self._extract_news_items(full_email_html)
+        news_items = self._extract_news_items(document)
         if news_items:
             content_sections.append(news_items)
         
         # If no structured content found, try to extract from the original draft format
         if not content_sections:
-            content_sections = self._extract_from_draft_format(full_email_html)
+            content_sections = self._extract_from_draft_format(document)
         
         # Combine all sections
         if content_sections:
@@ -32,24 +36,13 @@ class ContentExtractorService:
             # Fallback: return a simple structure
             return self._create_fallback_content()
     
-    def _extract_featured_story(self, html: str) -> Optional[str]:
+    def _extract_featured_story(self, document: DraftDocument) -> Optional[str]:
         """Extract featured story section"""
-        featured_match = re.search(
-            r'<div class="featured-story">(.*?)</div>', 
-            html, 
-            re.DOTALL
-        )
-        
-        if featured_match:
-            featured_html = featured_match.group(1)
-            
-            # Extract title
-            title_match = re.search(r'<h2>(.*?)</h2>', featured_html)
-            title = title_match.group(1) if title_match else "Featured Story"
-            
-            # Extract content
-            content_match = re.search(r'<div class="summary">(.*?)</div>', featured_html)
-            content = content_match.group(1) if content_match else ""
+        featured = document.find("featured-story")
+        
+        if featured:
+            title = featured.title or "Featured Story"
+            content = featured.summary or ""
             
             return f"""
             <div class="draft-featured">
@@ -60,61 +53,32 @@ class ContentExtractorService:
         
         return None
     
-    def _extract_news_items(self, html: str) -> Optional[str]:
+    def _extract_news_items(self, document: DraftDocument) -> Optional[str]:
         """Extract news items section"""
-        news_section_match = re.search(
-            r'<div class="news-section">(.*?)</div>', 
-            html, 
-            re.DOTALL
-        )
-        
-        if news_section_match:
-            news_html = news_section_match.group(1)
-            
-            # Extract individual news items
-            news_items = re.findall(
-                r'<div class="news-item">(.*?)</div>', 
-                news_html, 
-                re.DOTALL
-            )
-            
-            if news_items:
-                items_html = []
-                for i, item in enumerate(news_items[:5]):  # Limit to 5 items
-                    # Extract title
-                    title_match = re.search(r'<h4>(.*?)</h4>', item)
-                    title = title_match.group(1) if title_match else f"Story {i+1}"
-                    
-                    # Extract summary
-                    summary_match = re.search(r'<div class="summary">(.*?)</div>', item)
-                    summary = summary_match.group(1) if summary_match else ""
-                    
-                    items_html.append(f"""
-                    <div class="draft-insight">
-                        <h3>{title}</h3>
-                        <p>{summary}</p>
-                    </div>
-                    """)
+        news_items = document.find_all("news-item", parent="news-section")
+        
+        if news_items:
+            items_html = []
+            for i, item in enumerate(news_items[:5]):  # Limit to 5 items
+                title = item.title or f"Story {i+1}"
+                summary = item.summary or ""
                 
-                return "\n".join(items_html)
+                items_html.append(f"""
+                <div class="draft-insight">
+                    <h3>{title}</h3>
+                    <p>{summary}</p>
+                </div>
+                """)
+            
+            return "\n".join(items_html)
         
         return None
     
-    def _extract_from_draft_format(self, html: str) -> List[str]:
+    def _extract_from_draft_format(self, document: DraftDocument) -> List[str]:
         """Extract content from original draft format (draft-intro, draft-insight, etc.)"""
-        content_sections = []
-        
-        # First, try to extract from the hidden draft-content div
-        draft_content_match = re.search(r'<div style="display: none;" class="draft-content">(.*?)</div>', html, re.DOTALL)
-        if not draft_content_match:
-            # Try alternative pattern
-            draft_content_match = re.search(r'<div class="draft-content"[^>]*>(.*?)</div>', html, re.DOTALL)
-        
-        if draft_content_match:
-            draft_content = draft_content_match.group(1)
-            print(f"🔍 Found draft content: {len(draft_content)} chars")
-            # Extract sections from the draft content
-            content_sections = self._extract_draft_sections(draft_content)
+        # First, try the sections inside the hidden draft-content div
+        if document.find("draft-content"):
+            content_sections = self._extract_draft_sections(document, parent="draft-content")
             if content_sections:
                 print(f"✅ Extracted {len(content_sections)} draft sections")
                 return content_sections
@@ -124,41 +88,22 @@ class ContentExtractorService:
             print("❌ No draft-content div found")
         
         # Fallback: extract directly from the HTML
-        # Extract intro
-        intro_match = re.search(r'<div class="draft-intro">(.*?)</div>', html, re.DOTALL)
-        if intro_match:
-            content_sections.append(intro_match.group(1))
-        
-        # Extract insights
-        insights = re.findall(r'<div class="draft-insight">(.*?)</div>', html, re.DOTALL)
-        for insight in insights:
-            content_sections.append(f'<div class="draft-insight">{insight}</div>')
-        
-        # Extract trends
-        trends_match = re.search(r'<div class="draft-trends">(.*?)</div>', html, re.DOTALL)
-        if trends_match:
-            content_sections.append(trends_match.group(1))
-        
-        return content_sections
+        return self._extract_draft_sections(document)
     
-    def _extract_draft_sections(self, draft_content: str) -> List[str]:
+    def _extract_draft_sections(self, document: DraftDocument, parent: Optional[str] = None) -> List[str]:
         """Extract sections from draft content"""
         content_sections = []
         
-        # Extract intro
-        intro_match = re.search(r'<div class="draft-intro">(.*?)</div>', draft_content, re.DOTALL)
-        if intro_match:
-            content_sections.append(intro_match.group(1))
+        intro = document.find("draft-intro", parent)
+        if intro:
+            content_sections.append(intro.inner_html)
         
-        # Extract insights
-        insights = re.findall(r'<div class="draft-insight">(.*?)</div>', draft_content, re.DOTALL)
-        for insight in insights:
-            content_sections.append(f'<div class="draft-insight">{insight}</div>')
+        for insight in document.find_all("draft-insight", parent):
+            content_sections.append(f'<div class="draft-insight">{insight.inner_html}</div>')
         
-        # Extract trends
-        trends_match = re.search(r'<div class="draft-trends">(.*?)</div>', draft_content, re.DOTALL)
-        if trends_match:
-            content_sections.append(trends_match.group(1))
+        trends = document.find("draft-trends", parent)
+        if trends:
+            content_sections.append(trends.inner_html)
         
         return content_sections
     
@@ -1,7 +1,10 @@
 import asyncio
 import logging
+import time
 from datetime import datetime
+from app.config import settings
 from .auto_newsletter_service import AutoNewsletterService
+from .analytics_service import analytics_service
 
 logger = logging.getLogger(__name__)
 
@@ -9,6 +12,7 @@ class CronService:
     def __init__(self):
         self.is_running = False
         self.task = None
+        self.last_compaction = None
     
     async def start(self):
         """Start the cron service"""
@@ -41,6 +45,7 @@ class CronService:
         while self.is_running:
             try:
                 await self._process_auto_newsletters()
+                await self._compact_engagement_rollups()
                 
                 # Wait for 1 minute before next check
                 await asyncio.sleep(60)
@@ -66,5 +71,16 @@ class CronService:
         finally:
             pass
 
+    async def _compact_engagement_rollups(self):
+        """Fold old hourly engagement rollups into daily ones, at most once per interval"""
+        interval = settings.analytics_rollup_compaction_interval_seconds
+        if self.last_compaction is not None and time.monotonic() - self.last_compaction < interval:
+            return
+        self.last_compaction = time.monotonic()
+        try:
+            await asyncio.to_thread(analytics_service.compact_rollups)
+        except Exception as e:
+            logger.error(f"Failed to compact engagement rollups: {str(e)}")
+
 # Global cron service instance
 cron_service = CronService()
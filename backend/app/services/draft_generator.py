@@ -1,11 +1,12 @@
-from typing import Dict
+from typing import Dict, List, Tuple
 from datetime import datetime
 from app.services.rss_service import RSSService
 from app.services.ai_service import AIService
-from app.services.email_template_service import EmailTemplateService
 from app.services.content_extractor_service import ContentExtractorService
-from app.services.voice_training_service import VoiceTrainingService
-from app.routers.bundles import PRESET_BUNDLES
+from app.services.voice_profile_service import voice_profile_service
+from app.services.generation_coalescer import generation_coalescer
+from app.services.bundle_cache_service import bundle_cache_service
+from app.services.draft_parser import dump_draft_document, parse_draft_html
 import uuid
 
 
@@ -15,18 +16,23 @@ class DraftGeneratorService:
     def __init__(self):
         self.rss_service = RSSService()
         self.ai_service = AIService()
-        self.email_template_service = EmailTemplateService()
         self.content_extractor = ContentExtractorService()
-        self.voice_training_service = VoiceTrainingService()
+        self.voice_profile_service = voice_profile_service
     
     async def generate_draft(
         self,
         user_id: str,
         bundle_id: str,
         topic: str = None,
-        tone: str = "professional"
+        tone: str = "professional",
+        coalesce: bool = False
     ) -> Dict:
-        """Generate a complete newsletter draft"""
+        """Generate a complete newsletter draft
+        
+        With coalesce=True, users without voice training share the feed and LLM
+        work of identical (bundle, tone, topic) jobs that are in flight or
+        recently completed. Used by scheduled auto-newsletters.
+        """
         
         # 1. Get bundle information
         print(f"[GENERATOR] Step 1: Getting bundle {bundle_id}")
@@ -35,61 +41,45 @@ class DraftGeneratorService:
             raise ValueError(f"Bundle {bundle_id} not found")
         print(f"[GENERATOR] Found bundle: {bundle['label']}")
         
-        # 2. Parse RSS feeds
-        print(f"[GENERATOR] Step 2: Parsing {len(bundle['sources'])} RSS feeds")
-        entries = self.rss_service.parse_multiple_feeds(bundle["sources"])
-        print(f"[GENERATOR] Parsed {len(entries)} entries")
-        
-        # 3. Filter and score entries
-        print(f"[GENERATOR] Step 3: Filtering and scoring entries")
-        recent_entries = self.rss_service.filter_recent_entries(entries, days=7)
-        scored_entries = self.rss_service.score_entries(recent_entries, topic)
-        print(f"[GENERATOR] Using {len(scored_entries)} scored entries")
-        
-        # 4. Get user's voice training samples (NEW)
-        print(f"[GENERATOR] Step 4: Getting voice training samples for user {user_id}")
-        voice_samples = self.voice_training_service.get_voice_samples_for_training(user_id)
-        print(f"[GENERATOR] Found {len(voice_samples)} voice training samples")
-        
-        # 5. Generate draft using AI with voice training
-        print(f"[GENERATOR] Step 5: Generating draft with Openrouter API")
-        ai_generated_html = await self.ai_service.generate_newsletter_draft(
-            entries=scored_entries,
-            tone=tone,
-            topic=topic,
-            bundle_name=bundle["label"],
-            voice_samples=voice_samples
-        )
-        print(f"[GENERATOR] AI draft generated successfully")
-        
-        # 6. Generate professional email template with new structure
-        print(f"[GENERATOR] Step 6: Generating professional email template with separated content")
-        bundle_color = bundle.get("color", "#3B82F6")
-        full_email_html = self.email_template_service.generate_newsletter_html(
-            draft_content=ai_generated_html,
-            bundle_name=bundle["label"],
-            bundle_color=bundle_color,
-            entries=scored_entries[:10],
-            include_images=True
-        )
-        print(f"[GENERATOR] Email template with new structure generated successfully")
-        
-        # 7. Use original AI-generated content for editing (don't extract from template)
-        print(f"[GENERATOR] Step 7: Using original AI content for editing")
+        # 2. Get user's precomputed voice profile (cached; no sample reads)
+        print(f"[GENERATOR] Step 2: Getting voice profile for user {user_id}")
+        voice_profile = await self.voice_profile_service.get_profile(user_id)
+        voice_training_active = self.voice_profile_service.is_active(voice_profile)
+        samples_count = voice_profile.get("sample_count", 0)
+        if not voice_training_active:
+            voice_profile = None
+        print(f"[GENERATOR] Voice profile built from {samples_count} samples (active: {voice_training_active})")
+        
+        # 3-5. Parse feeds, score entries and generate the AI draft
+        if coalesce and not voice_training_active:
+            # Output depends only on the bundle, tone and topic: share it
+            coalesce_key = f"{bundle_id}:{tone}:{topic or ''}"
+            # Fallback content (the LLM failed) is not kept for later jobs
+            scored_entries, ai_generated_html, _ = await generation_coalescer.run(
+                coalesce_key,
+                lambda: self._generate_content(bundle, topic, tone, voice_profile),
+                cacheable=lambda result: not result[2]
+            )
+        else:
+            scored_entries, ai_generated_html, _ = await self._generate_content(
+                bundle, topic, tone, voice_profile
+            )
+        
+        # 6. Use original AI content for editing; the sendable email HTML is rendered
+        # on demand (and cached) by the email renderer, not at generation time
+        print(f"[GENERATOR] Step 6: Using original AI content for editing")
         editable_content = ai_generated_html  # Use the original AI content directly
-        print(f"[GENERATOR] Using original AI content for editor")
         
-        # 8. Calculate readiness score
+        # 7. Calculate readiness score from the draft content
         readiness_score = self._calculate_readiness_score(
-            full_email_html,
+            editable_content,
             len(scored_entries)
         )
         
-        # 9. Extract source links
+        # 8. Extract source links
         source_links = [entry["link"] for entry in scored_entries[:10] if entry.get("link")]
         
-        # 10. Create draft object with voice training metadata
-        voice_training_active = len(voice_samples) >= 3
+        # 9. Create draft object with voice training metadata
         draft_data = {
             "user_id": user_id,
             "bundle_id": bundle_id,
@@ -97,23 +87,23 @@ class DraftGeneratorService:
             "topic": topic,
             "tone": tone,
             "generated_html": editable_content,  # Store editable content for editor
-            "full_email_html": full_email_html,  # Store full template for sending
+            "content_sections": dump_draft_document(parse_draft_html(editable_content)),  # Canonical section document
             "edited_html": None,
             "status": "draft",
             "readiness_score": readiness_score,
             "sources": source_links,
             # Voice training metadata
             "voice_training_used": voice_training_active,
-            "voice_samples_count": len(voice_samples),
+            "voice_samples_count": samples_count,
             "generation_metadata": {
                 "voice_training_active": voice_training_active,
-                "samples_used": len(voice_samples),
+                "samples_used": samples_count,
                 "tone_preset": tone,
-                "voice_samples_titles": [sample.get('title', 'Untitled') for sample in voice_samples[:3]]
+                "voice_samples_titles": [excerpt.get('title', 'Untitled') for excerpt in (voice_profile or {}).get('excerpts', [])]
             }
         }
         
-        # 8. Save to Supabase database
+        # 10. Save to Supabase database
         from app.database import SupabaseDB
         db = SupabaseDB.get_service_client()  # Use service role to bypass RLS
         response = db.table("drafts").insert(draft_data).execute()
@@ -126,49 +116,63 @@ class DraftGeneratorService:
         
         return saved_draft
     
+    async def _generate_content(
+        self,
+        bundle: Dict,
+        topic: str,
+        tone: str,
+        voice_profile: Dict
+    ) -> Tuple[List[Dict], str, bool]:
+        """Parse the bundle's feeds, score entries and generate the AI draft HTML
+
+        Returns (scored_entries, html, used_fallback); used_fallback is True when the
+        LLM failed and the HTML is the simple fallback content.
+        """
+        
+        # 3. Parse RSS feeds
+        print(f"[GENERATOR] Step 3: Parsing {len(bundle['sources'])} RSS feeds")
+        entries = self.rss_service.parse_multiple_feeds(bundle["sources"])
+        print(f"[GENERATOR] Parsed {len(entries)} entries")
+        
+        # 4. Filter and score entries
+        print(f"[GENERATOR] Step 4: Filtering and scoring entries")
+        recent_entries = self.rss_service.filter_recent_entries(entries, days=7)
+        bundle_profile = f"{bundle['label']} {bundle.get('description') or ''}"
+        scored_entries = self.rss_service.score_entries(recent_entries, topic, profile=bundle_profile)
+        print(f"[GENERATOR] Using {len(scored_entries)} scored entries")
+        
+        # 5. Generate draft using AI with voice training
+        print(f"[GENERATOR] Step 5: Generating draft with Openrouter API")
+        ai_generated_html, used_fallback = await self.ai_service.generate_newsletter_draft_or_fallback(
+            entries=scored_entries,
+            tone=tone,
+            topic=topic,
+            bundle_name=bundle["label"],
+            voice_profile=voice_profile
+        )
+        if used_fallback:
+            print(f"[GENERATOR] AI draft failed; using fallback content")
+        else:
+            print(f"[GENERATOR] AI draft generated successfully")
+        
+        return scored_entries, ai_generated_html, used_fallback
+    
     def _get_bundle(self, bundle_id: str) -> Dict:
-        """Get bundle by ID with its sources from database"""
+        """Get bundle by ID with its resolved RSS source URLs (cached)"""
         try:
-            from app.database import SupabaseDB
-            db = SupabaseDB.get_service_client()
-            
-            # Get bundle from database
-            bundle_response = db.table("bundles").select("*").eq("id", bundle_id).execute()
-            if not bundle_response.data:
+            bundle = bundle_cache_service.get_bundle(bundle_id)
+            if not bundle:
                 print(f"[GENERATOR] Bundle {bundle_id} not found in database")
                 return None
             
-            bundle = bundle_response.data[0]
-            print(f"[GENERATOR] Found bundle: {bundle['label']}")
-            
-            # Get sources for this bundle
-            sources_response = db.table("sources").select("*").eq("bundle_id", bundle_id).execute()
-            sources = sources_response.data or []
-            print(f"[GENERATOR] Found {len(sources)} sources for bundle")
-            
-            # Convert sources to the format expected by RSS service
-            source_urls = []
-            for source in sources:
-                if source["type"] == "rss" and source["source_identifier"]:
-                    source_urls.append(source["source_identifier"])
-                    print(f"[GENERATOR] Added RSS source: {source['source_identifier']}")
-            
-            # If no custom sources found, fall back to preset sources
-            if not source_urls and bundle.get("sources"):
-                # Handle JSONB sources from preset bundles
-                preset_sources = bundle.get("sources", [])
-                if isinstance(preset_sources, list):
-                    source_urls = [s for s in preset_sources if isinstance(s, str)]
-                    print(f"[GENERATOR] Using preset sources: {source_urls}")
-            
-            bundle["sources"] = source_urls
-            print(f"[GENERATOR] Final sources for bundle: {source_urls}")
-            
+            print(f"[GENERATOR] Using {len(bundle['sources'])} sources for bundle")
             return bundle
             
         except Exception as e:
             print(f"[ERROR] Failed to get bundle {bundle_id}: {str(e)}")
             # Fallback to PRESET_BUNDLES for backward compatibility
+            # Import here to avoid circular imports
+            from app.routers.bundles import PRESET_BUNDLES
             return next((b for b in PRESET_BUNDLES if b["id"] == bundle_id), None)
     
     def _calculate_readiness_score(self, html_content: str, num_sources: int) -> int:
@@ -183,8 +187,8 @@ class DraftGeneratorService:
         if html_content.count("<h") >= 3:
             score += 20
         
-        # Has insights
-        if "draft-insight" in html_content or "<h3>" in html_content:
+        # Has insights (the email optimizer inlines style attributes onto headings)
+        if "draft-insight" in html_content or "<h3" in html_content:
             score += 20
         
         # Has sources
@@ -0,0 +1,159 @@
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from app.models.draft_document import DraftDocument, DraftSection
+
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_NEWLINE_RE = re.compile(r'\n')
+
+# Div classes that become sections: draft markup plus the newsletter template's blocks
+TRACKED_CLASSES = frozenset({
+    "draft-content",
+    "draft-intro",
+    "draft-insight",
+    "draft-trends",
+    "draft-featured",
+    "featured-story",
+    "news-section",
+    "news-item",
+})
+
+_HEADING_TAGS = frozenset({"h2", "h3", "h4"})
+_VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"
+})
+
+
+def strip_tags(html_content: str) -> str:
+    """Text of an HTML fragment with tags removed"""
+    return _TAG_RE.sub('', html_content).strip()
+
+
+class DraftHTMLParser(HTMLParser):
+    """Single pass over draft HTML that collects tracked div sections
+
+    Sections are matched by nesting depth rather than by the next closing
+    tag, so nested divs inside a section are kept intact. The first heading,
+    paragraph and summary div inside a section, and its list items, are
+    captured as the parser goes.
+    """
+
+    def __init__(self, html_content: str):
+        super().__init__(convert_charrefs=True)
+        self._html = html_content
+        self._line_offsets = [0] + [match.end() for match in _NEWLINE_RE.finditer(html_content)]
+        # Open elements: (tag, inner start offset, section fields or None, is a summary div)
+        self._stack: List[Tuple[str, int, Optional[Dict], bool]] = []
+        self._open_sections: List[Dict] = []
+        self._sections: List[Tuple[int, DraftSection]] = []
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self._line_offsets[line - 1] + column
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_TAGS:
+            return
+        start = self._offset()
+        classes = (dict(attrs).get("class") or "").split()
+
+        fields = None
+        kind = next((name for name in classes if name in TRACKED_CLASSES), None) if tag == "div" else None
+        if kind:
+            fields = {
+                "kind": kind,
+                "start": start,
+                "parent": self._open_sections[-1]["kind"] if self._open_sections else None,
+                "items": []
+            }
+            self._open_sections.append(fields)
+
+        inner_start = start + len(self.get_starttag_text() or "")
+        self._stack.append((tag, inner_start, fields, tag == "div" and "summary" in classes))
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags have no content to capture
+        pass
+
+    def handle_endtag(self, tag):
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                break
+        else:
+            return
+
+        # Elements left open inside this one end here too
+        end = self._offset()
+        while len(self._stack) > index:
+            self._close(self._stack.pop(), end)
+
+    def close(self):
+        super().close()
+        while self._stack:
+            self._close(self._stack.pop(), len(self._html))
+
+    def _close(self, element: Tuple[str, int, Optional[Dict], bool], end: int) -> None:
+        tag, inner_start, fields, is_summary = element
+        inner_html = self._html[inner_start:end]
+
+        if fields is not None:
+            self._open_sections.remove(fields)
+            section = DraftSection(
+                kind=fields["kind"],
+                inner_html=inner_html,
+                text=strip_tags(inner_html),
+                title=fields.get("title"),
+                paragraph=fields.get("paragraph"),
+                summary=fields.get("summary"),
+                items=fields["items"],
+                parent=fields["parent"]
+            )
+            self._sections.append((fields["start"], section))
+            return
+
+        if not self._open_sections:
+            return
+        owner = self._open_sections[-1]
+        if tag in _HEADING_TAGS:
+            owner.setdefault("title", inner_html)
+        elif tag == "p":
+            owner.setdefault("paragraph", inner_html)
+        elif tag == "li":
+            owner["items"].append(strip_tags(inner_html))
+        elif is_summary:
+            owner.setdefault("summary", inner_html)
+
+    def document(self) -> DraftDocument:
+        return DraftDocument(sections=[section for _, section in sorted(self._sections, key=lambda item: item[0])])
+
+
+@lru_cache(maxsize=64)
+def parse_draft_html(html_content: str) -> DraftDocument:
+    """Parse draft or newsletter HTML into sections; cached, so treat the result as read-only"""
+    parser = DraftHTMLParser(html_content or "")
+    parser.feed(html_content or "")
+    parser.close()
+    return parser.document()
+
+
+def serialize_draft_document(document: DraftDocument) -> str:
+    """HTML for a section document: one div per top-level section"""
+    return "\n".join(
+        f'<div class="{section.kind}">{section.inner_html}</div>'
+        for section in document.sections
+        if section.parent is None
+    )
+
+
+def dump_draft_document(document: DraftDocument) -> List[Dict[str, Any]]:
+    """JSON form stored in drafts.content_sections"""
+    return [section.model_dump() for section in document.sections]
+
+
+def load_draft_document(draft: Dict[str, Any]) -> DraftDocument:
+    """A draft's current sections: the stored document, or parsed from its HTML for older drafts"""
+    if draft.get("content_sections"):
+        return DraftDocument(sections=draft["content_sections"])
+    return parse_draft_html(draft.get("edited_html") or draft.get("generated_html") or "")
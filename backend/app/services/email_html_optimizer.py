@@ -0,0 +1,288 @@
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+
+_STYLE_BLOCK_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.DOTALL | re.IGNORECASE)
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_HTML_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+_STYLE_ATTR_RE = re.compile(r'\sstyle\s*=\s*("[^"]*"|\'[^\']*\')', re.IGNORECASE)
+_COMPOUND_RE = re.compile(r'^([a-z][a-z0-9]*|\*)?((?:\.[\w-]+)*)(:last-child)?$')
+_PRESERVE_RE = re.compile(r'(<(pre|textarea)\b.*?</\2>)', re.DOTALL | re.IGNORECASE)
+_BLOCK_TAG_SPACE_RE = re.compile(
+    r'\s*(</?(?:!DOCTYPE|html|head|body|meta|title|style|div|p|h[1-6]|ul|ol|li|table|thead|tbody|tr|td|th|br|hr)\b[^>]*>)\s*',
+    re.IGNORECASE
+)
+_WHITESPACE_RE = re.compile(r'\s+')
+_CSS_PUNCTUATION_RE = re.compile(r'\s*([{};,>])\s*')
+
+_VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"
+})
+
+# (tag or None, classes, pseudo-class or None)
+Compound = Tuple[Optional[str], Tuple[str, ...], Optional[str]]
+
+
+class _Element:
+    __slots__ = ("tag", "classes", "parent", "start", "end", "is_last_child")
+
+    def __init__(self, tag: str, classes: Tuple[str, ...], parent: Optional["_Element"], start: int, end: int):
+        self.tag = tag
+        self.classes = classes
+        self.parent = parent
+        self.start = start
+        self.end = end
+        self.is_last_child = False
+
+
+class _ElementCollector(HTMLParser):
+    """Records every element's tag, classes, parent and start-tag span in one pass"""
+
+    def __init__(self, html_content: str):
+        super().__init__(convert_charrefs=True)
+        self._line_offsets = [0] + [match.end() for match in re.finditer("\n", html_content)]
+        self._stack: List[_Element] = []
+        self._last_child: Dict[int, _Element] = {}
+        self.elements: List[_Element] = []
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self._line_offsets[line - 1] + column
+
+    def _add(self, tag: str, attrs) -> _Element:
+        start = self._offset()
+        classes = tuple((dict(attrs).get("class") or "").split())
+        parent = self._stack[-1] if self._stack else None
+        element = _Element(tag, classes, parent, start, start + len(self.get_starttag_text() or ""))
+        self._last_child[id(parent)] = element
+        self.elements.append(element)
+        return element
+
+    def handle_starttag(self, tag, attrs):
+        element = self._add(tag, attrs)
+        if tag not in _VOID_TAGS:
+            self._stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self._add(tag, attrs)
+
+    def handle_endtag(self, tag):
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index].tag == tag:
+                del self._stack[index:]
+                return
+
+    def close(self):
+        super().close()
+        for element in self._last_child.values():
+            element.is_last_child = True
+
+
+class _Rule:
+    __slots__ = ("selector", "compounds", "declarations", "specificity", "order")
+
+    def __init__(self, selector: str, compounds: Optional[List[Compound]], declarations: str, order: int):
+        self.selector = selector
+        self.compounds = compounds
+        self.declarations = declarations
+        self.order = order
+        if compounds:
+            classes = sum(len(c[1]) + (1 if c[2] else 0) for c in compounds)
+            tags = sum(1 for c in compounds if c[0] and c[0] != "*")
+            self.specificity = (classes, tags)
+        else:
+            self.specificity = (0, 0)
+
+    @property
+    def inlinable(self) -> bool:
+        # :last-child is resolved per element; the universal reset stays in the <style> block
+        return bool(self.compounds) and self.compounds[-1][0] != "*"
+
+
+def _parse_selector(selector: str) -> Optional[List[Compound]]:
+    """Compounds of a descendant selector like '.news-item h4'; None if unsupported"""
+    compounds = []
+    for part in selector.split():
+        match = _COMPOUND_RE.match(part)
+        if not match or not (match.group(1) or match.group(2)):
+            return None
+        classes = tuple(name for name in match.group(2).split(".") if name)
+        compounds.append((match.group(1), classes, match.group(3)))
+    return compounds
+
+
+def _matches_compound(element: _Element, compound: Compound, check_pseudo: bool) -> bool:
+    tag, classes, pseudo = compound
+    if tag and tag != "*" and element.tag != tag:
+        return False
+    if any(name not in element.classes for name in classes):
+        return False
+    if check_pseudo and pseudo == ":last-child" and not element.is_last_child:
+        return False
+    return True
+
+
+def _matches(element: _Element, compounds: List[Compound], check_pseudo: bool = True) -> bool:
+    if not _matches_compound(element, compounds[-1], check_pseudo):
+        return False
+    ancestor = element.parent
+    for compound in reversed(compounds[:-1]):
+        while ancestor is not None and not _matches_compound(ancestor, compound, check_pseudo):
+            ancestor = ancestor.parent
+        if ancestor is None:
+            return False
+        ancestor = ancestor.parent
+    return True
+
+
+def _split_rules(css: str) -> List[Tuple[str, str]]:
+    """Top-level (prelude, body) pairs; @media bodies are returned unparsed"""
+    rules = []
+    depth = 0
+    prelude_start = 0
+    body_start = 0
+    for index, char in enumerate(css):
+        if char == "{":
+            if depth == 0:
+                prelude = css[prelude_start:index]
+                body_start = index + 1
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude.strip(), css[body_start:index].strip()))
+                prelude_start = index + 1
+    return rules
+
+
+def _minify_css(css: str) -> str:
+    css = _CSS_PUNCTUATION_RE.sub(r"\1", _WHITESPACE_RE.sub(" ", css))
+    return css.replace(": ", ":").replace(";}", "}").strip()
+
+
+def _declarations(body: str) -> List[Tuple[str, str]]:
+    pairs = []
+    for declaration in body.split(";"):
+        name, _, value = declaration.partition(":")
+        if name.strip() and value.strip():
+            pairs.append((name.strip().lower(), _WHITESPACE_RE.sub(" ", value.strip())))
+    return pairs
+
+
+def inline_css(html_content: str) -> str:
+    """Move <style> rules onto matching elements and drop rules that match nothing
+
+    Supports the selectors our templates use: type, class and descendant
+    combinations, optionally with :last-child. The universal reset, @media
+    blocks and anything unsupported stay in a single minified <style> block,
+    pruned of rules that match no element.
+    """
+    css = "\n".join(_STYLE_BLOCK_RE.findall(html_content))
+    if not css:
+        return html_content
+    css = _CSS_COMMENT_RE.sub("", css)
+
+    body = _STYLE_BLOCK_RE.sub("", html_content)
+    collector = _ElementCollector(body)
+    collector.feed(body)
+    collector.close()
+    elements = collector.elements
+
+    def used(compounds: Optional[List[Compound]]) -> bool:
+        return compounds is None or any(_matches(element, compounds, check_pseudo=False) for element in elements)
+
+    inline_rules: List[_Rule] = []
+    kept_css: List[str] = []
+    order = 0
+    for prelude, rule_body in _split_rules(css):
+        if prelude.startswith("@media"):
+            kept_inner = []
+            for inner_prelude, inner_body in _split_rules(rule_body):
+                selectors = [s.strip() for s in inner_prelude.split(",")]
+                selectors = [s for s in selectors if used(_parse_selector(s))]
+                if selectors:
+                    # Responsive overrides have to beat the inlined styles
+                    important = ";".join(
+                        f"{name}:{value}" if value.endswith("!important") else f"{name}:{value} !important"
+                        for name, value in _declarations(inner_body)
+                    )
+                    kept_inner.append(f"{','.join(selectors)}{{{important}}}")
+            if kept_inner:
+                kept_css.append(f"{prelude}{{{''.join(kept_inner)}}}")
+            continue
+        if prelude.startswith("@"):
+            kept_css.append(f"{prelude}{{{rule_body}}}")
+            continue
+
+        kept_selectors = []
+        for selector in (s.strip() for s in prelude.split(",")):
+            rule = _Rule(selector, _parse_selector(selector), rule_body, order)
+            order += 1
+            if rule.inlinable:
+                inline_rules.append(rule)
+            elif used(rule.compounds):
+                kept_selectors.append(selector)
+        if kept_selectors:
+            kept_css.append(f"{','.join(kept_selectors)}{{{rule_body}}}")
+
+    # Cascade: lower specificity first, then source order
+    inline_rules.sort(key=lambda rule: (rule.specificity, rule.order))
+    styles: Dict[int, Dict[str, str]] = {}
+    for rule in inline_rules:
+        declarations = _declarations(rule.declarations)
+        for index, element in enumerate(elements):
+            if _matches(element, rule.compounds):
+                styles.setdefault(index, {}).update(declarations)
+
+    parts = []
+    position = 0
+    for index, element in enumerate(elements):
+        if index not in styles:
+            continue
+        start_tag = body[element.start:element.end]
+        inline = ";".join(f"{name}:{value}" for name, value in styles[index].items())
+        existing = _STYLE_ATTR_RE.search(start_tag)
+        if existing:
+            # Attributes already on the element win over the stylesheet
+            inline = f"{inline};{existing.group(1)[1:-1].strip()}"
+            start_tag = start_tag[:existing.start()] + start_tag[existing.end():]
+        inline = inline.replace('"', "'")
+        close = -2 if start_tag.endswith("/>") else -1
+        start_tag = f'{start_tag[:close].rstrip()} style="{inline}"{start_tag[close:]}'
+
+        parts.append(body[position:element.start])
+        parts.append(start_tag)
+        position = element.end
+    parts.append(body[position:])
+    html_content = "".join(parts)
+
+    if kept_css:
+        style_block = f"<style>{_minify_css(''.join(kept_css))}</style>"
+        head_end = html_content.lower().find("</head>")
+        if head_end == -1:
+            html_content = style_block + html_content
+        else:
+            html_content = html_content[:head_end] + style_block + html_content[head_end:]
+    return html_content
+
+
+def minify_html(html_content: str) -> str:
+    """Drop comments and collapse whitespace, leaving <pre>/<textarea> untouched"""
+    pieces = _PRESERVE_RE.split(html_content)
+    output = []
+    # split() yields [text, preserved, tag name, text, ...]
+    for index in range(0, len(pieces), 3):
+        text = _HTML_COMMENT_RE.sub("", pieces[index])
+        text = _BLOCK_TAG_SPACE_RE.sub(r"\1", _WHITESPACE_RE.sub(" ", text))
+        output.append(text)
+        if index + 1 < len(pieces):
+            output.append(pieces[index + 1])
+    return "".join(output).strip()
+
+
+@lru_cache(maxsize=64)
+def optimize_email_html(html_content: str) -> str:
+    """Inline CSS and minify a rendered email; memoized by content"""
+    return minify_html(inline_css(html_content))
@@ -1,6 +1,12 @@
 from typing import Dict, List, Optional
+from datetime import date
+from app.models.draft_document import DraftDocument
 from app.services.email_template_service import EmailTemplateService
+from app.services.cache_service import cache_service
+from app.services.draft_parser import load_draft_document, serialize_draft_document
+from app.config import settings
 from app.database import SupabaseDB
+import hashlib
 import json
 
 
@@ -14,18 +20,13 @@ class EmailRendererService:
         self,
         draft_id: str,
         custom_subject: str = None,
-        custom_bundle_color: str = None
+        custom_bundle_color: str = None,
+        draft: Dict = None
     ) -> Dict:
         """Render a draft into final email HTML for sending"""
         
-        # Get draft from database
-        db = SupabaseDB.get_service_client()
-        draft_response = db.table("drafts").select("*").eq("id", draft_id).execute()
-        
-        if not draft_response.data:
-            raise ValueError(f"Draft {draft_id} not found")
-        
-        draft = draft_response.data[0]
+        # Reuse the draft row when the caller already fetched it
+        draft = draft or self._get_draft(draft_id)
         
         # Get bundle information for customization
         bundle_info = self._get_bundle_info(draft.get("bundle_id"))
@@ -35,13 +36,7 @@ class EmailRendererService:
         
         # Always generate from new template structure (ignore old full_email_html)
         # This ensures we use the new separated content structure
-        final_html = self.template_service.generate_newsletter_html(
-            draft_content=draft.get("generated_html", ""),
-            bundle_name=draft.get("bundle_name", "Newsletter"),
-            bundle_color=bundle_color,
-            entries=self._get_draft_entries(draft),
-            include_images=True
-        )
+        final_html = await self.get_full_email_html(draft, bundle_color)
         
         # Generate subject line
         subject = custom_subject or self._generate_subject_line(draft)
@@ -57,31 +52,20 @@ class EmailRendererService:
     async def render_preview(
         self,
         draft_id: str,
-        custom_bundle_color: str = None
+        custom_bundle_color: str = None,
+        draft: Dict = None
     ) -> Dict:
         """Render a draft for preview (without tracking pixels)"""
         
-        # Get draft from database
-        db = SupabaseDB.get_service_client()
-        draft_response = db.table("drafts").select("*").eq("id", draft_id).execute()
-        
-        if not draft_response.data:
-            raise ValueError(f"Draft {draft_id} not found")
-        
-        draft = draft_response.data[0]
+        # Reuse the draft row when the caller already fetched it
+        draft = draft or self._get_draft(draft_id)
         
         # Get bundle information
         bundle_info = self._get_bundle_info(draft.get("bundle_id"))
         bundle_color = custom_bundle_color or bundle_info.get("color", "#3B82F6")
         
         # Generate preview HTML (same as final but without tracking)
-        preview_html = self.template_service.generate_newsletter_html(
-            draft_content=draft.get("generated_html", ""),
-            bundle_name=draft.get("bundle_name", "Newsletter"),
-            bundle_color=bundle_color,
-            entries=self._get_draft_entries(draft),
-            include_images=True
-        )
+        preview_html = await self.get_full_email_html(draft, bundle_color)
         
         return {
             "html_content": preview_html,
@@ -90,6 +74,51 @@ class EmailRendererService:
             "readiness_score": draft.get("readiness_score", 0)
         }
     
+    async def get_full_email_html(self, draft: Dict, bundle_color: str) -> str:
+        """Full newsletter HTML for a draft, rendered on demand and cached per content version"""
+        document = load_draft_document(draft)
+        content_hash = self._content_hash(draft, document)
+        cached = await cache_service.get_rendered_email(
+            draft["user_id"], draft["id"], content_hash, bundle_color,
+            ttl_seconds=settings.render_cache_ttl_seconds
+        )
+        if cached is not None:
+            return cached
+        
+        html = self.template_service.generate_newsletter_html(
+            draft_content=draft.get("generated_html", ""),
+            bundle_name=draft.get("bundle_name", "Newsletter"),
+            bundle_color=bundle_color,
+            entries=self._get_draft_entries(draft),
+            include_images=True,
+            document=document
+        )
+        await cache_service.set_rendered_email(
+            draft["user_id"], draft["id"], content_hash, bundle_color, html,
+            ttl_seconds=settings.render_cache_ttl_seconds
+        )
+        return html
+    
+    def _content_hash(self, draft: Dict, document: DraftDocument) -> str:
+        """Hash of every draft field the template renders (plus today's date, shown in the header)"""
+        rendered_fields = {
+            "content": serialize_draft_document(document),
+            "bundle_name": draft.get("bundle_name", "Newsletter"),
+            "sources": (draft.get("sources") or [])[:10],
+            "date": date.today().isoformat()
+        }
+        return hashlib.sha256(json.dumps(rendered_fields, sort_keys=True).encode()).hexdigest()[:16]
+    
+    def _get_draft(self, draft_id: str) -> Dict:
+        """Get draft from database"""
+        db = SupabaseDB.get_service_client()
+        draft_response = db.table("drafts").select("*").eq("id", draft_id).execute()
+        
+        if not draft_response.data:
+            raise ValueError(f"Draft {draft_id} not found")
+        
+        return draft_response.data[0]
+    
     def _get_bundle_info(self, bundle_id: str) -> Dict:
         """Get bundle information for customization"""
         # Import here to avoid circular imports
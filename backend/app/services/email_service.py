@@ -1,13 +1,20 @@
 from typing import List, Optional
 from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, TrackingSettings, ClickTracking, OpenTracking
+from sendgrid.helpers.mail import (
+    Mail, TrackingSettings, ClickTracking, OpenTracking, Personalization, To, Substitution
+)
 from app.config import settings
 from app.services.email_renderer_service import EmailRendererService
+from app.services.smtp_pool import smtp_pool
+from app.services.tracked_template import compile_tracked_template
+import asyncio
 import hashlib
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import re
+
+
+# Placeholder replaced per recipient by SendGrid substitutions
+SENDGRID_TOKEN_TAG = "-token-"
 
 
 class EmailService:
@@ -22,6 +29,7 @@ class EmailService:
         self.from_email = getattr(settings, 'from_email', 'noreply@creatorpulse.com')
         self.from_name = getattr(settings, 'from_name', 'CreatorPulse')
         self.renderer_service = EmailRendererService()
+        self._sendgrid_client = None
     
     async def send_newsletter(
         self,
@@ -33,12 +41,8 @@ class EmailService:
     ) -> dict:
         """Send newsletter to recipients with tracking"""
         
-        # Insert tracking pixel for open tracking
-        tracking_pixel = self._generate_tracking_pixel(draft_id)
-        html_with_tracking = html_content + tracking_pixel
-        
-        # Wrap links for click tracking
-        html_with_links = self._wrap_links(html_with_tracking, draft_id)
+        # Wrap links for click tracking and add the open tracking pixel
+        html_with_links = compile_tracked_template(html_content, draft_id).render()
         
         if use_sendgrid and self.sendgrid_api_key:
             return await self._send_via_sendgrid(recipients, subject, html_with_links)
@@ -104,8 +108,7 @@ class EmailService:
             message.tracking_settings.click_tracking = ClickTracking(True, True)
             message.tracking_settings.open_tracking = OpenTracking(True)
             
-            sg = SendGridAPIClient(self.sendgrid_api_key)
-            response = sg.send(message)
+            response = self._get_sendgrid_client().send(message)
             
             return {
                 "success": True,
@@ -122,48 +125,110 @@ class EmailService:
                 "method": "sendgrid"
             }
     
-    async def _send_via_smtp(
+    async def _send_via_sendgrid_with_tokens(
         self,
-        recipients: List[str],
+        recipients_with_tokens: List[dict],
         subject: str,
-        html_content: str
+        html_content: str,
+        draft_id: str
+    ) -> dict:
+        """Send via SendGrid with per-recipient tokens, batching recipients into personalizations"""
+        batch_size = settings.sendgrid_personalizations_per_request
+        sent_count = 0
+        failed_recipients = []
+        errors = []
+        message_ids = []
+        
+        for i in range(0, len(recipients_with_tokens), batch_size):
+            batch = recipients_with_tokens[i:i + batch_size]
+            # The SendGrid client is blocking; keep it off the event loop
+            result = await asyncio.to_thread(self.send_sendgrid_batch_sync, batch, subject, html_content, draft_id)
+            if result["success"]:
+                sent_count += result["recipients_count"]
+                message_ids.append(result.get("message_id"))
+            else:
+                failed_recipients.extend(result["failed_recipients"])
+                errors.append(result["error"])
+        
+        response = {
+            "success": not failed_recipients,
+            "recipients_count": sent_count,
+            "message_id": message_ids[0] if message_ids else None,
+            "method": "sendgrid"
+        }
+        if failed_recipients:
+            response["failed_count"] = len(failed_recipients)
+            response["failed_recipients"] = failed_recipients
+            response["error"] = errors[0]
+        
+        return response
+    
+    def send_sendgrid_batch_sync(
+        self,
+        recipients_with_tokens: List[dict],
+        subject: str,
+        html_content: str,
+        draft_id: str
     ) -> dict:
-        """Send email via SMTP"""
+        """Send one SendGrid request with a personalization (and token substitution) per recipient"""
         try:
-            sent_count = 0
+            # Tracking URLs carry a placeholder that SendGrid fills in per recipient
+            html_with_links = compile_tracked_template(html_content, draft_id).render(SENDGRID_TOKEN_TAG)
+            
+            message = Mail(
+                from_email=(self.from_email, self.from_name),
+                subject=subject,
+                html_content=html_with_links
+            )
+            for recipient_data in recipients_with_tokens:
+                personalization = Personalization()
+                personalization.add_to(To(recipient_data["email"]))
+                personalization.add_substitution(Substitution(SENDGRID_TOKEN_TAG, recipient_data["token"]))
+                message.add_personalization(personalization)
             
-            for recipient in recipients:
-                msg = MIMEMultipart('alternative')
-                msg['Subject'] = subject
-                msg['From'] = f"{self.from_name} <{self.from_email}>"
-                msg['To'] = recipient
-                
-                html_part = MIMEText(html_content, 'html')
-                msg.attach(html_part)
-                
-                # Send via SMTP
-                with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                    server.starttls()
-                    if self.smtp_username and self.smtp_password:
-                        server.login(self.smtp_username, self.smtp_password)
-                    server.send_message(msg)
-                    sent_count += 1
+            # Opens and clicks are tracked through our own token URLs
+            message.tracking_settings = TrackingSettings()
+            message.tracking_settings.click_tracking = ClickTracking(False, False)
+            message.tracking_settings.open_tracking = OpenTracking(False)
+            
+            response = self._get_sendgrid_client().send(message)
             
             return {
                 "success": True,
-                "recipients_count": sent_count,
-                "message_id": f"smtp-{hash(subject)}",
-                "method": "smtp"
+                "recipients_count": len(recipients_with_tokens),
+                "message_id": response.headers.get('X-Message-Id'),
+                "method": "sendgrid"
             }
         
         except Exception as e:
-            print(f"[EMAIL ERROR] SMTP send failed: {str(e)}")
+            print(f"[EMAIL ERROR] SendGrid batch send failed: {str(e)}")
             return {
                 "success": False,
                 "error": str(e),
-                "method": "smtp"
+                "recipients_count": 0,
+                "failed_recipients": [recipient_data["email"] for recipient_data in recipients_with_tokens],
+                "method": "sendgrid"
             }
     
+    def _get_sendgrid_client(self) -> SendGridAPIClient:
+        """Reuse one SendGrid client per service instance"""
+        if self._sendgrid_client is None:
+            self._sendgrid_client = SendGridAPIClient(self.sendgrid_api_key, host=settings.sendgrid_api_host)
+        return self._sendgrid_client
+    
+    async def _send_via_smtp(
+        self,
+        recipients: List[str],
+        subject: str,
+        html_content: str
+    ) -> dict:
+        """Send email via SMTP over pooled connections"""
+        messages = [
+            self._build_smtp_message(recipient, subject, html_content)
+            for recipient in recipients
+        ]
+        return await self._send_smtp_messages(recipients, subject, messages)
+    
     async def _send_via_smtp_with_tokens(
         self,
         recipients_with_tokens: List[dict],
@@ -172,41 +237,29 @@ class EmailService:
         draft_id: str
     ) -> dict:
         """Send email via SMTP with per-recipient token tracking"""
-        try:
-            sent_count = 0
-            
-            for recipient_data in recipients_with_tokens:
-                recipient = recipient_data["email"]
-                token = recipient_data["token"]
-                
-                # Generate personalized tracking for this recipient
-                tracking_pixel = self._generate_tracking_pixel(draft_id, token)
-                html_with_tracking = html_content + tracking_pixel
-                html_with_links = self._wrap_links(html_with_tracking, draft_id, token)
-                
-                msg = MIMEMultipart('alternative')
-                msg['Subject'] = subject
-                msg['From'] = f"{self.from_name} <{self.from_email}>"
-                msg['To'] = recipient
-                
-                html_part = MIMEText(html_with_links, 'html')
-                msg.attach(html_part)
-                
-                # Send via SMTP
-                with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                    server.starttls()
-                    if self.smtp_username and self.smtp_password:
-                        server.login(self.smtp_username, self.smtp_password)
-                    server.send_message(msg)
-                    sent_count += 1
-            
-            return {
-                "success": True,
-                "recipients_count": sent_count,
-                "message_id": f"smtp-{hash(subject)}",
-                "method": "smtp"
-            }
+        # Links and pixel are analyzed once; each recipient only fills in their token
+        template = compile_tracked_template(html_content, draft_id)
+        messages = [
+            self._build_smtp_message(recipient_data["email"], subject, template.render(recipient_data["token"]))
+            for recipient_data in recipients_with_tokens
+        ]
         
+        recipients = [recipient_data["email"] for recipient_data in recipients_with_tokens]
+        return await self._send_smtp_messages(recipients, subject, messages)
+    
+    def _build_smtp_message(self, recipient: str, subject: str, html_content: str) -> MIMEMultipart:
+        """Build a single-recipient HTML message"""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = f"{self.from_name} <{self.from_email}>"
+        msg['To'] = recipient
+        msg.attach(MIMEText(html_content, 'html'))
+        return msg
+    
+    async def _send_smtp_messages(self, recipients: List[str], subject: str, messages: List[MIMEMultipart]) -> dict:
+        """Send prepared messages through the SMTP pool and summarize the outcome"""
+        try:
+            sent_count, failures = await smtp_pool.send_messages(messages)
         except Exception as e:
             print(f"[EMAIL ERROR] SMTP send failed: {str(e)}")
             return {
@@ -214,31 +267,21 @@ class EmailService:
                 "error": str(e),
                 "method": "smtp"
             }
-    
-    def _generate_tracking_pixel(self, draft_id: str, token: str = None) -> str:
-        """Generate tracking pixel HTML for open tracking"""
-        from app.config import settings
-        token_param = f"?token={token}" if token else ""
-        tracking_url = f"{settings.api_base_url}/api/analytics/track/open/{draft_id}{token_param}"
-        return f'<img src="{tracking_url}" width="1" height="1" style="display:none;" alt="" />'
-    
-    def _wrap_links(self, html_content: str, draft_id: str, token: str = None) -> str:
-        """Wrap all links for click tracking"""
-        from app.config import settings
-        # Find all href attributes in anchor tags
-        def replace_link(match):
-            original_url = match.group(1)
-            # Skip tracking for certain URLs
-            if original_url.startswith('#') or original_url.startswith('mailto:') or original_url.startswith('tel:'):
-                return f'href="{original_url}"'
-            # Create tracking URL
-            token_param = f"&token={token}" if token else ""
-            tracking_url = f"{settings.api_base_url}/api/analytics/track/click/{draft_id}?url={original_url}{token_param}"
-            return f'href="{tracking_url}"'
         
-        # Replace all href attributes
-        wrapped_html = re.sub(r'href="([^"]+)"', replace_link, html_content)
-        return wrapped_html
+        result = {
+            "success": not failures,
+            "recipients_count": sent_count,
+            "message_id": f"smtp-{hash(subject)}",
+            "method": "smtp"
+        }
+        if failures:
+            print(f"[EMAIL ERROR] SMTP send failed for {len(failures)} of {len(messages)} recipients")
+            result["failed_count"] = len(failures)
+            result["failed_recipients"] = [recipients[index] for index in sorted(failures)]
+            result["failed_indexes"] = sorted(failures)
+            result["error"] = next(iter(failures.values()))
+        
+        return result
     
     async def send_test_email(
         self,
@@ -263,10 +306,12 @@ class EmailService:
     async def get_draft_preview(
         self,
         draft_id: str,
-        custom_bundle_color: str = None
+        custom_bundle_color: str = None,
+        draft: dict = None
     ) -> dict:
         """Get preview of draft as rendered email"""
         return await self.renderer_service.render_preview(
             draft_id=draft_id,
-            custom_bundle_color=custom_bundle_color
+            custom_bundle_color=custom_bundle_color,
+            draft=draft
         )
\ No newline at end of file
@@ -1,58 +1,17 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from string import Formatter
 import re
 import requests
 from datetime import datetime
 from urllib.parse import urlparse
 import base64
+from app.models.draft_document import DraftDocument
+from app.services.draft_parser import parse_draft_html
+from app.services.email_html_optimizer import optimize_email_html
+from app.config import settings
 
 
-class EmailTemplateService:
-    """Service for generating professional HTML email templates for newsletters"""
-    
-    def __init__(self):
-        self.base_template = self._get_base_template()
-    
-    def generate_newsletter_html(
-        self,
-        draft_content: str,
-        bundle_name: str,
-        bundle_color: str = "#3B82F6",
-        entries: List[Dict] = None,
-        include_images: bool = True
-    ) -> str:
-        """Generate complete HTML email template for newsletter"""
-        
-        # Extract structured content from draft
-        structured_content = self._parse_draft_content(draft_content)
-        
-        # Get real articles (with source URLs)
-        real_articles = self._get_real_articles(entries)
-        
-        # Get AI insights (without source URLs)
-        ai_insights = self._get_ai_insights(structured_content)
-        
-        # Get trends section
-        trends_section = self._get_trends_section(structured_content)
-        
-        # Generate stats
-        stats = self._generate_stats(real_articles, bundle_name)
-        
-        # Build the complete HTML
-        html_content = self.base_template.format(
-            bundle_name=bundle_name,
-            bundle_color=bundle_color,
-            stats=stats,
-            real_articles=real_articles,
-            ai_insights=ai_insights,
-            trends_section=trends_section,
-            footer=self._get_footer()
-        )
-        
-        return html_content
-    
-    def _get_base_template(self) -> str:
-        """Get the base HTML email template"""
-        return """
+BASE_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -454,31 +413,117 @@ class EmailTemplateService:
 </body>
 </html>
 """
+
+FOOTER_HTML = """
+        <div class="footer">
+            <h4>CreatorPulse</h4>
+            <p>Your AI-powered newsletter companion</p>
+            <div class="social-links">
+                <a href="#">Twitter</a>
+                <a href="#">LinkedIn</a>
+                <a href="#">Website</a>
+            </div>
+            <div class="unsubscribe">
+                <a href="#">Unsubscribe</a> | <a href="#">Update Preferences</a>
+            </div>
+        </div>
+        """
+
+
+def _compile_template(template: str) -> List[Tuple[str, Optional[str]]]:
+    """Split a str.format template into (literal, field name) segments, with braces already unescaped"""
+    return [(literal, field) for literal, field, _, _ in Formatter().parse(template)]
+
+
+_TEMPLATE_SEGMENTS = _compile_template(BASE_TEMPLATE)
+
+
+def _render_template(values: Dict[str, str]) -> str:
+    """Fill the base template with one join over its segments"""
+    parts = []
+    for literal, field in _TEMPLATE_SEGMENTS:
+        parts.append(literal)
+        if field is not None:
+            parts.append(values[field])
+    return "".join(parts)
+
+
+def _placeholder_image(color: str) -> str:
+    """Gradient SVG placeholder as a data URL"""
+    svg = f"""
+        <svg width="80" height="80" xmlns="http://www.w3.org/2000/svg">
+            <defs>
+                <linearGradient id="grad" x1="0%" y1="0%" x2="100%" y2="100%">
+                    <stop offset="0%" style="stop-color:{color};stop-opacity:1" />
+                    <stop offset="100%" style="stop-color:{color}88;stop-opacity:1" />
+                </linearGradient>
+            </defs>
+            <rect width="80" height="80" fill="url(#grad)" rx="6"/>
+        </svg>
+        """
+    return f"data:image/svg+xml;base64,{base64.b64encode(svg.encode()).decode()}"
+
+
+# The placeholder depends only on its color, so build each one once
+PLACEHOLDER_IMAGES = [_placeholder_image(color) for color in ['#3B82F6', '#8B5CF6', '#06B6D4', '#10B981', '#F59E0B']]
+
+
+class EmailTemplateService:
+    """Service for generating professional HTML email templates for newsletters"""
     
-    def _parse_draft_content(self, draft_content: str) -> Dict:
+    def __init__(self):
+        self.base_template = BASE_TEMPLATE
+    
+    def generate_newsletter_html(
+        self,
+        draft_content: str,
+        bundle_name: str,
+        bundle_color: str = "#3B82F6",
+        entries: List[Dict] = None,
+        include_images: bool = True,
+        document: DraftDocument = None
+    ) -> str:
+        """Generate complete HTML email template for newsletter"""
+        
+        # Use the draft's stored sections when given; otherwise parse the HTML once
+        structured_content = document or self._parse_draft_content(draft_content)
+        
+        # Get real articles (with source URLs)
+        real_articles = self._get_real_articles(entries)
+        
+        # Get AI insights (without source URLs)
+        ai_insights = self._get_ai_insights(structured_content)
+        
+        # Get trends section
+        trends_section = self._get_trends_section(structured_content)
+        
+        # Generate stats
+        stats = self._generate_stats(real_articles, bundle_name)
+        
+        # Build the complete HTML: one join over the precompiled template segments
+        html_content = _render_template({
+            "bundle_name": bundle_name,
+            "bundle_color": bundle_color,
+            "stats": stats,
+            "real_articles": real_articles,
+            "ai_insights": ai_insights,
+            "trends_section": trends_section,
+            "footer": FOOTER_HTML
+        })
+        
+        # Inline CSS and minify: clients drop <style> blocks and every byte is sent per recipient
+        if settings.email_optimize_html:
+            html_content = optimize_email_html(html_content)
+        
+        return html_content
+    
+    def _get_base_template(self) -> str:
+        """Get the base HTML email template"""
+        return BASE_TEMPLATE
+    
+    def _parse_draft_content(self, draft_content: str) -> DraftDocument:
         """Parse draft content to extract structured information"""
-        content = {
-            "intro": "",
-            "insights": [],
-            "trends": []
-        }
-        
-        # Extract intro
-        intro_match = re.search(r'<div class="draft-intro">(.*?)</div>', draft_content, re.DOTALL)
-        if intro_match:
-            content["intro"] = self._clean_html(intro_match.group(1))
-        
-        # Extract insights
-        insights_matches = re.findall(r'<div class="draft-insight">(.*?)</div>', draft_content, re.DOTALL)
-        for insight in insights_matches:
-            content["insights"].append(self._clean_html(insight))
-        
-        # Extract trends
-        trends_match = re.search(r'<div class="draft-trends">(.*?)</div>', draft_content, re.DOTALL)
-        if trends_match:
-            content["trends"] = self._extract_trends(trends_match.group(1))
-        
-        return content
+        return parse_draft_html(draft_content)
     
     def _get_real_articles(self, entries: List[Dict]) -> str:
         """Generate real articles section with working Read More links"""
@@ -527,9 +572,9 @@ class EmailTemplateService:
         </div>
         """
     
-    def _get_ai_insights(self, structured_content: Dict) -> str:
+    def _get_ai_insights(self, structured_content: DraftDocument) -> str:
         """Generate AI insights section without fake Read More links"""
-        insights = structured_content.get("insights", [])
+        insights = structured_content.insights
         if not insights:
             return """
             <div class="no-insights">
@@ -539,11 +584,8 @@ class EmailTemplateService:
         
         insights_html = []
         for i, insight in enumerate(insights[:3]):  # Limit to 3 insights
-            title_match = re.search(r'<h3>(.*?)</h3>', insight)
-            content_match = re.search(r'<p>(.*?)</p>', insight)
-            
-            title = title_match.group(1) if title_match else f"Insight {i+1}"
-            content = content_match.group(1) if content_match else insight
+            title = insight.title or f"Insight {i+1}"
+            content = insight.paragraph or insight.text
             
             insights_html.append(f"""
             <div class="insight-item">
@@ -554,9 +596,9 @@ class EmailTemplateService:
         
         return ''.join(insights_html)
     
-    def _get_trends_section(self, structured_content: Dict) -> str:
+    def _get_trends_section(self, structured_content: DraftDocument) -> str:
         """Generate trends section without links"""
-        trends = structured_content.get("trends", [])
+        trends = structured_content.trends.items if structured_content.trends else []
         if not trends:
             return """
             <div class="no-trends">
@@ -574,16 +616,13 @@ class EmailTemplateService:
         
         return ''.join(trends_html)
     
-    def _get_featured_story(self, structured_content: Dict, entries: List[Dict]) -> str:
+    def _get_featured_story(self, structured_content: DraftDocument, entries: List[Dict]) -> str:
         """Generate featured story section"""
-        if structured_content["insights"]:
+        if structured_content.insights:
             # Use first insight as featured story
-            insight = structured_content["insights"][0]
-            title_match = re.search(r'<h3>(.*?)</h3>', insight)
-            content_match = re.search(r'<p>(.*?)</p>', insight)
-            
-            title = title_match.group(1) if title_match else "Featured Story"
-            content = content_match.group(1) if content_match else insight
+            insight = structured_content.insights[0]
+            title = insight.title or "Featured Story"
+            content = insight.paragraph or insight.text
             
             return f"""
             <div class="featured-story">
@@ -614,17 +653,14 @@ class EmailTemplateService:
             </div>
             """
     
-    def _get_news_items(self, structured_content: Dict, entries: List[Dict]) -> str:
+    def _get_news_items(self, structured_content: DraftDocument, entries: List[Dict]) -> str:
         """Generate news items section"""
         news_items = []
         
         # Use insights as news items
-        for i, insight in enumerate(structured_content["insights"][:5]):
-            title_match = re.search(r'<h3>(.*?)</h3>', insight)
-            content_match = re.search(r'<p>(.*?)</p>', insight)
-            
-            title = title_match.group(1) if title_match else f"Story {i+1}"
-            content = content_match.group(1) if content_match else insight
+        for i, insight in enumerate(structured_content.insights[:5]):
+            title = insight.title or f"Story {i+1}"
+            content = insight.paragraph or insight.text
             
             # Get image if available
             image_url = self._get_image_for_content(title, content)
@@ -694,55 +730,11 @@ class EmailTemplateService:
     
     def _generate_placeholder_image(self, text: str) -> str:
         """Generate a placeholder gradient image"""
-        # Create a simple gradient as data URL
-        colors = ['#3B82F6', '#8B5CF6', '#06B6D4', '#10B981', '#F59E0B']
-        color = colors[hash(text) % len(colors)]
-        
-        # Simple gradient SVG as data URL
-        svg = f"""
-        <svg width="80" height="80" xmlns="http://www.w3.org/2000/svg">
-            <defs>
-                <linearGradient id="grad" x1="0%" y1="0%" x2="100%" y2="100%">
-                    <stop offset="0%" style="stop-color:{color};stop-opacity:1" />
-                    <stop offset="100%" style="stop-color:{color}88;stop-opacity:1" />
-                </linearGradient>
-            </defs>
-            <rect width="80" height="80" fill="url(#grad)" rx="6"/>
-        </svg>
-        """
-        
-        return f"data:image/svg+xml;base64,{base64.b64encode(svg.encode()).decode()}"
+        return PLACEHOLDER_IMAGES[hash(text) % len(PLACEHOLDER_IMAGES)]
     
     def _get_footer(self) -> str:
         """Generate footer section"""
-        return """
-        <div class="footer">
-            <h4>CreatorPulse</h4>
-            <p>Your AI-powered newsletter companion</p>
-            <div class="social-links">
-                <a href="#">Twitter</a>
-                <a href="#">LinkedIn</a>
-                <a href="#">Website</a>
-            </div>
-            <div class="unsubscribe">
-                <a href="#">Unsubscribe</a> | <a href="#">Update Preferences</a>
-            </div>
-        </div>
-        """
-    
-    def _clean_html(self, html: str) -> str:
-        """Clean HTML content"""
-        # Remove HTML tags but keep content
-        clean = re.sub(r'<[^>]+>', '', html)
-        return clean.strip()
-    
-    def _extract_trends(self, trends_html: str) -> List[str]:
-        """Extract trends from HTML"""
-        trends = []
-        li_matches = re.findall(r'<li>(.*?)</li>', trends_html)
-        for trend in li_matches:
-            trends.append(self._clean_html(trend))
-        return trends
+        return FOOTER_HTML
     
     def _format_date(self, date) -> str:
         """Format date for display"""
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationCoalescer:
+    """Shares one result between identical generation jobs that are in flight or recently completed"""
+
+    def __init__(self, ttl_seconds: int = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.generation_coalesce_ttl_seconds
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._completed: Dict[str, Tuple[float, Any]] = {}
+        self.stats = {"executed": 0, "joined_in_flight": 0, "reused_completed": 0, "not_cached": 0}
+
+    async def run(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = None
+    ) -> Any:
+        """Return the shared result for key, running factory only if nobody else is or just did
+
+        Results rejected by cacheable (e.g. degraded fallback output) are still shared
+        with jobs already waiting, but not kept for later ones.
+        """
+        self._evict_expired()
+
+        completed = self._completed.get(key)
+        if completed is not None:
+            self.stats["reused_completed"] += 1
+            logger.info(f"Reusing completed generation for key: {key}")
+            return completed[1]
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats["joined_in_flight"] += 1
+            logger.info(f"Joining in-flight generation for key: {key}")
+            # Shield so a cancelled follower does not cancel the shared job
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self.stats["executed"] += 1
+        try:
+            result = await factory()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved in case no follower joined
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            if cacheable is None or cacheable(result):
+                self._completed[key] = (time.monotonic(), result)
+            else:
+                self.stats["not_cached"] += 1
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    def invalidate(self, key: str) -> None:
+        """Drop a completed result so the next job regenerates"""
+        self._completed.pop(key, None)
+
+    def _evict_expired(self) -> None:
+        """Remove completed results older than the TTL"""
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [key for key, (finished_at, _) in self._completed.items() if finished_at < cutoff]
+        for key in expired:
+            del self._completed[key]
+
+
+# Global coalescer instance shared by all generator instances
+generation_coalescer = GenerationCoalescer()
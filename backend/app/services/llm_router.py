@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from openai import APITimeoutError, AsyncOpenAI
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMRoutingError(Exception):
+    """Raised when every model in the route failed to produce a usable response"""
+
+
+class ModelStats:
+    """Rolling latency and error statistics for one model"""
+
+    def __init__(self, window: int):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # True for success, False for error
+        self.requests = 0
+        self.successes = 0
+        self.errors = 0
+        self.hedges_started = 0
+        self.wins = 0
+        self.cancelled = 0
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+        self.successes += 1
+
+    def record_error(self, elapsed: float = None) -> None:
+        """Count a failure; timed-out attempts also pass their elapsed time"""
+        self.outcomes.append(False)
+        self.errors += 1
+        if elapsed is not None:
+            self.latencies.append(elapsed)
+
+    def record_cancelled(self, elapsed: float) -> None:
+        """A request abandoned after `elapsed` seconds would have taken at least that long"""
+        self.latencies.append(elapsed)
+        self.cancelled += 1
+
+    def latency_percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of recent latencies, in seconds
+
+        Cancelled and timed-out attempts count with their elapsed time as a lower
+        bound, so losing the race to a hedge doesn't pull the percentile down.
+        """
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        rank = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+        return ordered[rank]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        p50 = self.latency_percentile(50)
+        p95 = self.latency_percentile(95)
+        return {
+            "requests": self.requests,
+            "successes": self.successes,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 3),
+            "hedges_started": self.hedges_started,
+            "wins": self.wins,
+            "cancelled": self.cancelled,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "samples": len(self.latencies)
+        }
+
+
+def _has_content(response) -> bool:
+    """A response is usable when at least one choice carries text"""
+    return any(
+        choice.message and choice.message.content and choice.message.content.strip()
+        for choice in (response.choices or [])
+    )
+
+
+class LLMRouter:
+    """Routes chat completions over an ordered list of models with hedged requests
+
+    The first model is tried immediately. If it has not answered by its latency
+    percentile (or it fails), the next model is started; the first usable answer
+    wins and the remaining requests are cancelled.
+    """
+
+    def __init__(self, models: List[str] = None):
+        self.client = AsyncOpenAI(
+            api_key=settings.openrouter_api_key,
+            base_url=settings.openrouter_base_url,
+            # Retries would hide slow or failing models from the router
+            max_retries=0
+        )
+        self.models = models or self._configured_models()
+        self.stats: Dict[str, ModelStats] = {}
+
+    def _configured_models(self) -> List[str]:
+        """Primary model followed by the configured fallbacks, without duplicates"""
+        models = [settings.openrouter_model]
+        for model in settings.openrouter_fallback_models.split(","):
+            model = model.strip()
+            if model and model not in models:
+                models.append(model)
+        return models
+
+    def _stats_for(self, model: str) -> ModelStats:
+        if model not in self.stats:
+            self.stats[model] = ModelStats(settings.llm_stats_window)
+        return self.stats[model]
+
+    def hedge_delay(self, model: str) -> float:
+        """Seconds to wait on model before starting a hedged request to the next one"""
+        stats = self._stats_for(model)
+        if len(stats.latencies) < settings.llm_hedge_min_samples:
+            return settings.llm_hedge_default_delay_seconds
+        if stats.error_rate >= settings.llm_hedge_error_rate_threshold:
+            # Mostly failing lately; do not make callers wait on it
+            return settings.llm_hedge_min_delay_seconds
+        delay = stats.latency_percentile(settings.llm_hedge_percentile)
+        return min(max(delay, settings.llm_hedge_min_delay_seconds), settings.llm_hedge_max_delay_seconds)
+
+    def route(self, model: str = None) -> List[str]:
+        """Models in the order they will be tried; unhealthy models move to the back"""
+        models = list(self.models)
+        if model:
+            models = [model] + [m for m in models if m != model]
+
+        def is_unhealthy(name: str) -> bool:
+            stats = self._stats_for(name)
+            return (
+                len(stats.outcomes) >= settings.llm_hedge_min_samples
+                and stats.error_rate >= settings.llm_hedge_error_rate_threshold
+            )
+
+        return [m for m in models if not is_unhealthy(m)] + [m for m in models if is_unhealthy(m)]
+
+    async def _request(self, model: str, kwargs: Dict[str, Any]):
+        """One completion call against a single model, recording its statistics"""
+        stats = self._stats_for(model)
+        stats.requests += 1
+        started = time.monotonic()
+        try:
+            response = await self.client.chat.completions.create(
+                model=model,
+                timeout=settings.llm_request_timeout_seconds,
+                **kwargs
+            )
+        except asyncio.CancelledError:
+            stats.record_cancelled(time.monotonic() - started)
+            raise
+        except APITimeoutError:
+            stats.record_error(time.monotonic() - started)
+            raise
+        except Exception:
+            stats.record_error()
+            raise
+
+        if not _has_content(response):
+            stats.record_error()
+            raise LLMRoutingError(f"Empty response from {model}")
+
+        stats.record_success(time.monotonic() - started)
+        return response
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = None,
+        **kwargs
+    ) -> Tuple[Any, str]:
+        """Run a chat completion with hedging; returns (response, model that answered)"""
+        route = self.route(model)
+        kwargs["messages"] = messages
+
+        pending: Dict[asyncio.Task, str] = {}
+        next_index = 0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> str:
+            nonlocal next_index
+            name = route[next_index]
+            next_index += 1
+            if next_index > 1:
+                self._stats_for(name).hedges_started += 1
+            pending[asyncio.create_task(self._request(name, kwargs))] = name
+            return name
+
+        newest = launch()
+        try:
+            while pending:
+                can_hedge = next_index < len(route)
+                timeout = self.hedge_delay(newest) if can_hedge else None
+                done, _ = await asyncio.wait(
+                    pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Slow answer: hedge to the next model and keep the first one running
+                    logger.info(f"Hedging LLM request from {newest} to {route[next_index]}")
+                    newest = launch()
+                    continue
+
+                for task in done:
+                    name = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        self._stats_for(name).wins += 1
+                        return task.result(), name
+                    last_error = error
+                    logger.warning(f"LLM request to {name} failed: {last_error}")
+
+                # A failure frees a slot; try the next model straight away
+                if can_hedge and len(pending) == 0:
+                    newest = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise LLMRoutingError(f"All models failed: {last_error}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-model statistics and current hedge thresholds"""
+        return {
+            "route": self.route(),
+            "hedge_percentile": settings.llm_hedge_percentile,
+            "models": {
+                model: {**self._stats_for(model).to_dict(), "hedge_delay_ms": round(self.hedge_delay(model) * 1000, 1)}
+                for model in self.models
+            }
+        }
+
+
+# Global router instance so statistics accumulate across requests
+llm_router = LLMRouter()
@@ -0,0 +1,139 @@
+import html
+import re
+from typing import List, Dict, Tuple
+from app.config import settings
+
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_WHITESPACE_RE = re.compile(r'\s+')
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Feed boilerplate that carries no information for the model
+_BOILERPLATE_RES = [
+    re.compile(r'The post .{0,200}? appeared first on .{0,200}?(\.|$)', re.IGNORECASE),
+    re.compile(r'(Continue reading|Read more|Read the full (story|article))\b.*$', re.IGNORECASE),
+    re.compile(r'\[(…|\.\.\.|&#8230;)\]'),
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the BPE token count of text without calling a tokenizer"""
+    if not text:
+        return 0
+    # Words and punctuation are roughly one token each; long words split into pieces
+    return sum(1 + len(piece) // 8 for piece in _TOKEN_RE.findall(text))
+
+
+class PromptBuilder:
+    """Packs RSS entries and voice excerpts into a fixed token budget"""
+
+    def __init__(
+        self,
+        entries_token_budget: int = None,
+        voice_token_budget: int = None,
+        summary_token_limit: int = None,
+        max_entries: int = None
+    ):
+        self.entries_token_budget = entries_token_budget or settings.prompt_entries_token_budget
+        self.voice_token_budget = voice_token_budget or settings.prompt_voice_token_budget
+        self.summary_token_limit = summary_token_limit or settings.prompt_summary_token_limit
+        self.max_entries = max_entries or settings.prompt_max_entries
+
+    def clean_summary(self, summary: str, strip_boilerplate: bool = True) -> str:
+        """Strip HTML, entities and feed boilerplate from a summary"""
+        if not summary:
+            return ""
+        text = html.unescape(_TAG_RE.sub(" ", summary))
+        if strip_boilerplate:
+            for pattern in _BOILERPLATE_RES:
+                text = pattern.sub("", text)
+        return _WHITESPACE_RE.sub(" ", text).strip()
+
+    def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        """Truncate text to a token limit, preferring a sentence boundary"""
+        if estimate_tokens(text) <= max_tokens:
+            return text
+
+        kept = []
+        used = 0
+        for sentence in _SENTENCE_END_RE.split(text):
+            cost = estimate_tokens(sentence)
+            if used + cost > max_tokens:
+                break
+            kept.append(sentence)
+            used += cost
+
+        if kept:
+            return " ".join(kept)
+
+        # First sentence alone is too long; cut on words
+        words = []
+        used = 0
+        for word in text.split():
+            used += estimate_tokens(word)
+            if used > max_tokens:
+                break
+            words.append(word)
+        return " ".join(words) + "..."
+
+    def format_entries(self, entries: List[Dict]) -> str:
+        """Format the highest-scoring entries that fit in the entries budget"""
+        ranked = sorted(entries, key=lambda e: e.get("score", 0), reverse=True)
+
+        formatted = []
+        remaining = self.entries_token_budget
+        for entry in ranked[:self.max_entries]:
+            title = entry.get("title") or "Untitled"
+            link = entry.get("link", "")
+            summary = self.truncate_to_tokens(
+                self.clean_summary(entry.get("summary", "")),
+                self.summary_token_limit
+            )
+
+            block = self._format_entry(len(formatted) + 1, title, summary, link)
+            cost = estimate_tokens(block)
+            if cost > remaining and summary:
+                # Drop the summary before dropping the entry
+                block = self._format_entry(len(formatted) + 1, title, "", link)
+                cost = estimate_tokens(block)
+            if cost > remaining:
+                break
+
+            formatted.append(block)
+            remaining -= cost
+
+        return "\n".join(formatted)
+
+    def select_voice_excerpts(self, voice_samples: List[Dict], max_samples: int = 5) -> List[Tuple[str, str]]:
+        """Pick (title, excerpt) pairs from voice samples that fit in the voice budget"""
+        samples = [
+            (sample.get("title") or f"Example {i}", self.clean_summary(sample.get("content", ""), strip_boilerplate=False))
+            for i, sample in enumerate(voice_samples[:max_samples], 1)
+        ]
+        samples = [(title, content) for title, content in samples if content]
+        if not samples:
+            return []
+
+        # Short samples give back their unused share to the longer ones;
+        # results keep the caller's ordering (most recent first)
+        excerpts = [None] * len(samples)
+        remaining = self.voice_token_budget
+        by_length = sorted(range(len(samples)), key=lambda i: estimate_tokens(samples[i][1]))
+        for position, index in enumerate(by_length):
+            title, content = samples[index]
+            share = remaining // (len(by_length) - position)
+            excerpt = self.truncate_to_tokens(content, share)
+            remaining -= estimate_tokens(excerpt)
+            excerpts[index] = (title, excerpt)
+
+        return excerpts
+
+    def _format_entry(self, index: int, title: str, summary: str, link: str) -> str:
+        """Format one entry line for the prompt"""
+        lines = [f"{index}. {title}"]
+        if summary:
+            lines.append(f"   {summary}")
+        if link:
+            lines.append(f"   Source: {link}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,179 @@
+import re
+from datetime import datetime
+from typing import List, Dict, Optional
+import numpy as np
+
+
+_WORD_RE = re.compile(r"[a-z0-9]{2,}(?:['\-][a-z0-9]+)*")
+_TAG_RE = re.compile(r'<[^>]+>')
+
+STOP_WORDS = frozenset("""
+a about after all also an and any are as at be been but by can could did do does for from had
+has have he her his how i if in into is it its just more most new not of on one or our out over
+s said she so than that the their them then there these they this to up us was we were what when
+which who will with would you your
+""".split())
+
+
+class TfidfMatrix:
+    """Sparse TF-IDF document-term matrix stored as coordinate arrays"""
+
+    def __init__(self, doc_ids: np.ndarray, term_ids: np.ndarray, num_docs: int, vocab_size: int):
+        self.num_docs = num_docs
+        self.vocab_size = max(vocab_size, 1)
+
+        # Collapse (doc, term) pairs into term frequencies
+        pair_keys, tf = np.unique(doc_ids * self.vocab_size + term_ids, return_counts=True)
+        self.rows = pair_keys // self.vocab_size
+        self.cols = pair_keys % self.vocab_size
+
+        df = np.bincount(self.cols, minlength=self.vocab_size)
+        self.idf = np.log((1 + num_docs) / (1 + df)) + 1.0
+        self.weights = (1.0 + np.log(tf)) * self.idf[self.cols]
+        self.norms = np.sqrt(np.bincount(self.rows, self.weights ** 2, minlength=num_docs))
+
+    def cosine_similarity(self, query_ids: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every document to a query, as one array"""
+        sims = np.zeros(self.num_docs)
+        if query_ids.size == 0 or self.rows.size == 0:
+            return sims
+
+        term_ids, counts = np.unique(query_ids, return_counts=True)
+        query = np.zeros(self.vocab_size)
+        query[term_ids] = (1.0 + np.log(counts)) * self.idf[term_ids]
+        query_norm = np.sqrt(np.sum(query ** 2))
+
+        dots = np.bincount(self.rows, self.weights * query[self.cols], minlength=self.num_docs)
+        denominator = self.norms * query_norm
+        np.divide(dots, denominator, out=sims, where=denominator > 0)
+        return sims
+
+
+class _Vocabulary:
+    """Maps words to integer term ids; stop words occupy the lowest ids"""
+
+    def __init__(self):
+        self.ids = {word: i for i, word in enumerate(STOP_WORDS)}
+        self.num_stop_words = len(self.ids)
+
+    def encode(self, text: str) -> List[int]:
+        """Term ids for the words in text, stop words included"""
+        if not text:
+            return []
+        if "<" in text:
+            text = _TAG_RE.sub(" ", text)
+        ids = self.ids
+        return [ids.setdefault(word, len(ids)) for word in _WORD_RE.findall(text.lower())]
+
+    def encode_query(self, text: str) -> np.ndarray:
+        """Term ids of known, non-stop words in a query"""
+        if not text:
+            return np.array([], dtype=np.int64)
+        found = [self.ids.get(word, -1) for word in _WORD_RE.findall(text.lower())]
+        found = np.array(found, dtype=np.int64)
+        return found[found >= self.num_stop_words]
+
+
+def centroid_similarity(texts: List[str]) -> np.ndarray:
+    """Cosine similarity of each text to the pooled TF-IDF vector of all texts"""
+    if not texts:
+        return np.zeros(0)
+
+    vocab = _Vocabulary()
+    encoded = [vocab.encode(text) for text in texts]
+    term_ids = np.array([term for terms in encoded for term in terms], dtype=np.int64)
+    doc_ids = np.repeat(np.arange(len(texts)), [len(terms) for terms in encoded])
+    keep = term_ids >= vocab.num_stop_words
+
+    matrix = TfidfMatrix(doc_ids[keep], term_ids[keep], len(texts), len(vocab.ids))
+    return matrix.cosine_similarity(term_ids[keep])
+
+
+class RelevanceScorer:
+    """Vectorized recency and TF-IDF relevance scoring for feed entries"""
+
+    def __init__(
+        self,
+        title_weight: int = 2,
+        recency_half_life_days: float = 7.0,
+        topic_weight: float = 1.0,
+        profile_weight: float = 0.5,
+        missing_date_age_days: float = 30.0
+    ):
+        self.title_weight = title_weight
+        self.recency_half_life_days = recency_half_life_days
+        self.topic_weight = topic_weight
+        self.profile_weight = profile_weight
+        self.missing_date_age_days = missing_date_age_days
+
+    def recency_scores(self, entries: List[Dict], now: datetime = None) -> np.ndarray:
+        """Exponential recency decay for all entries at once"""
+        now_ts = (now or datetime.now()).timestamp()
+        published = np.fromiter(
+            (
+                entry["published"].timestamp() if isinstance(entry.get("published"), datetime) else np.nan
+                for entry in entries
+            ),
+            dtype=np.float64,
+            count=len(entries)
+        )
+        age_days = np.clip((now_ts - published) / 86400.0, 0.0, None)
+        age_days = np.where(np.isnan(age_days), self.missing_date_age_days, age_days)
+        return np.exp(-np.log(2) * age_days / self.recency_half_life_days)
+
+    def score(
+        self,
+        entries: List[Dict],
+        topic: Optional[str] = None,
+        profile: Optional[str] = None,
+        now: datetime = None
+    ) -> np.ndarray:
+        """Score entries as recency * (1 + weighted similarity to topic and profile)"""
+        if not entries:
+            return np.zeros(0)
+
+        relevance = np.ones(len(entries))
+
+        if topic or profile:
+            vocab = _Vocabulary()
+            doc_terms = []
+            lengths = np.empty(len(entries), dtype=np.int64)
+            for i, entry in enumerate(entries):
+                terms = vocab.encode(entry.get("title", "")) * self.title_weight
+                terms += vocab.encode(entry.get("summary", ""))
+                doc_terms.extend(terms)
+                lengths[i] = len(terms)
+
+            term_ids = np.array(doc_terms, dtype=np.int64)
+            doc_ids = np.repeat(np.arange(len(entries)), lengths)
+            keep = term_ids >= vocab.num_stop_words
+            matrix = TfidfMatrix(doc_ids[keep], term_ids[keep], len(entries), len(vocab.ids))
+
+            if topic:
+                relevance += self.topic_weight * matrix.cosine_similarity(vocab.encode_query(topic))
+            if profile:
+                relevance += self.profile_weight * matrix.cosine_similarity(vocab.encode_query(profile))
+
+        return self.recency_scores(entries, now) * relevance
+
+    def rank(
+        self,
+        entries: List[Dict],
+        topic: Optional[str] = None,
+        profile: Optional[str] = None,
+        now: datetime = None
+    ) -> List[Dict]:
+        """Set entry["score"] and return entries sorted by score, best first"""
+        scores = self.score(entries, topic, profile, now)
+        order = np.argsort(-scores, kind="stable")
+
+        ranked = []
+        for index in order:
+            entry = entries[index]
+            entry["score"] = float(scores[index])
+            ranked.append(entry)
+        return ranked
+
+
+# Shared scorer instance
+relevance_scorer = RelevanceScorer()
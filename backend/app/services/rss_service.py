@@ -2,6 +2,7 @@ import feedparser
 from typing import List, Dict
 from datetime import datetime, timedelta
 import hashlib
+from app.services.relevance_scoring import relevance_scorer
 
 
 class RSSService:
@@ -74,32 +75,9 @@ class RSSService:
             if entry.get("published", datetime.min) >= cutoff_date
         ]
     
-    def score_entries(self, entries: List[Dict], topic: str = None) -> List[Dict]:
-        """Score entries based on recency and relevance"""
-        now = datetime.now()
-        
-        for entry in entries:
-            # Recency score (0-1, exponential decay)
-            pub_date = entry.get("published", now - timedelta(days=30))
-            days_old = (now - pub_date).days
-            recency_score = max(0, 1 - (days_old / 30))
-            
-            # Relevance score (basic keyword matching if topic provided)
-            relevance_score = 1.0
-            if topic:
-                topic_lower = topic.lower()
-                title_lower = entry.get("title", "").lower()
-                summary_lower = entry.get("summary", "").lower()
-                
-                if topic_lower in title_lower:
-                    relevance_score = 1.5
-                elif topic_lower in summary_lower:
-                    relevance_score = 1.2
-            
-            entry["score"] = recency_score * relevance_score
-        
-        entries.sort(key=lambda x: x.get("score", 0), reverse=True)
-        return entries
+    def score_entries(self, entries: List[Dict], topic: str = None, profile: str = None) -> List[Dict]:
+        """Score entries based on recency and TF-IDF relevance to the topic and bundle profile"""
+        return relevance_scorer.rank(entries, topic=topic, profile=profile)
     
     def _parse_date(self, entry) -> datetime:
         """Parse published date from entry"""
@@ -0,0 +1,385 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from postgrest.types import ReturnMethod
+from app.config import settings
+from app.database import SupabaseDB
+from app.services.email_service import EmailService
+
+logger = logging.getLogger(__name__)
+
+# Job states that still have work to do
+ACTIVE_JOB_STATUSES = ["queued", "sending"]
+
+
+class AsyncRateLimiter:
+    """Token bucket limiting how fast a provider is called"""
+
+    def __init__(self, rate_per_second: float, burst: float = None):
+        self.rate = rate_per_second
+        self.capacity = burst if burst is not None else max(rate_per_second, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Wait until amount tokens are available; amounts above the burst size wait for a full bucket"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            needed = min(amount, self.capacity)
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((needed - self._tokens) / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """Return tokens acquired for work that turned out smaller"""
+        if self.rate <= 0 or amount <= 0:
+            return
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class SendJob:
+    """A persisted newsletter send being drained by this process"""
+
+    def __init__(self, row: Dict[str, Any]):
+        self.id = row["id"]
+        self.draft_id = row["draft_id"]
+        self.user_id = row["user_id"]
+        self.subject = row["subject"]
+        self.html_content = row["html_content"]
+        self.method = row["method"]
+        self.total = row["total"]
+        self.status = row.get("status", "queued")
+        self.sent = 0
+        self.failed = 0
+        self.errors: List[str] = []
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class SendPipeline:
+    """Durable newsletter sends: a persisted per-recipient queue drained in batches
+
+    Recipients are stored in email_send_queue and claimed in provider-sized
+    batches under a lease, so interrupted sends resume where they stopped and
+    several API instances can drain the same job. Failed batches are retried
+    with exponential backoff up to send_max_attempts. SendGrid batches carry
+    up to sendgrid_personalizations_per_request recipients per API call; SMTP
+    batches go through the pooled SMTP connections.
+    """
+
+    def __init__(self):
+        self.db = SupabaseDB.get_service_client()
+        self.email_service = EmailService()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.rate_limiters = {
+            "sendgrid": AsyncRateLimiter(settings.sendgrid_requests_per_second),
+            "smtp": AsyncRateLimiter(settings.smtp_messages_per_second, burst=settings.smtp_batch_size)
+        }
+        self._jobs: Dict[str, SendJob] = {}
+
+    def _method(self, use_sendgrid: bool) -> str:
+        if use_sendgrid and self.email_service.sendgrid_api_key:
+            return "sendgrid"
+        if self.email_service.smtp_host:
+            return "smtp"
+        return "simulated"
+
+    def _batch_size(self, method: str) -> int:
+        if method == "sendgrid":
+            return settings.sendgrid_personalizations_per_request
+        return settings.smtp_batch_size
+
+    async def start(
+        self,
+        draft_id: str,
+        user_id: str,
+        recipients_with_tokens: List[dict],
+        subject: str,
+        html_content: str,
+        use_sendgrid: bool = True
+    ) -> SendJob:
+        """Persist a send job and its recipients, then start draining it"""
+        row = {
+            "id": str(uuid.uuid4()),
+            "draft_id": draft_id,
+            "user_id": user_id,
+            "subject": subject,
+            "html_content": html_content,
+            "method": self._method(use_sendgrid),
+            "status": "queued",
+            "total": len(recipients_with_tokens)
+        }
+        queue_rows = [
+            {
+                "job_id": row["id"],
+                "analytics_id": recipient.get("analytics_id"),
+                "recipient_email": recipient["email"],
+                "token": recipient["token"]
+            }
+            for recipient in recipients_with_tokens
+        ]
+        await asyncio.to_thread(self._insert_job, row, queue_rows)
+
+        return self._schedule(SendJob(row))
+
+    def _insert_job(self, row: Dict[str, Any], queue_rows: List[Dict[str, Any]]) -> None:
+        self.db.table("email_send_jobs").insert(row, returning=ReturnMethod.minimal).execute()
+        chunk_size = settings.analytics_insert_chunk_size
+        for i in range(0, len(queue_rows), chunk_size):
+            self.db.table("email_send_queue")\
+                .insert(queue_rows[i:i + chunk_size], returning=ReturnMethod.minimal)\
+                .execute()
+
+    def _schedule(self, job: SendJob) -> SendJob:
+        """Start a drain task for a job unless this process is already draining it"""
+        existing = self._jobs.get(job.id)
+        if existing and existing.task and not existing.task.done():
+            return existing
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._drain(job))
+        return job
+
+    async def resume_unfinished_jobs(self) -> int:
+        """Pick up jobs interrupted by a restart (or left by other instances)"""
+        response = await asyncio.to_thread(
+            lambda: self.db.table("email_send_jobs")
+                .select("*")
+                .in_("status", ACTIVE_JOB_STATUSES)
+                .execute()
+        )
+        for row in response.data or []:
+            self._schedule(SendJob(row))
+        return len(response.data or [])
+
+    async def wait(self, job: SendJob, timeout: float = None) -> bool:
+        """Wait for a job to finish without cancelling it; returns False on timeout"""
+        if not job.task:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(job.task), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _drain(self, job: SendJob) -> None:
+        """Claim and send batches until no recipient is pending, waiting out retry backoff"""
+        started = time.monotonic()
+        try:
+            for attempt in range(1, settings.send_max_attempts + 1):
+                try:
+                    progress = await self._drain_once(job)
+                    break
+                except Exception as e:
+                    logger.error(f"Send job {job.id} interrupted (attempt {attempt}): {e}")
+                    if attempt == settings.send_max_attempts:
+                        await self._abandon(job, str(e))
+                        return
+                    # Recipients already claimed come back once their lease expires
+                    await asyncio.sleep(settings.send_retry_backoff_seconds)
+
+            await self._finish(job, progress)
+            logger.info(
+                f"Send job {job.id} for draft {job.draft_id}: {progress['sent']}/{job.total} sent via "
+                f"{job.method} in {time.monotonic() - started:.1f}s"
+            )
+        finally:
+            self._jobs.pop(job.id, None)
+
+    async def _drain_once(self, job: SendJob) -> Dict[str, Any]:
+        """Run workers until nothing is pending or leased; returns the final progress"""
+        await self._update_job(job.id, {"status": "sending"})
+        job.status = "sending"
+        while True:
+            workers = [self._drain_worker(job) for _ in range(settings.send_concurrency)]
+            await asyncio.gather(*workers)
+
+            progress = await self.get_progress(job.id)
+            if not progress["pending"] + progress["sending"]:
+                return progress
+
+            # Recipients are backing off or leased elsewhere; check again later
+            next_attempt = progress.get("next_attempt_at")
+            delay = settings.send_retry_backoff_seconds
+            if next_attempt:
+                delay = max(1.0, min(delay, (next_attempt - datetime.now(next_attempt.tzinfo)).total_seconds()))
+            await asyncio.sleep(delay)
+
+    async def _abandon(self, job: SendJob, error: str) -> None:
+        """Mark a job that keeps failing as failed instead of leaving it active"""
+        job.status = "failed"
+        job.finished_at = datetime.now()
+        job.errors.append(error)
+        try:
+            await self._update_job(job.id, {"status": "failed", "finished_at": job.finished_at.isoformat()})
+        except Exception as e:
+            # Still active in the database, so the next startup resumes it
+            logger.error(f"Could not mark send job {job.id} failed: {e}")
+
+    async def _drain_worker(self, job: SendJob) -> None:
+        """One concurrent worker: claim a batch, send it, record the outcome
+
+        Rate-limit capacity is taken before claiming, so a backed-up limiter can't
+        run a lease out and let another worker send the same rows again.
+        """
+        batch_size = self._batch_size(job.method)
+        limiter = self.rate_limiters.get(job.method)
+        # SendGrid is limited per request, SMTP per message
+        reserved = batch_size if job.method == "smtp" else 1
+        while True:
+            if limiter:
+                await limiter.acquire(reserved)
+            try:
+                claimed = await asyncio.to_thread(
+                    lambda: self.db.rpc("claim_email_send_batch", {
+                        "p_job_id": job.id,
+                        "p_worker": self.worker_id,
+                        "p_limit": batch_size,
+                        "p_lease_seconds": settings.send_claim_lease_seconds,
+                        "p_max_attempts": settings.send_max_attempts
+                    }).execute()
+                )
+            except BaseException:
+                if limiter:
+                    limiter.refund(reserved)
+                raise
+            rows = claimed.data or []
+            if limiter and job.method == "smtp":
+                limiter.refund(reserved - len(rows))
+            elif limiter and not rows:
+                limiter.refund(reserved)
+            if not rows:
+                return
+
+            batch = [{"email": row["recipient_email"], "token": row["token"]} for row in rows]
+            try:
+                result = await self._send_batch(job, batch)
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+
+            # Failures are reported by position in the batch, so duplicate addresses stay distinct
+            failed_positions = result.get("failed_indexes")
+            if failed_positions is None:
+                failed_positions = [] if result.get("success") else range(len(rows))
+            failed_positions = set(failed_positions)
+
+            sent_ids = [row["id"] for index, row in enumerate(rows) if index not in failed_positions]
+            failed_ids = [row["id"] for index, row in enumerate(rows) if index in failed_positions]
+            job.sent += len(sent_ids)
+            job.failed += len(failed_ids)
+            if result.get("error"):
+                job.errors.append(result["error"])
+
+            await asyncio.to_thread(
+                lambda: self.db.rpc("complete_email_send_batch", {
+                    "p_sent": sent_ids,
+                    "p_failed": failed_ids,
+                    "p_error": result.get("error"),
+                    "p_max_attempts": settings.send_max_attempts,
+                    "p_backoff_seconds": settings.send_retry_backoff_seconds
+                }).execute()
+            )
+
+    async def _send_batch(self, job: SendJob, batch: List[dict]) -> dict:
+        """Send one batch through the provider"""
+        if job.method == "sendgrid":
+            # The SendGrid client is blocking; keep it off the event loop
+            return await asyncio.to_thread(
+                self.email_service.send_sendgrid_batch_sync, batch, job.subject, job.html_content, job.draft_id
+            )
+        return await self.email_service.send_newsletter_with_tokens(
+            recipients_with_tokens=batch,
+            subject=job.subject,
+            html_content=job.html_content,
+            draft_id=job.draft_id,
+            use_sendgrid=False
+        )
+
+    async def _finish(self, job: SendJob, progress: Dict[str, Any]) -> None:
+        """Record the final job status and mark the draft sent if anyone received it"""
+        job.sent = progress["sent"]
+        job.failed = progress["failed"]
+        job.status = "completed" if not job.failed else ("partial" if job.sent else "failed")
+        job.finished_at = datetime.now()
+
+        await self._update_job(job.id, {"status": job.status, "finished_at": job.finished_at.isoformat()})
+        if job.sent:
+            await asyncio.to_thread(
+                lambda: self.db.table("drafts").update({
+                    "status": "sent",
+                    "sent_at": job.finished_at.isoformat()
+                }).eq("id", job.draft_id).execute()
+            )
+
+    async def _update_job(self, job_id: str, values: Dict[str, Any]) -> None:
+        values["updated_at"] = datetime.now().isoformat()
+        await asyncio.to_thread(
+            lambda: self.db.table("email_send_jobs").update(values).eq("id", job_id).execute()
+        )
+
+    async def get_progress(self, job_id: str) -> Dict[str, Any]:
+        """Recipient counts per status for a job, plus the earliest pending retry"""
+        response = await asyncio.to_thread(
+            lambda: self.db.rpc("get_email_send_progress", {"p_job_id": job_id}).execute()
+        )
+        progress: Dict[str, Any] = {"pending": 0, "sending": 0, "sent": 0, "failed": 0, "next_attempt_at": None}
+        for row in response.data or []:
+            progress[row["status"]] = row["recipients"]
+            if row["status"] == "pending" and row.get("next_attempt_at"):
+                progress["next_attempt_at"] = datetime.fromisoformat(row["next_attempt_at"].replace("Z", "+00:00"))
+        return progress
+
+    async def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Persisted job state and per-recipient progress"""
+        response = await asyncio.to_thread(
+            lambda: self.db.table("email_send_jobs")
+                .select("id, draft_id, user_id, method, status, total, created_at, finished_at")
+                .eq("id", job_id)
+                .execute()
+        )
+        if not response.data:
+            return None
+
+        job = response.data[0]
+        progress = await self.get_progress(job_id)
+        done = progress["sent"] + progress["failed"]
+        return {
+            "job_id": job["id"],
+            "draft_id": job["draft_id"],
+            "user_id": job["user_id"],
+            "status": job["status"],
+            "method": job["method"],
+            "total": job["total"],
+            "sent": progress["sent"],
+            "failed": progress["failed"],
+            "pending": progress["pending"] + progress["sending"],
+            "progress": round(done / job["total"], 3) if job["total"] else 1.0,
+            "next_retry_at": progress["next_attempt_at"].isoformat() if progress["next_attempt_at"] else None,
+            "created_at": job["created_at"],
+            "finished_at": job["finished_at"]
+        }
+
+    async def get_failed_recipients(self, job_id: str) -> List[str]:
+        response = await asyncio.to_thread(
+            lambda: self.db.table("email_send_queue")
+                .select("recipient_email")
+                .eq("job_id", job_id)
+                .eq("status", "failed")
+                .execute()
+        )
+        return [row["recipient_email"] for row in response.data or []]
+
+
+# Global pipeline so every request shares the rate limiters and drain tasks
+send_pipeline = SendPipeline()
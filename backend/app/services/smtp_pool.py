@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import queue
+import smtplib
+import threading
+import time
+from email.message import Message
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """Whether an error means the session is unusable (vs. a rejected message)"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        # 421: service not available, closing transmission channel
+        return error.smtp_code == 421
+    # SMTPException subclasses OSError, so check it before socket errors
+    return not isinstance(error, smtplib.SMTPException)
+
+
+class _PooledConnection:
+    """An authenticated SMTP session plus its usage counters"""
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Keeps up to N authenticated SMTP connections open and spreads sends across them
+
+    Connections are reused across messages and sends, recycled after
+    smtp_max_messages_per_connection messages, checked with NOOP after being
+    idle, and replaced transparently when the server drops them.
+    """
+
+    def __init__(
+        self,
+        host: str = None,
+        port: int = None,
+        username: str = None,
+        password: str = None,
+        size: int = None
+    ):
+        self.host = host if host is not None else settings.smtp_host
+        self.port = port if port is not None else settings.smtp_port
+        self.username = username if username is not None else settings.smtp_username
+        self.password = password if password is not None else settings.smtp_password
+        self.size = max(1, size or settings.smtp_pool_size)
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self.stats = {"connections_opened": 0, "reconnects": 0, "messages_sent": 0, "messages_failed": 0}
+        self._stats_lock = threading.Lock()
+
+    def _connect(self) -> _PooledConnection:
+        """Open, secure and authenticate a new SMTP connection"""
+        server = smtplib.SMTP(self.host, self.port, timeout=settings.smtp_timeout_seconds)
+        if settings.smtp_use_tls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        self._count("connections_opened")
+        return _PooledConnection(server)
+
+    def _close(self, connection: _PooledConnection) -> None:
+        try:
+            connection.server.quit()
+        except Exception:
+            connection.server.close()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _acquire(self) -> _PooledConnection:
+        """Take a slot plus an idle connection (verified if it sat idle) or a new one
+
+        The caller owns the slot until it hands the connection to _release or _discard.
+        """
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    connection = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+
+                if time.monotonic() - connection.last_used < settings.smtp_idle_check_seconds:
+                    return connection
+                try:
+                    if connection.server.noop()[0] == 250:
+                        return connection
+                except Exception:
+                    pass
+                self._close(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, connection: Optional[_PooledConnection]) -> None:
+        """Return a connection and its slot, retiring it once it hit the message limit"""
+        if connection is None:
+            return
+        try:
+            if connection.messages_sent >= settings.smtp_max_messages_per_connection:
+                self._close(connection)
+            else:
+                connection.last_used = time.monotonic()
+                self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    def _discard(self, connection: Optional[_PooledConnection]) -> None:
+        """Close a broken connection and free its slot"""
+        if connection is None:
+            return
+        try:
+            self._close(connection)
+        finally:
+            self._slots.release()
+
+    def _drain(self, pending: "queue.Queue[Tuple[int, Message]]", failures: Dict[int, str]) -> int:
+        """Send queued messages until the queue is empty
+
+        A connection slot is held only while a single message is being sent, so
+        workers of concurrent sends interleave instead of waiting for a whole batch.
+        """
+        sent = 0
+        while True:
+            try:
+                index, message = pending.get_nowait()
+            except queue.Empty:
+                return sent
+
+            for attempt in range(settings.smtp_max_retries + 1):
+                try:
+                    connection = self._acquire()
+                except Exception as e:
+                    # Leave the message for other workers; this one stops
+                    logger.error(f"SMTP connection failed: {e}")
+                    pending.put((index, message))
+                    return sent
+
+                try:
+                    connection.server.send_message(message)
+                except (smtplib.SMTPException, OSError) as e:
+                    if not _is_connection_error(e):
+                        # Rejected message (bad recipient, policy); the session is still usable
+                        self._release(connection)
+                        failures[index] = str(e)
+                        break
+                    # Dropped or broken session: replace it and retry this message
+                    self._discard(connection)
+                    self._count("reconnects")
+                    if attempt == settings.smtp_max_retries:
+                        failures[index] = str(e)
+                    continue
+                except BaseException:
+                    self._discard(connection)
+                    raise
+
+                connection.messages_sent += 1
+                sent += 1
+                self._release(connection)
+                break
+
+    def send_messages_sync(self, messages: List[Message]) -> Tuple[int, Dict[int, str]]:
+        """Send messages over up to `size` connections; returns (sent, {index: error})"""
+        pending: "queue.Queue[Tuple[int, Message]]" = queue.Queue()
+        for item in enumerate(messages):
+            pending.put(item)
+
+        failures: Dict[int, str] = {}
+        workers = min(self.size, len(messages))
+        results = [0] * workers
+
+        def run(slot: int):
+            results[slot] = self._drain(pending, failures)
+
+        threads = [threading.Thread(target=run, args=(slot,), daemon=True) for slot in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Anything still queued means every worker failed to connect
+        while not pending.empty():
+            index, _ = pending.get_nowait()
+            failures[index] = "Could not connect to SMTP server"
+
+        sent = sum(results)
+        self._count("messages_sent", sent)
+        self._count("messages_failed", len(failures))
+        return sent, failures
+
+    async def send_messages(self, messages: List[Message]) -> Tuple[int, Dict[int, str]]:
+        """Send messages without blocking the event loop"""
+        if not messages:
+            return 0, {}
+        return await asyncio.to_thread(self.send_messages_sync, messages)
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {"size": self.size, "idle_connections": self._idle.qsize(), **self.stats}
+
+    def close(self) -> None:
+        """Close all idle connections"""
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+# Global SMTP pool so connections persist across sends
+smtp_pool = SMTPConnectionPool()
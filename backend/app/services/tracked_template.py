@@ -0,0 +1,77 @@
+import html
+import re
+from functools import lru_cache
+from typing import List, Optional
+from urllib.parse import quote
+from app.config import settings
+
+
+_HREF_RE = re.compile(r'href="([^"]+)"')
+
+# Links left untouched by click tracking
+_UNTRACKED_PREFIXES = ('#', 'mailto:', 'tel:')
+
+_LINK_SLOT = 0
+_PIXEL_SLOT = 1
+
+
+class TrackedTemplate:
+    """Email HTML compiled once into static segments and per-recipient token slots
+
+    Click-tracking links and the open pixel are resolved at compile time; a
+    recipient's copy is produced by joining the segments with their token.
+    """
+
+    def __init__(self, html_content: str, draft_id: str, include_pixel: bool = True, api_base_url: str = None):
+        base_url = api_base_url or settings.api_base_url
+        self._segments: List[str] = []
+        self._slots: List[int] = []
+
+        position = 0
+        current = []
+        for match in _HREF_RE.finditer(html_content):
+            original_url = match.group(1)
+            if original_url.startswith(_UNTRACKED_PREFIXES):
+                continue
+
+            current.append(html_content[position:match.start()])
+            # Quote the target so its own query string survives inside ours
+            target = quote(html.unescape(original_url), safe="")
+            current.append(f'href="{base_url}/api/analytics/track/click/{draft_id}?url={target}')
+            self._close_segment(current, _LINK_SLOT)
+            current.append('"')
+            position = match.end()
+
+        current.append(html_content[position:])
+        if include_pixel:
+            current.append(f'<img src="{base_url}/api/analytics/track/open/{draft_id}')
+            self._close_segment(current, _PIXEL_SLOT)
+            current.append('" width="1" height="1" style="display:none;" alt="" />')
+
+        self._segments.append("".join(current))
+
+    def _close_segment(self, current: List[str], slot: int) -> None:
+        """End the static segment collected so far and add a token slot after it"""
+        self._segments.append("".join(current))
+        self._slots.append(slot)
+        current.clear()
+
+    def render(self, token: Optional[str] = None) -> str:
+        """HTML for one recipient; without a token the URLs carry no token parameter"""
+        if token:
+            token = quote(token, safe="")
+            values = (f"&token={token}", f"?token={token}")
+        else:
+            values = ("", "")
+
+        parts = [self._segments[0]]
+        for slot, segment in zip(self._slots, self._segments[1:]):
+            parts.append(values[slot])
+            parts.append(segment)
+        return "".join(parts)
+
+
+@lru_cache(maxsize=32)
+def compile_tracked_template(html_content: str, draft_id: str, include_pixel: bool = True) -> TrackedTemplate:
+    """Compiled template for a draft's HTML, shared across batches of the same send"""
+    return TrackedTemplate(html_content, draft_id, include_pixel)
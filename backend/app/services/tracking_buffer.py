@@ -0,0 +1,287 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.database import SupabaseDB
+
+logger = logging.getLogger(__name__)
+
+EventKey = Tuple[str, str, Optional[str], Optional[str], Optional[str]]
+
+# Relative spill directories resolve against backend/, not the working directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Per-worker spill files (tracking_events.<pid>.jsonl) and their .inflight/.orphan-* companions
+SPILL_FILE_PATTERN = re.compile(r"tracking_events\.(\d+)\.jsonl(\..+)?")
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether a process with this pid is running (always assumed on Windows)"""
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TrackingEventBuffer:
+    """Write-behind buffer for open/click tracking events
+
+    Tracking endpoints only append the event to memory and to a spill file;
+    a background task coalesces repeated events for the same recipient and
+    applies them in batched RPC calls every tracking_flush_interval_seconds
+    (or sooner once tracking_flush_max_events are waiting). Events in the
+    spill file survive a crash and are replayed on the next start.
+
+    A spill file allows only one writer. By default each worker process uses
+    its own file in tracking_spill_dir and, on start, takes over the files of
+    workers that are no longer running. An explicit spill_path must not be
+    shared between processes.
+    """
+
+    def __init__(self, spill_path: str = None):
+        self.db = SupabaseDB.get_service_client()
+        self._per_worker = spill_path is None
+        # Resolved on first use, in the worker process that writes it
+        self.spill_path = os.path.abspath(spill_path) if spill_path else None
+        self._events: Dict[EventKey, Dict[str, Any]] = {}
+        self._spill = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.stats = {"recorded": 0, "coalesced": 0, "flushed": 0, "flushes": 0, "flush_errors": 0, "recovered": 0}
+
+    def _ensure_spill_path(self) -> None:
+        if self.spill_path is None:
+            directory = settings.tracking_spill_dir
+            if not os.path.isabs(directory):
+                directory = os.path.join(BACKEND_DIR, directory)
+            self.spill_path = os.path.join(directory, f"tracking_events.{os.getpid()}.jsonl")
+
+    def _inflight_path(self) -> str:
+        return f"{self.spill_path}.inflight"
+
+    def _open_spill(self, mode: str = "a") -> None:
+        self._ensure_spill_path()
+        directory = os.path.dirname(self.spill_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._spill = open(self.spill_path, mode, encoding="utf-8")
+
+    @staticmethod
+    def _key(event: Dict[str, Any]) -> EventKey:
+        return (
+            event["event"], event["draft_id"], event.get("analytics_id"), event.get("token"), event.get("recipient_email")
+        )
+
+    def _add(self, event: Dict[str, Any]) -> None:
+        """Coalesce: one pending event per type and recipient, keeping the latest"""
+        key = self._key(event)
+        if key in self._events:
+            self.stats["coalesced"] += 1
+        self._events[key] = event
+
+    def record(
+        self,
+        event_type: str,
+        draft_id: str,
+        token: Optional[str] = None,
+        recipient_email: Optional[str] = None,
+        url: Optional[str] = None,
+        analytics_id: Optional[str] = None
+    ) -> bool:
+        """Queue an open or click; returns False for events that can never match a row
+
+        analytics_id comes from a verified tracking token and is applied by primary key;
+        token/recipient_email are only used to look up rows sent with legacy tokens.
+        """
+        if not (analytics_id or token or recipient_email):
+            return False
+        try:
+            uuid.UUID(draft_id)
+        except ValueError:
+            return False
+
+        event = {
+            "event": event_type,
+            "draft_id": draft_id,
+            "analytics_id": analytics_id,
+            "token": None if analytics_id else token,
+            "recipient_email": recipient_email,
+            "url": url,
+            "at": datetime.now().isoformat()
+        }
+        if self._spill is None:
+            self._open_spill()
+        self._spill.write(json.dumps(event) + "\n")
+        self._spill.flush()
+
+        self._add(event)
+        self.stats["recorded"] += 1
+        if self._wake and len(self._events) >= settings.tracking_flush_max_events:
+            self._wake.set()
+        return True
+
+    def _claim_orphans(self) -> List[str]:
+        """Take over spill files left by worker processes that are no longer running"""
+        directory = os.path.dirname(self.spill_path)
+        if not os.path.isdir(directory):
+            return []
+        claimed = []
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            match = SPILL_FILE_PATTERN.fullmatch(name)
+            if not match or path in (self.spill_path, self._inflight_path()):
+                continue
+            pid = int(match.group(1))
+            if pid == os.getpid():
+                # Left over from an earlier process that had our pid
+                claimed.append(path)
+                continue
+            if _process_alive(pid):
+                continue
+            claim = f"{self.spill_path}.orphan-{name}"
+            try:
+                # Atomic: when several workers start together only one gets each file
+                os.replace(path, claim)
+            except FileNotFoundError:
+                continue
+            claimed.append(claim)
+        return claimed
+
+    def _recover(self) -> None:
+        """Load events left by a previous process (or a failed flush)"""
+        self._ensure_spill_path()
+        claimed = self._claim_orphans() if self._per_worker else []
+        for path in (self._inflight_path(), self.spill_path, *claimed):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as spill:
+                for line in spill:
+                    try:
+                        self._add(json.loads(line))
+                        self.stats["recovered"] += 1
+                    except (ValueError, KeyError):
+                        # A torn last line from a crash mid-write
+                        continue
+
+        # Rewrite everything pending into a fresh spill file
+        self._open_spill("w")
+        for event in self._events.values():
+            self._spill.write(json.dumps(event) + "\n")
+        self._spill.flush()
+        for path in (self._inflight_path(), *claimed):
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def start(self) -> None:
+        """Replay spilled events and start the periodic flush"""
+        if self._task:
+            return
+        self._recover()
+        if self.stats["recovered"]:
+            logger.info(f"Recovered {self.stats['recovered']} spilled tracking events")
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write out anything still buffered"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._spill:
+            self._spill.close()
+            self._spill = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.tracking_flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # Keep flushing on later ticks; events stay buffered and spilled
+                logger.error(f"Tracking flush failed: {e}")
+
+    async def flush(self) -> int:
+        """Apply buffered events in batches; failed batches go back into the buffer"""
+        async with self._flush_lock:
+            if not self._events:
+                return 0
+
+            # Hand the pending events and their spill file to this flush; new events start a new file
+            if self._spill:
+                self._spill.close()
+                self._spill = None
+            if os.path.exists(self.spill_path):
+                os.replace(self.spill_path, self._inflight_path())
+            else:
+                # Spill file removed underneath us; rewrite the pending events so the
+                # inflight copy still covers this flush
+                with open(self._inflight_path(), "w", encoding="utf-8") as inflight:
+                    for event in self._events.values():
+                        inflight.write(json.dumps(event) + "\n")
+            self._open_spill()
+            events = list(self._events.values())
+            self._events = {}
+
+            started = time.perf_counter()
+            applied = 0
+            failed: List[Dict[str, Any]] = []
+            batch_size = settings.tracking_flush_batch_size
+            for i in range(0, len(events), batch_size):
+                batch = events[i:i + batch_size]
+                try:
+                    await asyncio.to_thread(
+                        lambda: self.db.rpc("apply_tracking_events", {"p_events": batch}).execute()
+                    )
+                    applied += len(batch)
+                except Exception as e:
+                    self.stats["flush_errors"] += 1
+                    logger.error(f"Failed to apply {len(batch)} tracking events: {e}")
+                    failed.extend(batch)
+
+            for event in failed:
+                # Keep newer events recorded during the flush
+                key = self._key(event)
+                if key not in self._events:
+                    self._events[key] = event
+                    self._spill.write(json.dumps(event) + "\n")
+            self._spill.flush()
+            if os.path.exists(self._inflight_path()):
+                os.remove(self._inflight_path())
+
+            self.stats["flushed"] += applied
+            self.stats["flushes"] += 1
+            logger.debug(f"Flushed {applied} tracking events in {time.perf_counter() - started:.3f}s")
+            return applied
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._events),
+            "running": self._task is not None,
+            "spill_path": self.spill_path,
+            **self.stats
+        }
+
+
+# Global buffer shared by the tracking endpoints
+tracking_buffer = TrackingEventBuffer()
@@ -0,0 +1,209 @@
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.config import settings
+from app.database import SupabaseDB
+from app.services.cache_service import cache_service
+from app.services.prompt_builder import PromptBuilder
+from app.services.relevance_scoring import centroid_similarity
+
+
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+_PARAGRAPH_SPLIT_RE = re.compile(r'\n\s*\n')
+_WORD_RE = re.compile(r"[A-Za-z0-9]+(?:'[A-Za-z]+)?")
+_LIST_LINE_RE = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+', re.MULTILINE)
+
+FIRST_PERSON = frozenset(["i", "me", "my", "mine", "i'm", "i've", "i'd", "i'll"])
+FIRST_PERSON_PLURAL = frozenset(["we", "us", "our", "ours", "we're", "we've", "we'll"])
+SECOND_PERSON = frozenset(["you", "your", "yours", "you're", "you've", "you'll"])
+
+# Voice training needs at least this many samples to be applied
+MIN_SAMPLES = 3
+
+
+class VoiceProfileService:
+    """Builds and serves per-user voice profiles derived from voice training samples
+
+    A profile holds stylometric features, a short style summary and the most
+    representative excerpts. It is recomputed when samples change, stored in
+    user_voice_profiles and cached in memory, so generation never reads raw samples.
+    """
+
+    def __init__(self):
+        self.db = SupabaseDB.get_service_client()
+        self.prompt_builder = PromptBuilder()
+
+    async def get_profile(self, user_id: str) -> Dict[str, Any]:
+        """Get a user's voice profile from memory, the database or by building it"""
+        profile = await cache_service.get_voice_profile(user_id, settings.voice_profile_cache_ttl_seconds)
+        if profile is not None:
+            return profile
+
+        result = self.db.table("user_voice_profiles")\
+            .select("*")\
+            .eq("user_id", user_id)\
+            .limit(1)\
+            .execute()
+
+        if result.data:
+            profile = result.data[0]
+        else:
+            # No stored profile yet (samples created before profiles existed)
+            profile = self.rebuild_profile(user_id)
+
+        await cache_service.set_voice_profile(user_id, profile, settings.voice_profile_cache_ttl_seconds)
+        return profile
+
+    def rebuild_profile(self, user_id: str) -> Dict[str, Any]:
+        """Recompute a user's profile from their samples and store it"""
+        cache_service.invalidate(user_id, "voice_profile")
+
+        result = self.db.table("user_voice_samples")\
+            .select("title, content")\
+            .eq("user_id", user_id)\
+            .order("created_at", desc=True)\
+            .limit(settings.voice_profile_max_samples)\
+            .execute()
+
+        profile = self.compute_profile(result.data or [])
+        profile["user_id"] = user_id
+        profile["updated_at"] = datetime.now().isoformat()
+
+        if profile["sample_count"]:
+            self.db.table("user_voice_profiles").upsert(profile, on_conflict="user_id").execute()
+        else:
+            self.db.table("user_voice_profiles").delete().eq("user_id", user_id).execute()
+
+        return profile
+
+    def compute_profile(self, samples: List[Dict]) -> Dict[str, Any]:
+        """Stylometric features, style summary and representative excerpts for samples"""
+        samples = [sample for sample in samples if (sample.get("content") or "").strip()]
+        if not samples:
+            return {"sample_count": 0, "features": {}, "style_summary": "", "excerpts": []}
+
+        features = self._compute_features([sample["content"] for sample in samples])
+        return {
+            "sample_count": len(samples),
+            "features": features,
+            "style_summary": self._summarize_style(features),
+            "excerpts": self._select_excerpts(samples)
+        }
+
+    def is_active(self, profile: Optional[Dict[str, Any]]) -> bool:
+        """Whether a profile has enough samples to drive generation"""
+        return bool(profile) and profile.get("sample_count", 0) >= MIN_SAMPLES
+
+    def _compute_features(self, texts: List[str]) -> Dict[str, float]:
+        """Sentence, word and register statistics over all sample texts"""
+        plain = [self.prompt_builder.clean_summary(text, strip_boilerplate=False) for text in texts]
+
+        sentences = [s for text in plain for s in _SENTENCE_SPLIT_RE.split(text) if _WORD_RE.search(s)]
+        sentence_words = np.array([len(_WORD_RE.findall(s)) for s in sentences] or [0], dtype=np.float64)
+
+        words = [word.lower() for text in plain for word in _WORD_RE.findall(text)]
+        word_count = max(len(words), 1)
+        word_lengths = np.array([len(word) for word in words] or [0], dtype=np.float64)
+
+        paragraphs = [p for text in texts for p in _PARAGRAPH_SPLIT_RE.split(text) if p.strip()]
+        per_hundred = 100.0 / word_count
+
+        # Type-token ratio over a fixed window so long samples are not penalized
+        window = words[:1000]
+
+        return {
+            "word_count": len(words),
+            "avg_sentence_words": round(float(sentence_words.mean()), 1),
+            "sentence_words_std": round(float(sentence_words.std()), 1),
+            "avg_word_length": round(float(word_lengths.mean()), 2),
+            "type_token_ratio": round(len(set(window)) / max(len(window), 1), 3),
+            "avg_paragraph_sentences": round(len(sentences) / max(len(paragraphs), 1), 1),
+            "question_rate": round(sum(s.rstrip().endswith("?") for s in sentences) / max(len(sentences), 1), 3),
+            "exclamation_rate": round(sum(s.rstrip().endswith("!") for s in sentences) / max(len(sentences), 1), 3),
+            "first_person_per_100": round(sum(w in FIRST_PERSON for w in words) * per_hundred, 2),
+            "first_person_plural_per_100": round(sum(w in FIRST_PERSON_PLURAL for w in words) * per_hundred, 2),
+            "second_person_per_100": round(sum(w in SECOND_PERSON for w in words) * per_hundred, 2),
+            "contractions_per_100": round(sum("'" in w for w in words) * per_hundred, 2),
+            "list_lines_per_sample": round(sum(len(_LIST_LINE_RE.findall(text)) for text in texts) / len(texts), 2)
+        }
+
+    def _summarize_style(self, features: Dict[str, float]) -> str:
+        """Turn stylometric features into a few plain-language style instructions"""
+        notes = []
+
+        avg_sentence = features["avg_sentence_words"]
+        if avg_sentence < 12:
+            length = "short, punchy"
+        elif avg_sentence > 22:
+            length = "long, detailed"
+        else:
+            length = "medium-length"
+        variety = " with varied rhythm" if features["sentence_words_std"] > avg_sentence * 0.5 else ""
+        notes.append(f"Sentences are {length} (about {avg_sentence:.0f} words){variety}.")
+
+        if features["avg_word_length"] < 4.5:
+            notes.append("Vocabulary is plain and everyday.")
+        elif features["avg_word_length"] > 5.3:
+            notes.append("Vocabulary is technical and precise.")
+
+        if features["avg_paragraph_sentences"] <= 2:
+            notes.append("Paragraphs are short, one or two sentences each.")
+        elif features["avg_paragraph_sentences"] >= 5:
+            notes.append("Paragraphs are long and developed.")
+
+        if features["first_person_per_100"] >= 1.5:
+            notes.append("Writes in the first person and shares personal views.")
+        elif features["first_person_plural_per_100"] >= 1.0:
+            notes.append("Uses an inclusive \"we\".")
+        if features["second_person_per_100"] >= 1.5:
+            notes.append("Addresses the reader directly as \"you\".")
+
+        if features["question_rate"] >= 0.1:
+            notes.append("Poses questions to the reader.")
+        if features["exclamation_rate"] >= 0.05:
+            notes.append("Uses exclamations for energy.")
+        notes.append(
+            "Uses contractions; relaxed register." if features["contractions_per_100"] >= 1.0
+            else "Avoids contractions; more formal register."
+        )
+        if features["list_lines_per_sample"] >= 2:
+            notes.append("Likes bulleted or numbered lists.")
+
+        return " ".join(notes)
+
+    def _select_excerpts(self, samples: List[Dict]) -> List[Dict[str, str]]:
+        """Pick the paragraphs closest to the user's overall vocabulary, from distinct samples"""
+        candidates = []
+        for sample in samples:
+            title = sample.get("title") or "Untitled"
+            for paragraph in _PARAGRAPH_SPLIT_RE.split(sample["content"]):
+                paragraph = paragraph.strip()
+                if len(_WORD_RE.findall(paragraph)) >= 25:
+                    candidates.append((title, paragraph))
+
+        if not candidates:
+            # Only short paragraphs; fall back to whole samples
+            candidates = [(sample.get("title") or "Untitled", sample["content"].strip()) for sample in samples]
+
+        similarity = centroid_similarity([paragraph for _, paragraph in candidates])
+
+        chosen = []
+        used_titles = set()
+        for index in np.argsort(-similarity, kind="stable"):
+            title, paragraph = candidates[index]
+            if title in used_titles:
+                continue
+            chosen.append({"title": title, "content": paragraph})
+            used_titles.add(title)
+            if len(chosen) >= settings.voice_profile_excerpt_count:
+                break
+
+        return [
+            {"title": title, "content": content}
+            for title, content in self.prompt_builder.select_voice_excerpts(chosen, max_samples=len(chosen))
+        ]
+
+
+# Global voice profile service instance
+voice_profile_service = VoiceProfileService()
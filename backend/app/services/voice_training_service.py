@@ -7,6 +7,7 @@ from app.models.voice_training import (
     VoiceSampleUpdate,
     VoiceTrainingStatus
 )
+from app.services.voice_profile_service import voice_profile_service
 import uuid
 
 
@@ -40,6 +41,8 @@ class VoiceTrainingService:
             print(f"Database error creating voice sample: {e}")
             raise Exception(f"Database error: {str(e)}")
         
+        self.refresh_voice_profile(user_id)
+        
         # Return the created sample
         return VoiceSampleResponse(
             id=sample_id,
@@ -125,6 +128,8 @@ class VoiceTrainingService:
         if not result.data:
             return None
         
+        self.refresh_voice_profile(user_id)
+        
         sample = result.data[0]
         return VoiceSampleResponse(
             id=sample["id"],
@@ -138,7 +143,8 @@ class VoiceTrainingService:
     def delete_voice_sample(
         self, 
         user_id: str, 
-        sample_id: str
+        sample_id: str,
+        refresh_profile: bool = True
     ) -> bool:
         """Delete a voice sample"""
         
@@ -148,7 +154,11 @@ class VoiceTrainingService:
             .eq("user_id", user_id)\
             .execute()
         
-        return len(result.data) > 0
+        deleted = len(result.data) > 0
+        if deleted and refresh_profile:
+            self.refresh_voice_profile(user_id)
+        
+        return deleted
     
     def get_voice_training_status(
         self, 
@@ -206,6 +216,8 @@ class VoiceTrainingService:
         if not result.data:
             raise Exception("Failed to create voice samples")
         
+        self.refresh_voice_profile(user_id)
+        
         # Return created samples
         return [
             VoiceSampleResponse(
@@ -218,3 +230,11 @@ class VoiceTrainingService:
             )
             for sample in result.data
         ]
+    
+    def refresh_voice_profile(self, user_id: str) -> None:
+        """Recompute the user's voice profile after their samples changed"""
+        try:
+            voice_profile_service.rebuild_profile(user_id)
+        except Exception as e:
+            # Sample changes are already saved; keep them even if the profile lags
+            print(f"Error rebuilding voice profile for user {user_id}: {e}")
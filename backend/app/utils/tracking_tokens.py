@@ -0,0 +1,75 @@
+"""
+Tracking token utilities
+Compact HMAC-signed tokens that carry the analytics row ID, so tracking hits
+can be verified and applied by primary key without a lookup query
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import struct
+import uuid
+from typing import Optional, Tuple
+from app.config import settings
+
+# analytics row UUID (16 bytes) + recipient index (4 bytes) + truncated HMAC
+_PAYLOAD = struct.Struct(">16sI")
+_SIGNATURE_BYTES = 10
+_TOKEN_BYTES = _PAYLOAD.size + _SIGNATURE_BYTES
+
+# Derived so tracking tokens can't be replayed as anything else signed with the app secret
+_SIGNING_KEY = hmac.new(settings.secret_key.encode(), b"creatorpulse-tracking-token", hashlib.sha256).digest()
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(_SIGNING_KEY, payload, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+
+
+def create_tracking_token(analytics_id: str, recipient_index: int) -> str:
+    """
+    Create a signed tracking token
+
+    Args:
+        analytics_id: ID of the recipient's analytics row
+        recipient_index: Position of the recipient in the send
+
+    Returns:
+        URL-safe token (40 characters)
+    """
+    payload = _PAYLOAD.pack(uuid.UUID(analytics_id).bytes, recipient_index)
+    return base64.urlsafe_b64encode(payload + _sign(payload)).decode().rstrip("=")
+
+
+def verify_tracking_token(token: str) -> Optional[Tuple[str, int]]:
+    """
+    Verify a signed tracking token
+
+    Args:
+        token: Token from a tracking URL
+
+    Returns:
+        (analytics_id, recipient_index), or None if the token is malformed or forged
+    """
+    if not token or len(token) != 40:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        return None
+    if len(raw) != _TOKEN_BYTES:
+        return None
+
+    payload, signature = raw[:_PAYLOAD.size], raw[_PAYLOAD.size:]
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    analytics_bytes, recipient_index = _PAYLOAD.unpack(payload)
+    return str(uuid.UUID(bytes=analytics_bytes)), recipient_index
+
+
+def is_legacy_token(token: str) -> bool:
+    """Whether a token is an unsigned UUID issued before signed tokens"""
+    try:
+        uuid.UUID(token)
+        return True
+    except (ValueError, TypeError, AttributeError):
+        return False
@@ -0,0 +1,239 @@
+"""
+Local email sinks
+An SMTP server and a SendGrid-compatible HTTP stub that accept and count mail without
+delivering it, with optional latency, recipient rejection and dropped connections.
+
+Usage:
+    python -m benchmarks.email_sink --smtp-port 2525 --sendgrid-port 8090 --latency-ms 5
+    SMTP_HOST=127.0.0.1 SMTP_PORT=2525 SMTP_USE_TLS=false uvicorn app.main:app --reload
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import time
+import uuid
+from aiohttp import web
+
+
+class EmailSinkConfig:
+    """Behaviour knobs for the sinks"""
+
+    def __init__(self, latency_ms: float = 0.0, reject_rate: float = 0.0, drop_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.reject_rate = reject_rate
+        self.drop_rate = drop_rate
+
+
+class SinkStats:
+    """Counters shared with the sink process"""
+
+    FIELDS = ("messages", "recipients", "bytes", "requests", "rejected", "dropped", "first_message_at")
+
+    def __init__(self):
+        self._values = {name: multiprocessing.Value("d", 0.0) for name in self.FIELDS}
+
+    def add(self, name: str, amount: float = 1.0) -> None:
+        value = self._values[name]
+        with value.get_lock():
+            value.value += amount
+
+    def mark_first_message(self) -> None:
+        value = self._values["first_message_at"]
+        with value.get_lock():
+            if not value.value:
+                value.value = time.time()
+
+    def reset(self) -> None:
+        for value in self._values.values():
+            with value.get_lock():
+                value.value = 0.0
+
+    def snapshot(self) -> dict:
+        return {name: value.value for name, value in self._values.items()}
+
+
+async def _handle_smtp(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, config: EmailSinkConfig, stats: SinkStats):
+    """One SMTP session: enough of RFC 5321 for smtplib (EHLO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT)"""
+    def reply(line: str):
+        writer.write(line.encode() + b"\r\n")
+
+    reply("220 creatorpulse-sink ESMTP")
+    recipients = 0
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            verb = line[:4].decode("latin-1").upper()
+
+            if verb == "EHLO":
+                reply("250-creatorpulse-sink")
+                reply("250-8BITMIME")
+                reply("250-AUTH PLAIN LOGIN")
+                reply("250 SIZE 52428800")
+            elif verb == "HELO":
+                reply("250 creatorpulse-sink")
+            elif verb == "AUTH":
+                reply("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                recipients = 0
+                reply("250 2.1.0 OK")
+            elif verb == "RCPT":
+                if random.random() < config.reject_rate:
+                    stats.add("rejected")
+                    reply("550 5.1.1 Mailbox unavailable")
+                else:
+                    recipients += 1
+                    reply("250 2.1.5 OK")
+            elif verb == "DATA":
+                if not recipients:
+                    reply("503 5.5.1 No valid recipients")
+                    continue
+                reply("354 End data with <CR><LF>.<CR><LF>")
+                await writer.drain()
+                size = 0
+                while True:
+                    data_line = await reader.readline()
+                    if not data_line or data_line == b".\r\n":
+                        break
+                    size += len(data_line)
+
+                if config.latency_ms:
+                    await asyncio.sleep(config.latency_ms / 1000.0)
+                if random.random() < config.drop_rate:
+                    stats.add("dropped")
+                    reply("421 4.4.2 Connection dropped")
+                    await writer.drain()
+                    break
+
+                stats.mark_first_message()
+                stats.add("messages")
+                stats.add("recipients", recipients)
+                stats.add("bytes", size)
+                recipients = 0
+                reply(f"250 2.0.0 OK {uuid.uuid4().hex}")
+            elif verb in ("RSET", "NOOP"):
+                recipients = 0 if verb == "RSET" else recipients
+                reply("250 2.0.0 OK")
+            elif verb == "QUIT":
+                reply("221 2.0.0 Bye")
+                await writer.drain()
+                break
+            else:
+                reply("502 5.5.2 Command not recognized")
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+def create_sendgrid_app(config: EmailSinkConfig, stats: SinkStats) -> web.Application:
+    """aiohttp application accepting SendGrid v3 /mail/send requests"""
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+
+    async def mail_send(request: web.Request) -> web.Response:
+        body = await request.read()
+        stats.add("requests")
+        if config.latency_ms:
+            await asyncio.sleep(config.latency_ms / 1000.0)
+        if random.random() < config.drop_rate:
+            stats.add("dropped")
+            return web.json_response({"errors": [{"message": "Injected failure"}]}, status=503)
+
+        payload = json.loads(body)
+        recipients = sum(len(p.get("to", [])) for p in payload.get("personalizations", []))
+        stats.mark_first_message()
+        stats.add("messages")
+        stats.add("recipients", recipients)
+        stats.add("bytes", len(body))
+        return web.Response(status=202, headers={"X-Message-Id": uuid.uuid4().hex})
+
+    app.router.add_post("/v3/mail/send", mail_send)
+    return app
+
+
+async def _serve(config: EmailSinkConfig, stats: SinkStats, host: str, smtp_port: int, sendgrid_port: int):
+    """Start both sinks; returns (smtp server, sendgrid runner, smtp port, sendgrid port)"""
+    smtp_server = await asyncio.start_server(
+        lambda reader, writer: _handle_smtp(reader, writer, config, stats), host, smtp_port
+    )
+    runner = web.AppRunner(create_sendgrid_app(config, stats), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, sendgrid_port)
+    await site.start()
+    return (
+        smtp_server,
+        runner,
+        smtp_server.sockets[0].getsockname()[1],
+        site._server.sockets[0].getsockname()[1]
+    )
+
+
+def _run_process(config: EmailSinkConfig, stats: SinkStats, host: str, ports: multiprocessing.Queue):
+    async def main():
+        smtp_server, runner, smtp_port, sendgrid_port = await _serve(config, stats, host, 0, 0)
+        ports.put((smtp_port, sendgrid_port))
+        async with smtp_server:
+            await smtp_server.serve_forever()
+
+    asyncio.run(main())
+
+
+def start_sinks_in_process(config: EmailSinkConfig, host: str = "127.0.0.1"):
+    """Run both sinks in a child process; returns (stop, smtp_port, sendgrid_url, stats)
+
+    A separate process keeps the sinks' CPU out of the sender's measurements.
+    """
+    stats = SinkStats()
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_process, args=(config, stats, host, ports), daemon=True)
+    process.start()
+    smtp_port, sendgrid_port = ports.get(timeout=30)
+
+    def stop():
+        process.terminate()
+        process.join()
+
+    return stop, smtp_port, f"http://{host}:{sendgrid_port}", stats
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the sink behaviour flags on a parser"""
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before accepting each message/request")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Fraction of SMTP recipients rejected with 550")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of messages answered 421 (SMTP) or 503 (SendGrid)")
+
+
+def config_from_args(args: argparse.Namespace) -> EmailSinkConfig:
+    """Build an EmailSinkConfig from parsed arguments"""
+    return EmailSinkConfig(latency_ms=args.latency_ms, reject_rate=args.reject_rate, drop_rate=args.drop_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SMTP sink and SendGrid stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--smtp-port", type=int, default=2525)
+    parser.add_argument("--sendgrid-port", type=int, default=8090)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    stats = SinkStats()
+
+    async def serve():
+        smtp_server, runner, smtp_port, sendgrid_port = await _serve(
+            config_from_args(args), stats, args.host, args.smtp_port, args.sendgrid_port
+        )
+        print(f"[EMAIL SINK] SMTP on {args.host}:{smtp_port}, SendGrid stub on http://{args.host}:{sendgrid_port}")
+        async with smtp_server:
+            await smtp_server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print(f"[EMAIL SINK] {stats.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
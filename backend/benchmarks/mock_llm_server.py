@@ -0,0 +1,211 @@
+"""
+Mock OpenAI-compatible LLM server
+Serves /v1/chat/completions with configurable latency, token rate and failure injection
+so the draft generation path can be exercised without calling OpenRouter.
+
+Usage:
+    python -m benchmarks.mock_llm_server --port 8089 --latency-ms 800 --tokens-per-second 60
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+import uuid
+from aiohttp import web
+
+
+# Marker so benchmarks can tell mock output apart from AIService fallback content
+MOCK_MARKER = "<!-- mock-llm -->"
+
+MOCK_DRAFT_HTML = MOCK_MARKER + """
+<div class="draft-intro">
+    <h2>This Week in Review</h2>
+    <p>A fast-moving week across the industry, with new releases, funding rounds and policy shifts worth your attention.</p>
+</div>
+<div class="draft-insight">
+    <h3>Open models close the gap</h3>
+    <p>Several open-weight releases now match last year's frontier results on common benchmarks, at a fraction of the serving cost.</p>
+</div>
+<div class="draft-insight">
+    <h3>Infrastructure spending keeps climbing</h3>
+    <p>Cloud providers reported another quarter of record capital expenditure, most of it earmarked for accelerators.</p>
+</div>
+<div class="draft-insight">
+    <h3>Regulators sharpen their focus</h3>
+    <p>New guidance on model transparency arrived on both sides of the Atlantic, with compliance deadlines next year.</p>
+</div>
+<div class="draft-trends">
+    <h3>Trends to Watch</h3>
+    <ul>
+        <li>Smaller, specialised models in production</li>
+        <li>Agent frameworks moving into enterprise pilots</li>
+        <li>Energy costs shaping data-centre location</li>
+    </ul>
+</div>
+"""
+
+
+class MockLLMConfig:
+    """Behaviour knobs for the mock server"""
+
+    def __init__(
+        self,
+        latency_ms: float = 500.0,
+        jitter_ms: float = 100.0,
+        tokens_per_second: float = 0.0,
+        completion_tokens: int = 400,
+        failure_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        hang_seconds: float = 60.0
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+
+
+def create_app(config: MockLLMConfig) -> web.Application:
+    """Build the aiohttp application serving the OpenAI chat completions API"""
+    app = web.Application()
+    app["config"] = config
+    app["stats"] = {"requests": 0, "failures": 0, "hangs": 0}
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        cfg: MockLLMConfig = request.app["config"]
+        stats = request.app["stats"]
+        stats["requests"] += 1
+        body = await request.json()
+
+        roll = random.random()
+        if roll < cfg.failure_rate:
+            stats["failures"] += 1
+            await asyncio.sleep(cfg.latency_ms / 1000.0 / 4)
+            return web.json_response(
+                {"error": {"message": "Injected upstream failure", "code": 502}},
+                status=502
+            )
+        if roll < cfg.failure_rate + cfg.hang_rate:
+            stats["hangs"] += 1
+            await asyncio.sleep(cfg.hang_seconds)
+
+        # Time to first token plus generation time at the configured token rate
+        delay = max(0.0, random.gauss(cfg.latency_ms, cfg.jitter_ms)) / 1000.0
+        if cfg.tokens_per_second > 0:
+            delay += cfg.completion_tokens / cfg.tokens_per_second
+        await asyncio.sleep(delay)
+
+        n = int(body.get("n") or 1)
+        prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+        return web.json_response({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [
+                {
+                    "index": i,
+                    "message": {"role": "assistant", "content": MOCK_DRAFT_HTML},
+                    "finish_reason": "stop"
+                }
+                for i in range(n)
+            ],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": cfg.completion_tokens * n,
+                "total_tokens": prompt_chars // 4 + cfg.completion_tokens * n
+            }
+        })
+
+    async def stats_handler(request: web.Request) -> web.Response:
+        return web.json_response(request.app["stats"])
+
+    # Accept both the OpenAI and OpenRouter path layouts
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/api/v1/chat/completions", chat_completions)
+    app.router.add_get("/stats", stats_handler)
+    return app
+
+
+def start_app_in_thread(app: web.Application, host: str = "127.0.0.1", port: int = 0, name: str = "mock-server"):
+    """Run an aiohttp app on its own event loop thread; returns (stop, port)
+
+    A separate loop keeps the server responsive even when the code under test
+    makes blocking calls on the caller's loop (the Supabase client does).
+    """
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def start():
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        state["runner"] = runner
+        state["port"] = site._server.sockets[0].getsockname()[1]
+        ready.set()
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(start())
+        loop.run_forever()
+
+    thread = threading.Thread(target=serve, name=name, daemon=True)
+    thread.start()
+    ready.wait()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(state["runner"].cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    return stop, state["port"]
+
+
+def start_server_in_thread(config: MockLLMConfig, host: str = "127.0.0.1", port: int = 0):
+    """Run the mock LLM server on its own event loop thread; returns (stop, base_url)"""
+    stop, port = start_app_in_thread(create_app(config), host, port, name="mock-llm-server")
+    return stop, f"http://{host}:{port}/v1"
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the mock behaviour flags on a parser"""
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Mean time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Std deviation of latency")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Generation rate (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=400, help="Tokens per completion")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 502")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of requests that stall")
+    parser.add_argument("--hang-seconds", type=float, default=60.0, help="How long stalled requests take")
+
+
+def config_from_args(args: argparse.Namespace) -> MockLLMConfig:
+    """Build a MockLLMConfig from parsed arguments"""
+    return MockLLMConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        failure_rate=args.failure_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"[MOCK LLM] Serving on http://{args.host}:{args.port}/v1")
+    web.run_app(create_app(config_from_args(args)), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
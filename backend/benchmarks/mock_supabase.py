@@ -0,0 +1,62 @@
+"""
+Mock Supabase REST (PostgREST) server
+Answers the handful of table queries the draft generation path makes (bundles, voice
+profiles, draft inserts) from in-memory fixtures, so DraftGeneratorService can run
+unmodified in benchmarks without a database.
+"""
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from aiohttp import web
+
+from benchmarks.mock_llm_server import start_app_in_thread
+
+
+def _eq_filter(request: web.Request, column: str):
+    """Value of a `column=eq.<value>` query filter, if present"""
+    value = request.query.get(column, "")
+    return value[3:] if value.startswith("eq.") else None
+
+
+def create_app(bundles: Dict[str, Dict[str, Any]], voice_profiles: Dict[str, Dict[str, Any]]) -> web.Application:
+    """aiohttp application serving bundles and voice profiles, and accepting draft inserts"""
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app["stats"] = {"requests": 0, "drafts_inserted": 0}
+
+    async def table(request: web.Request) -> web.Response:
+        app["stats"]["requests"] += 1
+        name = request.match_info["table"]
+        rows: List[Dict[str, Any]] = []
+
+        if request.method == "POST":
+            payload = json.loads(await request.read())
+            now = datetime.now(timezone.utc).isoformat()
+            for row in payload if isinstance(payload, list) else [payload]:
+                rows.append({"id": str(uuid.uuid4()), "created_at": now, "updated_at": now, **row})
+            if name == "drafts":
+                app["stats"]["drafts_inserted"] += len(rows)
+            return web.json_response(rows, status=201)
+
+        if request.method == "GET":
+            if name == "bundles":
+                bundle = bundles.get(_eq_filter(request, "id"))
+                rows = [bundle] if bundle else []
+            elif name == "user_voice_profiles":
+                profile = voice_profiles.get(_eq_filter(request, "user_id"))
+                rows = [profile] if profile else []
+        return web.json_response(rows)
+
+    async def stats_handler(request: web.Request) -> web.Response:
+        return web.json_response(app["stats"])
+
+    app.router.add_route("*", "/rest/v1/{table}", table)
+    app.router.add_get("/stats", stats_handler)
+    return app
+
+
+def start_server_in_thread(bundles: Dict[str, Dict[str, Any]], voice_profiles: Dict[str, Dict[str, Any]], host: str = "127.0.0.1"):
+    """Run the mock on its own event loop thread; returns (stop, supabase_url, stats)"""
+    app = create_app(bundles, voice_profiles)
+    stop, port = start_app_in_thread(app, host, 0, name="mock-supabase")
+    return stop, f"http://{host}:{port}", app["stats"]
@@ -0,0 +1,141 @@
+"""
+Email send throughput benchmark
+Renders a newsletter once, then sends it to synthetic recipients through EmailService's
+SMTP (pooled connections) and/or SendGrid (batched personalizations) paths against the
+local email sinks. Reports messages/sec, CPU per message, peak memory and time to first
+send for each audience size. Nothing leaves the machine.
+
+Usage (from backend/):
+    python -m benchmarks.send_throughput --sizes 1000,10000,100000 --provider smtp
+"""
+import argparse
+import asyncio
+import os
+import resource
+import time
+import uuid
+from typing import Dict, List
+
+from benchmarks.email_sink import add_config_arguments, config_from_args, start_sinks_in_process
+from benchmarks.mock_llm_server import MOCK_DRAFT_HTML
+
+# Settings are read at import time; give the app harmless local defaults
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "bench.bench.bench")
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ENCRYPTION_KEY", "bench")
+
+
+def synthetic_recipients(count: int) -> List[dict]:
+    return [{"email": f"reader{i}@bench.local", "token": uuid.uuid4().hex} for i in range(count)]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+async def run_send(email_service, provider: str, recipients: List[dict], html_content: str, concurrency: int) -> Dict[str, int]:
+    """Send to every recipient in provider-sized batches, `concurrency` batches at a time"""
+    from app.config import settings
+
+    batch_size = settings.sendgrid_personalizations_per_request if provider == "sendgrid" else settings.smtp_batch_size
+    semaphore = asyncio.Semaphore(concurrency)
+    outcome = {"sent": 0, "failed": 0}
+
+    async def send_batch(batch: List[dict]):
+        async with semaphore:
+            if provider == "sendgrid":
+                result = await asyncio.to_thread(
+                    email_service.send_sendgrid_batch_sync, batch, "Benchmark newsletter", html_content, "bench-draft"
+                )
+            else:
+                result = await email_service.send_newsletter_with_tokens(
+                    recipients_with_tokens=batch,
+                    subject="Benchmark newsletter",
+                    html_content=html_content,
+                    draft_id="bench-draft",
+                    use_sendgrid=False
+                )
+            failed_recipients = result.get("failed_recipients")
+            if failed_recipients is None:
+                failed_recipients = [] if result.get("success") else batch
+            outcome["failed"] += len(failed_recipients)
+            outcome["sent"] += len(batch) - len(failed_recipients)
+
+    await asyncio.gather(*(
+        send_batch(recipients[i:i + batch_size]) for i in range(0, len(recipients), batch_size)
+    ))
+    return outcome
+
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+    stop_sinks, smtp_port, sendgrid_url, sink_stats = start_sinks_in_process(config_from_args(args))
+    os.environ["SMTP_HOST"] = "127.0.0.1"
+    os.environ["SMTP_PORT"] = str(smtp_port)
+    os.environ["SMTP_USE_TLS"] = "false"
+    os.environ["SMTP_USERNAME"] = ""
+    os.environ["SENDGRID_API_KEY"] = "bench"
+    os.environ["SENDGRID_API_HOST"] = sendgrid_url
+
+    # Import after the environment points at the sinks
+    from app.config import settings
+    from app.services.email_service import EmailService
+    from app.services.email_template_service import EmailTemplateService
+    from app.services.smtp_pool import smtp_pool
+
+    email_service = EmailService()
+    html_content = EmailTemplateService().generate_newsletter_html(
+        draft_content=MOCK_DRAFT_HTML,
+        bundle_name="Benchmark Bundle",
+        bundle_color="#3B82F6",
+        entries=[],
+        include_images=True
+    )
+    providers = ["smtp", "sendgrid"] if args.provider == "both" else [args.provider]
+    concurrency = args.concurrency or settings.send_concurrency
+    print(
+        f"[BENCH] sizes {args.sizes}, providers {providers}, concurrency {concurrency}, "
+        f"SMTP pool {settings.smtp_pool_size}, html {len(html_content.encode()) / 1024:.1f} KB"
+    )
+
+    print(
+        f"\n{'provider':<9} {'recipients':>10} {'sent':>8} {'failed':>7} {'msgs/s':>9} "
+        f"{'cpu ms/msg':>11} {'peak MB':>8} {'first ms':>9} {'wire MB':>8}"
+    )
+    for provider in providers:
+        for size in (int(value) for value in args.sizes.split(",")):
+            recipients = synthetic_recipients(size)
+            sink_stats.reset()
+
+            wall_start = time.time()
+            cpu_start = time.process_time()
+            outcome = await run_send(email_service, provider, recipients, html_content, concurrency)
+            cpu = time.process_time() - cpu_start
+            wall = time.time() - wall_start
+
+            stats = sink_stats.snapshot()
+            first_ms = (stats["first_message_at"] - wall_start) * 1000 if stats["first_message_at"] else 0.0
+            print(
+                f"{provider:<9} {size:>10} {outcome['sent']:>8} {outcome['failed']:>7} {outcome['sent'] / wall:>9.0f} "
+                f"{cpu / max(size, 1) * 1000:>11.3f} {peak_rss_mb():>8.0f} {first_ms:>9.1f} {stats['bytes'] / 1048576:>8.1f}"
+            )
+
+    print(f"\nsmtp pool: {smtp_pool.get_metrics()}")
+    smtp_pool.close()
+    stop_sinks()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark email send throughput against local sinks")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated recipient counts")
+    parser.add_argument("--provider", choices=["smtp", "sendgrid", "both"], default="smtp")
+    parser.add_argument("--concurrency", type=int, default=0, help="Concurrent batches (default: send_concurrency)")
+    add_config_arguments(parser)
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+-- Migration: Store drafts as a structured section document
+-- content_sections holds the draft's current sections (intro, insights, trends, ...) as JSON.
+-- Rendering and section regeneration read it directly; edited_html is serialized from it.
+-- Drafts without it are parsed from their HTML on read.
+
+ALTER TABLE drafts ADD COLUMN IF NOT EXISTS content_sections JSONB;
+
+COMMENT ON COLUMN drafts.content_sections IS 'Canonical section document: [{kind, inner_html, text, title, paragraph, summary, items, parent}]';
@@ -0,0 +1,150 @@
+-- Migration: Per-draft engagement counters
+-- Draft and dashboard analytics used to read every recipient row of a draft and count in
+-- the API. Counters are now kept per draft by statement-level triggers on analytics, so a
+-- batched insert or a batched tracking update adjusts each draft's row once, and reads
+-- are a primary-key lookup.
+
+CREATE TABLE IF NOT EXISTS draft_engagement_counters (
+    draft_id UUID PRIMARY KEY REFERENCES drafts(id) ON DELETE CASCADE,
+    sent INTEGER NOT NULL DEFAULT 0,
+    unique_opens INTEGER NOT NULL DEFAULT 0,
+    unique_clicks INTEGER NOT NULL DEFAULT 0,
+    first_sent_at TIMESTAMP WITH TIME ZONE,
+    last_event_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE draft_engagement_counters ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view counters of their own drafts" ON draft_engagement_counters
+    FOR SELECT USING (
+        EXISTS (SELECT 1 FROM drafts d WHERE d.id = draft_id AND d.user_id = auth.uid())
+    );
+
+-- New recipient rows (one statement per insert chunk)
+CREATE OR REPLACE FUNCTION draft_engagement_counters_on_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO draft_engagement_counters AS c
+        (draft_id, sent, unique_opens, unique_clicks, first_sent_at, last_event_at)
+    SELECT n.draft_id,
+           COUNT(*),
+           COUNT(n.opened_at),
+           COUNT(n.clicked_at),
+           MIN(n.sent_at),
+           GREATEST(MAX(n.opened_at), MAX(n.clicked_at))
+    FROM new_rows n
+    WHERE n.draft_id IS NOT NULL
+    GROUP BY n.draft_id
+    ON CONFLICT (draft_id) DO UPDATE SET
+        sent = c.sent + EXCLUDED.sent,
+        unique_opens = c.unique_opens + EXCLUDED.unique_opens,
+        unique_clicks = c.unique_clicks + EXCLUDED.unique_clicks,
+        first_sent_at = LEAST(c.first_sent_at, EXCLUDED.first_sent_at),
+        last_event_at = GREATEST(c.last_event_at, EXCLUDED.last_event_at),
+        updated_at = NOW();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Opens/clicks applied by apply_tracking_events; only first opens/clicks change the unique counts
+CREATE OR REPLACE FUNCTION draft_engagement_counters_on_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO draft_engagement_counters AS c
+        (draft_id, unique_opens, unique_clicks, last_event_at)
+    SELECT n.draft_id,
+           COUNT(*) FILTER (WHERE n.opened_at IS NOT NULL AND o.opened_at IS NULL)
+               - COUNT(*) FILTER (WHERE n.opened_at IS NULL AND o.opened_at IS NOT NULL),
+           COUNT(*) FILTER (WHERE n.clicked_at IS NOT NULL AND o.clicked_at IS NULL)
+               - COUNT(*) FILTER (WHERE n.clicked_at IS NULL AND o.clicked_at IS NOT NULL),
+           GREATEST(MAX(n.opened_at), MAX(n.clicked_at))
+    FROM new_rows n
+    JOIN old_rows o ON o.id = n.id
+    WHERE n.draft_id IS NOT NULL
+      AND (n.opened_at IS DISTINCT FROM o.opened_at OR n.clicked_at IS DISTINCT FROM o.clicked_at)
+    GROUP BY n.draft_id
+    ON CONFLICT (draft_id) DO UPDATE SET
+        unique_opens = c.unique_opens + EXCLUDED.unique_opens,
+        unique_clicks = c.unique_clicks + EXCLUDED.unique_clicks,
+        last_event_at = GREATEST(c.last_event_at, EXCLUDED.last_event_at),
+        updated_at = NOW();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Removed recipient rows; a plain UPDATE so cascades from a deleted draft are a no-op
+CREATE OR REPLACE FUNCTION draft_engagement_counters_on_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE draft_engagement_counters c
+    SET sent = c.sent - d.sent,
+        unique_opens = c.unique_opens - d.opens,
+        unique_clicks = c.unique_clicks - d.clicks,
+        updated_at = NOW()
+    FROM (
+        SELECT draft_id, COUNT(*) AS sent, COUNT(opened_at) AS opens, COUNT(clicked_at) AS clicks
+        FROM old_rows
+        GROUP BY draft_id
+    ) d
+    WHERE c.draft_id = d.draft_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS analytics_counters_insert ON analytics;
+CREATE TRIGGER analytics_counters_insert AFTER INSERT ON analytics
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION draft_engagement_counters_on_insert();
+
+DROP TRIGGER IF EXISTS analytics_counters_update ON analytics;
+CREATE TRIGGER analytics_counters_update AFTER UPDATE ON analytics
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION draft_engagement_counters_on_update();
+
+DROP TRIGGER IF EXISTS analytics_counters_delete ON analytics;
+CREATE TRIGGER analytics_counters_delete AFTER DELETE ON analytics
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION draft_engagement_counters_on_delete();
+
+-- Backfill from existing recipient rows
+INSERT INTO draft_engagement_counters
+    (draft_id, sent, unique_opens, unique_clicks, first_sent_at, last_event_at)
+SELECT draft_id,
+       COUNT(*),
+       COUNT(opened_at),
+       COUNT(clicked_at),
+       MIN(sent_at),
+       GREATEST(MAX(opened_at), MAX(clicked_at))
+FROM analytics
+WHERE draft_id IS NOT NULL
+GROUP BY draft_id
+ON CONFLICT (draft_id) DO UPDATE SET
+    sent = EXCLUDED.sent,
+    unique_opens = EXCLUDED.unique_opens,
+    unique_clicks = EXCLUDED.unique_clicks,
+    first_sent_at = EXCLUDED.first_sent_at,
+    last_event_at = EXCLUDED.last_event_at,
+    updated_at = NOW();
+
+-- Dashboard summary now sums the counters instead of scanning recipient rows
+CREATE OR REPLACE FUNCTION get_user_analytics_summary(p_user_id UUID)
+RETURNS TABLE(
+    total_drafts BIGINT,
+    total_sent BIGINT,
+    total_emails_sent BIGINT,
+    total_opened BIGINT,
+    total_clicked BIGINT
+) AS $$
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE d.status = 'sent'),
+        COALESCE(SUM(c.sent), 0),
+        COALESCE(SUM(c.unique_opens), 0),
+        COALESCE(SUM(c.unique_clicks), 0)
+    FROM drafts d
+    LEFT JOIN draft_engagement_counters c ON c.draft_id = d.id
+    WHERE d.user_id = p_user_id;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON TABLE draft_engagement_counters IS 'Per-draft sent/unique open/unique click counts maintained by triggers on analytics';
@@ -0,0 +1,113 @@
+-- Migration: Durable outbound email queue
+-- Each send is a job plus one queue row per recipient. API workers claim batches with
+-- a lease (FOR UPDATE SKIP LOCKED), so several instances can drain a job and rows held
+-- by a crashed worker are picked up again once their lease expires.
+
+CREATE TABLE IF NOT EXISTS email_send_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    draft_id UUID REFERENCES drafts(id) ON DELETE CASCADE,
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    subject TEXT NOT NULL,
+    html_content TEXT NOT NULL,
+    method TEXT NOT NULL DEFAULT 'smtp',
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'sending', 'completed', 'partial', 'failed')),
+    total INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS email_send_queue (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    job_id UUID NOT NULL REFERENCES email_send_jobs(id) ON DELETE CASCADE,
+    analytics_id UUID,
+    recipient_email TEXT NOT NULL,
+    token TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'sending', 'sent', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    locked_by TEXT,
+    locked_until TIMESTAMP WITH TIME ZONE,
+    last_error TEXT,
+    sent_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_email_send_jobs_status ON email_send_jobs(status) WHERE status IN ('queued', 'sending');
+CREATE INDEX IF NOT EXISTS idx_email_send_queue_claim ON email_send_queue(job_id, status, next_attempt_at);
+
+ALTER TABLE email_send_jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE email_send_queue ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own send jobs" ON email_send_jobs
+    FOR SELECT USING (auth.uid() = user_id);
+
+-- Claim up to p_limit due recipients of a job for p_worker
+CREATE OR REPLACE FUNCTION claim_email_send_batch(
+    p_job_id UUID,
+    p_worker TEXT,
+    p_limit INTEGER,
+    p_lease_seconds INTEGER
+)
+RETURNS SETOF email_send_queue AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE email_send_queue q
+    SET status = 'sending',
+        locked_by = p_worker,
+        locked_until = NOW() + make_interval(secs => p_lease_seconds),
+        attempts = q.attempts + 1,
+        updated_at = NOW()
+    WHERE q.id IN (
+        SELECT id FROM email_send_queue
+        WHERE job_id = p_job_id
+          AND (
+              (status = 'pending' AND next_attempt_at <= NOW())
+              OR (status = 'sending' AND locked_until < NOW())
+          )
+        ORDER BY created_at, id
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING q.*;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Record a batch outcome: sent rows are done, failed rows back off exponentially
+-- until they run out of attempts
+CREATE OR REPLACE FUNCTION complete_email_send_batch(
+    p_sent UUID[],
+    p_failed UUID[],
+    p_error TEXT,
+    p_max_attempts INTEGER,
+    p_backoff_seconds INTEGER
+)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE email_send_queue
+    SET status = 'sent', sent_at = NOW(), locked_by = NULL, locked_until = NULL, updated_at = NOW()
+    WHERE id = ANY(p_sent);
+
+    UPDATE email_send_queue
+    SET status = CASE WHEN attempts >= p_max_attempts THEN 'failed' ELSE 'pending' END,
+        next_attempt_at = NOW() + make_interval(secs => p_backoff_seconds * power(2, attempts - 1)),
+        last_error = p_error,
+        locked_by = NULL,
+        locked_until = NULL,
+        updated_at = NOW()
+    WHERE id = ANY(p_failed);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recipient counts per status, with the earliest retry time
+CREATE OR REPLACE FUNCTION get_email_send_progress(p_job_id UUID)
+RETURNS TABLE(status TEXT, recipients BIGINT, next_attempt_at TIMESTAMP WITH TIME ZONE) AS $$
+    SELECT q.status, COUNT(*), MIN(q.next_attempt_at)
+    FROM email_send_queue q
+    WHERE q.job_id = p_job_id
+    GROUP BY q.status;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON TABLE email_send_jobs IS 'Newsletter sends; content is kept so interrupted sends can resume';
+COMMENT ON TABLE email_send_queue IS 'Per-recipient send state (pending/sending/sent/failed) with attempts and lease';
@@ -0,0 +1,133 @@
+-- Migration: Engagement time-series rollups
+-- Opens and clicks are counted per hour for each draft and each user as tracking events are
+-- applied (statement-level trigger on analytics, one upsert per bucket per batch).
+-- compact_engagement_rollups folds hourly rows older than the retention window into daily
+-- rows, so a timeline read is bounded by the number of buckets, not by sends or recipients.
+
+CREATE TABLE IF NOT EXISTS engagement_rollups (
+    scope TEXT NOT NULL CHECK (scope IN ('draft', 'user')),
+    scope_id UUID NOT NULL,
+    bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+    granularity TEXT NOT NULL CHECK (granularity IN ('hour', 'day')),
+    opens INTEGER NOT NULL DEFAULT 0,
+    clicks INTEGER NOT NULL DEFAULT 0,
+    unique_opens INTEGER NOT NULL DEFAULT 0,
+    unique_clicks INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, scope_id, bucket, granularity)
+);
+
+CREATE INDEX IF NOT EXISTS idx_engagement_rollups_compaction ON engagement_rollups(bucket) WHERE granularity = 'hour';
+
+ALTER TABLE engagement_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own engagement rollups" ON engagement_rollups
+    FOR SELECT USING (scope = 'user' AND scope_id = auth.uid());
+
+-- Every change of opened_at/clicked_at is an open/click at that time; a first one is also unique
+CREATE OR REPLACE FUNCTION engagement_rollups_on_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    WITH changes AS (
+        SELECT n.draft_id, d.user_id, 'open' AS event, n.opened_at AS at, o.opened_at IS NULL AS is_first
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        JOIN drafts d ON d.id = n.draft_id
+        WHERE n.opened_at IS NOT NULL AND n.opened_at IS DISTINCT FROM o.opened_at
+        UNION ALL
+        SELECT n.draft_id, d.user_id, 'click', n.clicked_at, o.clicked_at IS NULL
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        JOIN drafts d ON d.id = n.draft_id
+        WHERE n.clicked_at IS NOT NULL AND n.clicked_at IS DISTINCT FROM o.clicked_at
+    ),
+    buckets AS (
+        SELECT draft_id,
+               user_id,
+               date_trunc('hour', at) AS bucket,
+               COUNT(*) FILTER (WHERE event = 'open') AS opens,
+               COUNT(*) FILTER (WHERE event = 'click') AS clicks,
+               COUNT(*) FILTER (WHERE event = 'open' AND is_first) AS unique_opens,
+               COUNT(*) FILTER (WHERE event = 'click' AND is_first) AS unique_clicks
+        FROM changes
+        GROUP BY draft_id, user_id, date_trunc('hour', at)
+    )
+    INSERT INTO engagement_rollups AS r
+        (scope, scope_id, bucket, granularity, opens, clicks, unique_opens, unique_clicks)
+    SELECT 'draft', draft_id, bucket, 'hour', opens, clicks, unique_opens, unique_clicks
+    FROM buckets
+    UNION ALL
+    SELECT 'user', user_id, bucket, 'hour', SUM(opens), SUM(clicks), SUM(unique_opens), SUM(unique_clicks)
+    FROM buckets
+    WHERE user_id IS NOT NULL
+    GROUP BY user_id, bucket
+    ON CONFLICT (scope, scope_id, bucket, granularity) DO UPDATE SET
+        opens = r.opens + EXCLUDED.opens,
+        clicks = r.clicks + EXCLUDED.clicks,
+        unique_opens = r.unique_opens + EXCLUDED.unique_opens,
+        unique_clicks = r.unique_clicks + EXCLUDED.unique_clicks;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS analytics_rollups_update ON analytics;
+CREATE TRIGGER analytics_rollups_update AFTER UPDATE ON analytics
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION engagement_rollups_on_update();
+
+-- Fold hourly rows before p_before (rounded down to a day) into daily rows and drop
+-- rollups of deleted drafts; returns the number of hourly rows compacted
+CREATE OR REPLACE FUNCTION compact_engagement_rollups(p_before TIMESTAMP WITH TIME ZONE)
+RETURNS INTEGER AS $$
+DECLARE
+    compacted INTEGER;
+BEGIN
+    CREATE TEMP TABLE compacted_rollups ON COMMIT DROP AS
+    WITH moved AS (
+        DELETE FROM engagement_rollups
+        WHERE granularity = 'hour' AND bucket < date_trunc('day', p_before)
+        RETURNING *
+    )
+    SELECT * FROM moved;
+    GET DIAGNOSTICS compacted = ROW_COUNT;
+
+    INSERT INTO engagement_rollups AS r
+        (scope, scope_id, bucket, granularity, opens, clicks, unique_opens, unique_clicks)
+    SELECT scope, scope_id, date_trunc('day', bucket), 'day',
+           SUM(opens), SUM(clicks), SUM(unique_opens), SUM(unique_clicks)
+    FROM compacted_rollups
+    GROUP BY scope, scope_id, date_trunc('day', bucket)
+    ON CONFLICT (scope, scope_id, bucket, granularity) DO UPDATE SET
+        opens = r.opens + EXCLUDED.opens,
+        clicks = r.clicks + EXCLUDED.clicks,
+        unique_opens = r.unique_opens + EXCLUDED.unique_opens,
+        unique_clicks = r.unique_clicks + EXCLUDED.unique_clicks;
+
+    DELETE FROM engagement_rollups r
+    WHERE r.scope = 'draft'
+      AND NOT EXISTS (SELECT 1 FROM drafts d WHERE d.id = r.scope_id);
+
+    RETURN compacted;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill from the latest open/click recorded on existing recipient rows
+INSERT INTO engagement_rollups AS r
+    (scope, scope_id, bucket, granularity, opens, clicks, unique_opens, unique_clicks)
+SELECT scope, scope_id, bucket, 'hour', SUM(opens), SUM(clicks), SUM(opens), SUM(clicks)
+FROM (
+    SELECT 'draft' AS scope, a.draft_id AS scope_id, date_trunc('hour', a.opened_at) AS bucket, 1 AS opens, 0 AS clicks
+    FROM analytics a WHERE a.opened_at IS NOT NULL AND a.draft_id IS NOT NULL
+    UNION ALL
+    SELECT 'draft', a.draft_id, date_trunc('hour', a.clicked_at), 0, 1
+    FROM analytics a WHERE a.clicked_at IS NOT NULL AND a.draft_id IS NOT NULL
+    UNION ALL
+    SELECT 'user', d.user_id, date_trunc('hour', a.opened_at), 1, 0
+    FROM analytics a JOIN drafts d ON d.id = a.draft_id WHERE a.opened_at IS NOT NULL AND d.user_id IS NOT NULL
+    UNION ALL
+    SELECT 'user', d.user_id, date_trunc('hour', a.clicked_at), 0, 1
+    FROM analytics a JOIN drafts d ON d.id = a.draft_id WHERE a.clicked_at IS NOT NULL AND d.user_id IS NOT NULL
+) events
+GROUP BY scope, scope_id, bucket
+ON CONFLICT (scope, scope_id, bucket, granularity) DO NOTHING;
+
+COMMENT ON TABLE engagement_rollups IS 'Opens/clicks per hour (recent) or day (compacted) for each draft and user';
@@ -0,0 +1,40 @@
+-- Migration: Engagement timeline aggregation
+-- The timeline endpoint read raw rollup rows, which for long daily ranges (hourly rows not
+-- yet compacted plus daily rows) could pass PostgREST's row cap and silently lose the most
+-- recent hours. This aggregates to the requested granularity in the database, so at most
+-- one row per bucket comes back.
+--
+-- Note on counts: the API's tracking buffer coalesces repeated events from one recipient
+-- within a flush interval (tracking_flush_interval_seconds) before they reach analytics, so
+-- opens/clicks count recipients with at least one event per flush window, not every hit.
+
+CREATE OR REPLACE FUNCTION get_engagement_timeline(
+    p_scope TEXT,
+    p_scope_id UUID,
+    p_since TIMESTAMP WITH TIME ZONE,
+    p_granularity TEXT
+)
+RETURNS TABLE(
+    bucket TIMESTAMP WITH TIME ZONE,
+    opens BIGINT,
+    clicks BIGINT,
+    unique_opens BIGINT,
+    unique_clicks BIGINT
+) AS $$
+    SELECT date_trunc(p_granularity, r.bucket),
+           SUM(r.opens),
+           SUM(r.clicks),
+           SUM(r.unique_opens),
+           SUM(r.unique_clicks)
+    FROM engagement_rollups r
+    WHERE r.scope = p_scope
+      AND r.scope_id = p_scope_id
+      AND r.bucket >= p_since
+      -- Hourly timelines never include compacted daily rows
+      AND (p_granularity = 'day' OR r.granularity = 'hour')
+    GROUP BY 1
+    ORDER BY 1;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON COLUMN engagement_rollups.opens IS 'Open events per bucket; repeats from one recipient within a tracking flush window count once';
+COMMENT ON COLUMN engagement_rollups.clicks IS 'Click events per bucket; repeats from one recipient within a tracking flush window count once';
@@ -0,0 +1,48 @@
+-- Migration: Attempt limit for expired send leases
+-- Rows whose lease expired (the worker died mid-send) were reclaimed regardless of how
+-- many attempts they had used. They now fail once they reach p_max_attempts, like rows
+-- that fail through complete_email_send_batch.
+
+DROP FUNCTION IF EXISTS claim_email_send_batch(UUID, TEXT, INTEGER, INTEGER);
+
+CREATE OR REPLACE FUNCTION claim_email_send_batch(
+    p_job_id UUID,
+    p_worker TEXT,
+    p_limit INTEGER,
+    p_lease_seconds INTEGER,
+    p_max_attempts INTEGER
+)
+RETURNS SETOF email_send_queue AS $$
+BEGIN
+    UPDATE email_send_queue
+    SET status = 'failed',
+        last_error = COALESCE(last_error, 'Send lease expired'),
+        locked_by = NULL,
+        locked_until = NULL,
+        updated_at = NOW()
+    WHERE job_id = p_job_id
+      AND status = 'sending'
+      AND locked_until < NOW()
+      AND attempts >= p_max_attempts;
+
+    RETURN QUERY
+    UPDATE email_send_queue q
+    SET status = 'sending',
+        locked_by = p_worker,
+        locked_until = NOW() + make_interval(secs => p_lease_seconds),
+        attempts = q.attempts + 1,
+        updated_at = NOW()
+    WHERE q.id IN (
+        SELECT id FROM email_send_queue
+        WHERE job_id = p_job_id
+          AND (
+              (status = 'pending' AND next_attempt_at <= NOW())
+              OR (status = 'sending' AND locked_until < NOW() AND attempts < p_max_attempts)
+          )
+        ORDER BY created_at, id
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING q.*;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,51 @@
+-- Migration: Batched open/click tracking
+-- The API buffers tracking events and applies them with one call per batch instead of
+-- a select plus an update per event. Events are coalesced per recipient before sending.
+-- p_events: [{"event": "open"|"click", "draft_id", "token", "recipient_email", "url", "at"}]
+-- Events without token or recipient_email update one row of the draft, as before.
+
+CREATE OR REPLACE FUNCTION apply_tracking_events(p_events JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    opened INTEGER;
+    clicked INTEGER;
+BEGIN
+    CREATE TEMP TABLE tracking_batch ON COMMIT DROP AS
+    SELECT e.event,
+           e.at,
+           e.url,
+           (
+               SELECT a.id FROM analytics a
+               WHERE a.draft_id = e.draft_id
+                 AND (e.token IS NULL OR a.token = e.token)
+                 AND (e.recipient_email IS NULL OR a.recipient_email = e.recipient_email)
+               LIMIT 1
+           ) AS analytics_id
+    FROM jsonb_to_recordset(p_events) AS e(
+        event TEXT, draft_id UUID, token TEXT, recipient_email TEXT, url TEXT, at TIMESTAMP WITH TIME ZONE
+    );
+
+    UPDATE analytics a
+    SET opened_at = b.at
+    FROM (
+        SELECT analytics_id, MAX(at) AS at FROM tracking_batch
+        WHERE event = 'open' AND analytics_id IS NOT NULL
+        GROUP BY analytics_id
+    ) b
+    WHERE a.id = b.analytics_id;
+    GET DIAGNOSTICS opened = ROW_COUNT;
+
+    UPDATE analytics a
+    SET clicked_at = b.at,
+        last_clicked_url = COALESCE(b.url, a.last_clicked_url)
+    FROM (
+        SELECT DISTINCT ON (analytics_id) analytics_id, at, url FROM tracking_batch
+        WHERE event = 'click' AND analytics_id IS NOT NULL
+        ORDER BY analytics_id, at DESC
+    ) b
+    WHERE a.id = b.analytics_id;
+    GET DIAGNOSTICS clicked = ROW_COUNT;
+
+    RETURN opened + clicked;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,23 @@
+-- Migration: Server-side analytics summary
+-- GET /api/analytics/ used to pull every analytics row on the platform (and every draft
+-- of the user) into the API to count them. This returns just the counts for one user,
+-- computed through drafts.user_id with the existing draft/analytics indexes.
+
+CREATE OR REPLACE FUNCTION get_user_analytics_summary(p_user_id UUID)
+RETURNS TABLE(
+    total_drafts BIGINT,
+    total_sent BIGINT,
+    total_emails_sent BIGINT,
+    total_opened BIGINT,
+    total_clicked BIGINT
+) AS $$
+    SELECT
+        (SELECT COUNT(*) FROM drafts WHERE user_id = p_user_id),
+        (SELECT COUNT(*) FROM drafts WHERE user_id = p_user_id AND status = 'sent'),
+        COUNT(a.id),
+        COUNT(a.opened_at),
+        COUNT(a.clicked_at)
+    FROM drafts d
+    JOIN analytics a ON a.draft_id = d.id
+    WHERE d.user_id = p_user_id;
+$$ LANGUAGE sql STABLE;
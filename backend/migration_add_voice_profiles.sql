@@ -0,0 +1,23 @@
+-- Migration: Add precomputed voice profiles
+-- Profiles are rebuilt by the API whenever a user's voice samples change, so draft
+-- generation reads one small row (usually from memory) instead of raw samples
+
+CREATE TABLE IF NOT EXISTS user_voice_profiles (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    sample_count INTEGER NOT NULL DEFAULT 0,
+    features JSONB NOT NULL DEFAULT '{}'::jsonb,
+    style_summary TEXT NOT NULL DEFAULT '',
+    excerpts JSONB NOT NULL DEFAULT '[]'::jsonb,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Add RLS (Row Level Security) policy
+ALTER TABLE user_voice_profiles ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can read their own voice profile" ON user_voice_profiles
+    FOR SELECT USING (auth.uid() = user_id);
+
+-- Add comment for documentation
+COMMENT ON TABLE user_voice_profiles IS 'Voice profile derived from user_voice_samples: stylometric features, style summary and representative excerpts';
+COMMENT ON COLUMN user_voice_profiles.features IS 'Stylometric features such as average sentence length and pronoun rates';
+COMMENT ON COLUMN user_voice_profiles.excerpts IS 'Most representative sample paragraphs as [{title, content}]';
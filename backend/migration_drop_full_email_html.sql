@@ -0,0 +1,5 @@
+-- Migration: Drop the stored full_email_html copy from drafts
+-- Newsletter HTML is rendered on demand from generated_html and cached in memory per
+-- draft version and bundle color, so the stored copy was never read.
+
+ALTER TABLE drafts DROP COLUMN IF EXISTS full_email_html;
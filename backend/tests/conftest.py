@@ -0,0 +1,9 @@
+import os
+
+# Settings are read at import time; give the app harmless local defaults
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "test.test.test")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test.test.test")
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("ENCRYPTION_KEY", "test")
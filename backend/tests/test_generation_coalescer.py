@@ -0,0 +1,62 @@
+import asyncio
+
+from app.services.generation_coalescer import GenerationCoalescer
+
+
+def test_rejected_results_are_not_reused():
+    coalescer = GenerationCoalescer(ttl_seconds=60)
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        return ("fallback", True)
+
+    async def run_twice():
+        for _ in range(2):
+            await coalescer.run("bundle:professional:", factory, cacheable=lambda result: not result[1])
+
+    asyncio.run(run_twice())
+
+    assert len(calls) == 2
+    assert coalescer.stats["not_cached"] == 2
+    assert coalescer.stats["reused_completed"] == 0
+
+
+def test_rejected_results_are_shared_in_flight():
+    coalescer = GenerationCoalescer(ttl_seconds=60)
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ("fallback", True)
+
+    async def run_together():
+        return await asyncio.gather(*(
+            coalescer.run("bundle:professional:", factory, cacheable=lambda result: not result[1])
+            for _ in range(3)
+        ))
+
+    results = asyncio.run(run_together())
+
+    assert len(calls) == 1
+    assert results == [("fallback", True)] * 3
+    assert coalescer.stats["joined_in_flight"] == 2
+
+
+def test_accepted_results_are_reused():
+    coalescer = GenerationCoalescer(ttl_seconds=60)
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        return ("draft", False)
+
+    async def run_twice():
+        for _ in range(2):
+            await coalescer.run("bundle:professional:", factory, cacheable=lambda result: not result[1])
+
+    asyncio.run(run_twice())
+
+    assert len(calls) == 1
+    assert coalescer.stats["reused_completed"] == 1
@@ -0,0 +1,38 @@
+from app.config import settings
+from app.services.draft_generator import DraftGeneratorService
+from app.services.email_template_service import EmailTemplateService
+
+DRAFT_HTML = """
+<div class="newsletter-content">
+    <h2>This Week in Review</h2>
+    <p>Open models, infrastructure spending and regulation shaped the week across the industry.</p>
+    <h3>Open models close the gap</h3>
+    <p>Several open-weight releases now match last year's frontier results on common benchmarks.</p>
+    <h3>Infrastructure spending keeps climbing</h3>
+    <p>Cloud providers raised capital expenditure guidance again, citing demand for accelerators.</p>
+    <h3>Trends to Watch</h3>
+    <p>Expect smaller, specialised models and more scrutiny of training data provenance.</p>
+</div>
+"""
+
+
+def test_readiness_score_of_optimized_email(monkeypatch):
+    monkeypatch.setattr(settings, "email_optimize_html", True)
+    html = EmailTemplateService().generate_newsletter_html(DRAFT_HTML, "Tech Weekly", entries=[])
+
+    assert DraftGeneratorService()._calculate_readiness_score(html, 10) == 100
+
+
+def test_readiness_score_ignores_email_optimization(monkeypatch):
+    scores = []
+    for optimize in (True, False):
+        monkeypatch.setattr(settings, "email_optimize_html", optimize)
+        html = EmailTemplateService().generate_newsletter_html(DRAFT_HTML, "Tech Weekly", entries=[])
+        scores.append(DraftGeneratorService()._calculate_readiness_score(html, 10))
+
+    assert scores[0] == scores[1]
+
+
+def test_readiness_score_of_draft_content():
+    # generate_draft scores the AI draft content; the email is rendered only when sent or previewed
+    assert DraftGeneratorService()._calculate_readiness_score(DRAFT_HTML, 10) == 100
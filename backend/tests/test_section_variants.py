@@ -0,0 +1,34 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services import ai_service
+from app.services.ai_service import VARIANT_DELIMITER, AIService
+
+
+class FallbackRouter:
+    """Router whose fallback model answers and ignores `n`"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def complete(self, messages, model, temperature, max_tokens, n=None):
+        self.calls.append(n)
+        if n:
+            content = "Only one variant"
+        else:
+            content = f"First\n{VARIANT_DELIMITER}\nSecond\n{VARIANT_DELIMITER}\nThird"
+        choice = SimpleNamespace(message=SimpleNamespace(content=content))
+        return SimpleNamespace(choices=[choice]), "fallback/model"
+
+
+def test_n_parameter_flag_applies_to_requested_model(monkeypatch):
+    monkeypatch.setattr(ai_service, "_N_PARAM_SUPPORT", {})
+    service = AIService()
+    service.router = FallbackRouter()
+
+    for _ in range(2):
+        variants = asyncio.run(service.regenerate_section_variants("intro", "Current intro", [], num_variants=3))
+        assert variants == ["First", "Second", "Third"]
+
+    # The wasted `n` request is paid once, not on every later call
+    assert service.router.calls == [3, None, None]
@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+import uuid
+
+from app.config import settings
+from app.services.tracking_buffer import TrackingEventBuffer
+
+
+def _event(event_type: str = "open") -> dict:
+    return {
+        "event": event_type,
+        "draft_id": str(uuid.uuid4()),
+        "analytics_id": str(uuid.uuid4()),
+        "token": None,
+        "recipient_email": None,
+        "url": None,
+        "at": "2026-01-01T00:00:00"
+    }
+
+
+def _write_spill(path, events) -> None:
+    with open(path, "w", encoding="utf-8") as spill:
+        for event in events:
+            spill.write(json.dumps(event) + "\n")
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_workers_spill_to_their_own_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "tracking_spill_dir", str(tmp_path))
+    buffer = TrackingEventBuffer()
+
+    buffer.record("open", str(uuid.uuid4()), analytics_id=str(uuid.uuid4()))
+
+    assert buffer.spill_path == os.path.join(str(tmp_path), f"tracking_events.{os.getpid()}.jsonl")
+    assert os.path.exists(buffer.spill_path)
+
+
+def test_recover_takes_over_dead_workers_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "tracking_spill_dir", str(tmp_path))
+    dead_events = [_event("open"), _event("click")]
+    dead_spill = tmp_path / f"tracking_events.{_dead_pid()}.jsonl"
+    _write_spill(dead_spill, dead_events[:1])
+    _write_spill(f"{dead_spill}.inflight", dead_events[1:])
+    # The parent process (e.g. the uvicorn supervisor) is alive: its file is left alone
+    live_spill = tmp_path / f"tracking_events.{os.getppid()}.jsonl"
+    _write_spill(live_spill, [_event()])
+
+    buffer = TrackingEventBuffer()
+    buffer._recover()
+
+    assert buffer.stats["recovered"] == 2
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(buffer.spill_path), live_spill.name])
+    with open(buffer.spill_path, encoding="utf-8") as spill:
+        assert sorted(json.loads(line)["analytics_id"] for line in spill) == sorted(e["analytics_id"] for e in dead_events)